@@ -3,6 +3,9 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it by uvicorn workers of gunicorn:
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -13,5 +16,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("SERVER_INTERFACE", "asgi")
 
 application = get_asgi_application()
@@ -25,6 +25,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from django.conf import settings
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
@@ -40,3 +41,17 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 app.conf.timezone = "Europe/Kiev"
+app.conf.beat_schedule = {
+    "relay-outbox": {
+        "task": "src.main.tasks.relay_outbox",
+        "schedule": settings.OUTBOX_RELAY_INTERVAL,
+    },
+    "process-due-orders": {
+        "task": "src.orders.tasks.process_due_orders",
+        "schedule": settings.ORDER_STATUS_INTERVAL,
+    },
+    "collect-garbage": {
+        "task": "src.orders.tasks.collect_garbage",
+        "schedule": settings.GC_INTERVAL,
+    },
+}
@@ -15,6 +15,7 @@ from datetime import timedelta
 from enum import Enum
 from pathlib import Path
 
+import django
 import environ
 from django.templatetags.static import static
 from django.urls import reverse_lazy
@@ -68,6 +69,7 @@ INSTALLED_APPS = [
     "src.products",
     "src.orders",
     "src.games",
+    "src.statistic",
     "ninja_extra",
     "meta",
 ]
@@ -112,6 +114,8 @@ NINJA_JWT = {
     "TOKEN_BLACKLIST_INPUT_SCHEMA": "ninja_jwt.schema.TokenBlacklistInputSchema",
     "TOKEN_VERIFY_INPUT_SCHEMA": "ninja_jwt.schema.TokenVerifyInputSchema",
 }
+JWT_AUTH_CACHE_SIZE = 10_000  # verified tokens kept in memory of every worker
+JWT_BLACKLIST_CHECK_INTERVAL = 5  # seconds between checks of blacklist changes
 # django settings.py
 NINJA_EXTRA = {
     "THROTTLE_RATES": {
@@ -318,6 +322,8 @@ AUTHENTICATION_BACKENDS = [
     "allauth.account.auth_backends.AuthenticationBackend",
 ]
 MIDDLEWARE = [
+    "src.main.middleware.InstrumentationMiddleware",
+    "src.main.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -330,6 +336,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # Add the account middleware:
     "allauth.account.middleware.AccountMiddleware",
+    "src.users.utils.IdentityMapMiddleware",
+    "src.orders.utils.CartCookieMiddleware",
 ]
 INTERNAL_IPS = [
     # ...
@@ -387,6 +395,17 @@ EMAIL_HOST_USER = env("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL")
 ABSOLUTE_URL = f'{env("MEDIA_URL")}'
+SHARE_NEWS_CHUNK_SIZE = 500  # recipients per one task (SMTP connection)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": env("REDIS_URL"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "src.main.instrumentation.InstrumentedCacheClient",
+        },
+    }
+}
 
 CELERY_BROKER_URL = env("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND")
@@ -394,6 +413,35 @@ CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_BROKER_TRANSPORT_OPTIONS = {"visibility_timeout": 3600}
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+OUTBOX_RELAY_INTERVAL = 2  # seconds between launches of relay_outbox
+OUTBOX_RELAY_BATCH_SIZE = 100
+ORDER_PROCESSING_TIME = 10  # seconds before order in progress is completed or canceled
+ORDER_STATUS_INTERVAL = 5  # seconds between launches of process_due_orders
+ORDER_STATUS_BATCH_SIZE = 500
+TRENDING_HALF_LIFE = 60 * 60 * 24 * 3  # seconds after which weight of sold item is halved
+TRENDING_TOP_SIZE = 50  # count of products in precomputed top
+TRENDING_CACHE_TIMEOUT = 60 * 60
+TRENDING_CAROUSEL = True  # show trending carousel on storefront
+CART_COOKIE_NAME = "cart_key"
+CART_COOKIE_AGE = 60 * 60 * 24 * 30
+CART_ID_CACHE_TIMEOUT = 60 * 60 * 24
+CART_GUEST_TTL = CART_COOKIE_AGE  # seconds after which unused guest's cart is deleted
+GC_INTERVAL = 60 * 60  # seconds between launches of collect_garbage
+GC_BATCH_SIZE = 1000  # primary keys processed in one transaction
+GC_TIME_LIMIT = 60  # seconds of one launch of collect_garbage
+INSTRUMENTATION_SERVER_TIMING = env.bool("DEBUG", default=False)  # send Server-Timing header
+INSTRUMENTATION_LOG_ALL = False  # log every request, not only slow ones
+INSTRUMENTATION_SLOW_REQUEST = 500  # milliseconds
+INSTRUMENTATION_SLOW_QUERY = 100  # milliseconds
+INSTRUMENTATION_PROFILE_RATE = 0.0  # share of profiled requests
+INSTRUMENTATION_PROFILE_THRESHOLD = 1000  # milliseconds after which profile is saved
+INSTRUMENTATION_PROFILER = "cprofile"  # or "pyinstrument" if it is installed
+INSTRUMENTATION_PROFILE_DIR = BASE_DIR / "profiles"
+METRICS_STORAGE = "redis"  # "redis" is shared by all workers, "local" is memory of process
+METRICS_FLUSH_INTERVAL = 5  # seconds between flushes of process metrics to storage
+METRICS_CELERY_TASKS = ("process_due_orders", "send_news_chunk", "email_verification", "reset_password_confirm")
+METRICS_ALLOWED_NETWORKS = ("127.0.0.0/8", "10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16")
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")  # bearer token of scraper, required if set
 FRONTEND_URL = env("FRONTEND_URL")
 
 TEMPLATES = [
@@ -413,6 +461,12 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
+# "asgi" is set by config/asgi.py (uvicorn workers), otherwise gunicorn sync workers are used
+SERVER_INTERFACE = env("SERVER_INTERFACE", default="wsgi")
+if SERVER_INTERFACE == "asgi":
+    # sync-only middleware would run every request in thread
+    MIDDLEWARE.remove("debug_toolbar.middleware.DebugToolbarMiddleware")
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -425,8 +479,63 @@ DATABASES = {
         "PASSWORD": env("DB_PASSWORD"),
         "HOST": env("DB_HOST"),
         "PORT": env("DB_PORT"),
+        # keep connection between requests instead of new handshake every time,
+        # under ASGI every request has own connection, so they can't be reused
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=0 if SERVER_INTERFACE == "asgi" else 60),
+        "CONN_HEALTH_CHECKS": env.bool("DB_CONN_HEALTH_CHECKS", default=True),
     },
 }
+# connections are budgeted per process: gunicorn worker uses one
+# connection per thread, every celery child process uses one
+WEB_WORKERS = env.int("WEB_CONCURRENCY", default=1)  # also read by gunicorn
+WEB_THREADS = env.int("WEB_THREADS", default=1)
+# expected concurrent requests of ASGI worker, every one of them uses own connection
+WEB_ASGI_CONCURRENCY = env.int("WEB_ASGI_CONCURRENCY", default=20)
+# parts of bundle endpoints run in threads of pool, every thread keeps own connection
+BUNDLE_WORKERS = env.int("BUNDLE_WORKERS", default=4)
+BUNDLE_TIMEOUT = env.float("BUNDLE_TIMEOUT", default=2.0)  # seconds
+CELERY_WORKER_CONCURRENCY = env.int("CELERY_WORKER_CONCURRENCY", default=os.cpu_count() or 1)
+DB_MAX_CONNECTIONS = env.int("DB_MAX_CONNECTIONS", default=100)  # max_connections of postgres
+# psycopg 3 pool (Django 5.1+) replaces persistent connections
+DB_POOL = env.bool("DB_POOL", default=False)
+DB_POOL_MIN_SIZE = env.int("DB_POOL_MIN_SIZE", default=1)
+DB_POOL_MAX_SIZE = env.int("DB_POOL_MAX_SIZE", default=WEB_THREADS)
+DB_POOL_TIMEOUT = env.int("DB_POOL_TIMEOUT", default=10)  # seconds of waiting for free connection
+# psycopg2 rejects option "pool", without support persistent connections are kept (check main.E001)
+if DB_POOL and django.VERSION >= (5, 1):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+        },
+    }
+# read replica for storefront reads, writes always go to default
+DB_REPLICA = env.bool("DB_REPLICA", default=False)
+REPLICA_DATABASE = "replica"
+# client reads from default for this time after own writes (covers replication lag)
+DB_REPLICA_STICKY_SECONDS = env.int("DB_REPLICA_STICKY_SECONDS", default=5)
+# GET requests matching these patterns may read from replica
+DB_REPLICA_PATHS = (
+    r"^/api/products/",
+    r"^/api/games/",
+    r"^/api/catalog-page/",
+    r"^/api/main/",
+    r"^/api/orders/my-orders/",
+    r"^/api/orders/\d+/detail/",
+)
+if DB_REPLICA:
+    DATABASES[REPLICA_DATABASE] = dict(
+        DATABASES["default"],
+        NAME=env("DB_REPLICA_NAME", default=DATABASES["default"]["NAME"]),
+        USER=env("DB_REPLICA_USER", default=DATABASES["default"]["USER"]),
+        PASSWORD=env("DB_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]),
+        HOST=env("DB_REPLICA_HOST", default=DATABASES["default"]["HOST"]),
+        PORT=env("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+        TEST={"MIRROR": "default"},
+    )
+    DATABASE_ROUTERS = ["src.main.routers.ReplicaRouter"]
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
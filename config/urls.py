@@ -16,29 +16,33 @@ Including another URLconf
     path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import hmac
+import ipaddress
 import os
+from datetime import date, timedelta
 
 import pendulum
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import QuerySet, Sum
-from django.http import HttpRequest, HttpResponse
+from django.db.models import Count, Q
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.urls import include, path
 from django.utils.translation import gettext as _
 from django.views.generic import View
 from ninja.errors import AuthenticationError, ValidationError
 from ninja_extra import NinjaExtraAPI, status
-from pendulum.datetime import DateTime
 
 from config import settings
 from src.games.api import CatalogController, GamesController
 from src.main.api import MainController
+from src.main.instrumentation import InstrumentedJSONRenderer, route_histograms
+from src.main.metrics import registry
 from src.orders.api import OrderController
-from src.orders.models import Order
 from src.products.api import ProductController
-from src.products.models import Product
+from src.statistic.services.statistic_service import StatisticService
+from src.statistic.services.trending_service import TrendingService
 from src.users.api import AuthController, CustomTokenObtainPairController, UsersController
 from src.users.models import User
 
@@ -62,73 +66,41 @@ class StatisticView(SuperUserRequiredMixin, View):
         return ((first_number / second_number) * 100) - 100
 
     @staticmethod
-    def chart_calc(start: DateTime, num_days: int, orders: QuerySet) -> (float, [], []):
+    def chart_calc(series: list) -> (float, [], []):
         week_days = []
         week_income_chart = []
         week_icome = 0
-        date = start
-        for item in range(1, num_days + 2):
-            day = date.format("DD dddd")
-            week_days.append(day)
-            filtered_orders = orders.filter(date_created__date=date.date())
-            income = filtered_orders.aggregate(price=Sum("total_price"))["price"]
-            if income is None:
-                income = 0
-            income = round(income, 2)
-            week_icome = week_icome + income
-            week_income_chart.append([1, income])
-            date = start.add(days=item)
+        for item in series:
+            week_days.append(pendulum.instance(item["period"]).format("DD dddd"))
+            week_icome = week_icome + item["revenue"]
+            week_income_chart.append([1, item["revenue"]])
         return week_icome, week_days, week_income_chart
 
     def get(self, request):
         context = {}
+        statistic_service = StatisticService()
 
         today = pendulum.now(tz="Europe/Kiev")
         start_current_week = today.start_of("week")
-        end_current_week = today.end_of("week")
         start_last_week = start_current_week.subtract(days=7)
-        end_last_week = end_current_week.subtract(days=7)
-        total_users = User.objects.count()
-        user_notified = User.objects.filter(notify_me=True).count()
-        orders_last_week = Order.objects.filter(
-            date_created__range=[start_last_week, end_last_week], status="COMPLETED"
-        )
-        orders_current_week = Order.objects.filter(
-            date_created__range=[start_current_week, end_current_week], status="COMPLETED"
-        )
-        orders_progress = self.progress_calc(orders_current_week.count(), orders_last_week.count())
-
-        income_current_week = orders_current_week.aggregate(price=Sum("total_price"))["price"]
-        income_last_week = orders_last_week.aggregate(price=Sum("total_price"))["price"]
-        income_progress = self.progress_calc(income_current_week, income_last_week)
-
-        num_days = end_last_week.diff(start_last_week).in_days()
-        last_week_icome, last_week_days, last_week_income_chart = self.chart_calc(
-            start=start_last_week, num_days=num_days, orders=orders_last_week
-        )
-
-        num_days = today.diff(start_current_week).in_days()
-        current_week_icome, current_week_days, current_week_income_chart = self.chart_calc(
-            start=start_current_week, num_days=num_days, orders=orders_current_week
-        )
+        users = User.objects.aggregate(total=Count("id"), notified=Count("id", filter=Q(notify_me=True)))
+        total_users = users["total"]
+        user_notified = users["notified"]
+        series = statistic_service.get_sales_series(start_last_week.date(), today.date())
+        last_week_series, current_week_series = series[:7], series[7:]
+        orders_last_week = sum(item["orders_count"] for item in last_week_series)
+        orders_current_week = sum(item["orders_count"] for item in current_week_series)
+
+        last_week_icome, last_week_days, last_week_income_chart = self.chart_calc(last_week_series)
+        current_week_icome, current_week_days, current_week_income_chart = self.chart_calc(current_week_series)
+        orders_progress = self.progress_calc(orders_current_week, orders_last_week)
+        income_progress = self.progress_calc(current_week_icome, last_week_icome)
 
         # pie Chart
-        orders_2_last_week = Order.objects.prefetch_related("items").filter(
-            date_created__range=[start_last_week, end_current_week], status="COMPLETED"
-        )
-        list_ids = set()
-        for order in orders_2_last_week:
-            order: Order
-            for item in order.items.all():
-                if item.product:
-                    list_ids.add(item.product.id)
-                if item.freqbot:
-                    for prod in item.freqbot.products.all():
-                        list_ids.add(prod.id)
-        trend_products = Product.objects.filter(id__in=list_ids)[:10]
+        trend_products = TrendingService().get_top_products(10)
         trend_chart = []
-        for product in trend_products:
-            trend_chart.append([product.title, product.bought_count])
+        for product, score in trend_products:
+            trend_chart.append([product.title, round(score, 2)])
         context["trend_chart"] = trend_chart
         context["current_week_icome"] = 0 if current_week_icome is None else round(current_week_icome, 2)
         context["current_week_days"] = current_week_days
@@ -137,15 +109,86 @@ class StatisticView(SuperUserRequiredMixin, View):
         context["last_week_days"] = last_week_days
         context["last_week_income_chart"] = last_week_income_chart
         context["total_users"] = total_users
-        context["total_orders"] = orders_current_week.count()
+        context["total_orders"] = orders_current_week
         context["total_order_progress"] = 0 if orders_progress is None else round(orders_progress, 2)
-        context["notify_me_percent"] = int((user_notified / total_users) * 100)
-        context["total_income"] = 0 if income_current_week is None else round(income_current_week, 2)
+        context["notify_me_percent"] = int((user_notified / total_users) * 100) if total_users else 0
+        context["total_income"] = 0 if current_week_icome is None else round(current_week_icome, 2)
         context["total_income_progress"] = 0 if income_progress is None else round(income_progress, 2)
         return render(request, self.template_name, context)
 
 
-main_api = NinjaExtraAPI()
+class SalesSeriesView(SuperUserRequiredMixin, View):
+    """
+    JSON data for admin charts.
+
+    Query params: start, end (YYYY-MM-DD, default last 30 days)
+    and interval (hour, day or week), products sold most
+    in the range are read from rollups too
+    """
+
+    MAX_HOURLY_DAYS = 31
+    MAX_DAYS = 366 * 3
+
+    def get(self, request):
+        interval = request.GET.get("interval", "day")
+        if interval not in StatisticService.SERIES_INTERVALS:
+            return JsonResponse({"message": _("Unknown interval")}, status=400)
+        today = pendulum.now(tz=settings.TIME_ZONE).date()
+        try:
+            end = date.fromisoformat(request.GET["end"]) if "end" in request.GET else today
+            start = (date.fromisoformat(request.GET["start"]) if "start" in request.GET
+                     else end - timedelta(days=29))
+        except ValueError:
+            return JsonResponse({"message": _("Invalid date")}, status=400)
+        max_days = self.MAX_HOURLY_DAYS if interval == "hour" else self.MAX_DAYS
+        if start > end or (end - start).days >= max_days:
+            return JsonResponse({"message": _("Invalid date range")}, status=400)
+        statistic_service = StatisticService()
+        series = statistic_service.get_sales_series(start, end, interval)
+        top_products = statistic_service.get_top_products(start, end)
+        return JsonResponse({
+            "interval": interval,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "series": [{**item, "period": item["period"].isoformat()} for item in series],
+            "top_products": [{"id": product.id, "title": product.title, "sold": sold}
+                             for product, sold in top_products],
+        })
+
+
+class InstrumentationView(SuperUserRequiredMixin, View):
+    """
+    JSON with latency histograms of routes collected by worker.
+
+    Query param reset=1 clears collected histograms
+    """
+
+    def get(self, request):
+        routes = route_histograms.snapshot()
+        if request.GET.get("reset") == "1":
+            route_histograms.reset()
+        return JsonResponse({"pid": os.getpid(), "routes": routes})
+
+
+class MetricsView(View):
+    """
+    Metrics in Prometheus text format, available only from internal networks.
+
+    Behind proxy address of proxy is seen, so nginx denies /internal/
+    and scraper sends METRICS_TOKEN as bearer token if it's set.
+    """
+
+    def get(self, request):
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", "0.0.0.0"))
+        if not any(address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS):
+            return HttpResponse(status=404)
+        if settings.METRICS_TOKEN and not hmac.compare_digest(request.headers.get("Authorization", ""),
+                                                              f"Bearer {settings.METRICS_TOKEN}"):
+            return HttpResponse(status=404)
+        return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+main_api = NinjaExtraAPI(renderer=InstrumentedJSONRenderer())
 
 
 @main_api.exception_handler(AuthenticationError)
@@ -215,6 +258,9 @@ def return_text_file(request):
 
 urlpatterns = [
     path("admin/statistic/", StatisticView.as_view()),
+    path("admin/statistic/sales-series/", SalesSeriesView.as_view()),
+    path("admin/instrumentation/", InstrumentationView.as_view()),
+    path("internal/metrics", MetricsView.as_view()),
     path("admin/", admin.site.urls),
     path("api/", main_api.urls),
     # path(".well-known/pki-validation/C7375380888E8ABE294C1F6B312A1A4F.txt", return_text_file),
@@ -71,7 +71,8 @@ def django_db_setup():
 @pytest.fixture(scope='session')
 def django_db_setup():
     logger.debug(settings.DATABASES['default']['NAME'])
-    settings.DATABASES['default'] = {
+    # other keys are filled by django on startup (ATOMIC_REQUESTS, ...)
+    settings.DATABASES['default'].update({
         "ENGINE": env("DB_ENGINE"),
         "NAME": env("DB_NAME_TEST"),
         "USER": env("DB_USER"),
@@ -82,7 +83,7 @@ def django_db_setup():
         "PASSWORD": env("DB_PASSWORD"),
         "HOST": env("DB_HOST"),
         "PORT": env("DB_PORT"),
-    }
+    })
 
 
 obtain_token_client = TestClient(CustomTokenObtainPairController)
@@ -8,7 +8,7 @@ import json
 from typing import List
 
 from django.db.models import QuerySet
-from django.http import HttpRequest
+from django.http import HttpRequest, JsonResponse
 from ninja_extra import http_get
 from ninja_extra.controllers.base import ControllerBase, api_controller
 
@@ -17,6 +17,7 @@ from src.games.models import CatalogTabs, Game, CatalogPage
 from src.games.schemas import (
     CalendarBlockItemSchema,
     CalendarBlockSchema,
+    CatalogPageBundleSchema,
     CatalogPageSchema,
     GamesSchema,
     SidebarSchema,
@@ -183,10 +184,10 @@ class GamesController(ControllerBase):
             },
         },
     )
-    def get_games(self, request: HttpRequest,
-                  accept_lang:
-                  LangEnum = Header(alias='Accept-Language'),
-                  ) -> Game:
+    async def get_games(self, request: HttpRequest,
+                        accept_lang:
+                        LangEnum = Header(alias='Accept-Language'),
+                        ) -> Game:
         """
         Get all games and related to specific game root catalog's pages.
 
@@ -197,7 +198,7 @@ class GamesController(ControllerBase):
           - **500**: Internal server error if an unexpected error occurs.
 
         """
-        result = self.game_service.get_games()
+        result = await self.game_service.aget_games()
         return result
 
 
@@ -258,10 +259,10 @@ class CatalogController(ControllerBase):
             },
         },
     )
-    def get_catalog_page(self, request: HttpRequest, page_id: int,
-                         accept_lang:
-                         LangEnum = Header(alias='Accept-Language'),
-                         ) -> CatalogPage:
+    async def get_catalog_page(self, request: HttpRequest, page_id: int,
+                               accept_lang:
+                               LangEnum = Header(alias='Accept-Language'),
+                               ) -> CatalogPage:
         """
         Get catalog's page content by page id.
 
@@ -275,7 +276,7 @@ class CatalogController(ControllerBase):
           - **500**: Internal server error if an unexpected error occurs.
 
         """
-        result = self.game_service.get_catalog_page(page_id=page_id)
+        result = await self.game_service.aget_catalog_page(page_id=page_id)
         return result
 
     @http_get(
@@ -318,10 +319,10 @@ class CatalogController(ControllerBase):
             },
         },
     )
-    def get_worth_look(self, request: HttpRequest, page_id: int,
-                       accept_lang:
-                       LangEnum = Header(alias='Accept-Language'),
-                       ) -> QuerySet:
+    async def get_worth_look(self, request: HttpRequest, page_id: int,
+                             accept_lang:
+                             LangEnum = Header(alias='Accept-Language'),
+                             ) -> QuerySet:
         """
         Get catalog's page content by page id.
         Please provide:
@@ -333,9 +334,74 @@ class CatalogController(ControllerBase):
           - **422**: Error: Unprocessable Entity.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.game_service.get_worth_look(page_id=page_id)
+        result = await self.game_service.aget_worth_look(page_id=page_id)
         return result
 
+    @http_get(
+        "/{page_id}/bundle/",
+        response=CatalogPageBundleSchema,
+        openapi_extra={
+            "responses": {
+                404: {
+                    "description": "Error: Not Found",
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "properties": {
+                                    "detail": {
+                                        "type": "string",
+                                    }
+                                },
+                                "example": {"detail": "Not Found: " "No CatalogPage matches " "the given query."},
+                            }
+                        }
+                    },
+                },
+                422: {
+                    "description": "Error: Unprocessable Entity",
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "properties": {
+                                    "detail": {
+                                        "type": "string",
+                                    }
+                                },
+                            }
+                        }
+                    },
+                },
+                500: {
+                    "description": "Internal server error if" " an unexpected error occurs.",
+                },
+                504: {
+                    "description": "Error: Gateway Timeout if page wasn't fetched in time.",
+                },
+            },
+        },
+    )
+    async def get_catalog_page_bundle(self, request: HttpRequest, page_id: int,
+                                      accept_lang:
+                                      LangEnum = Header(alias='Accept-Language'),
+                                      ) -> JsonResponse:
+        """
+        Get catalog's page, worth look items and calendar by one request.
+        Parts are fetched concurrently, names of parts which
+        failed are returned in errors.
+        Please provide:
+         - **page_id**  id of page we want to get
+
+        Returns:
+          - **200**: Success response with the data.
+          - **404**: Error: Not Found.
+          - **422**: Error: Unprocessable Entity.
+          - **500**: Internal server error if an unexpected error occurs.
+          - **504**: Error: Gateway Timeout.
+        """
+        result = await self.game_service.get_catalog_page_bundle(page_id=page_id)
+        # parts are already rendered by their schemas in threads of bundle
+        return JsonResponse(result)
+
     @http_get(
         "/{page_id}/calendar/",
         response=List[CalendarBlockSchema],
@@ -461,10 +527,10 @@ class CatalogController(ControllerBase):
             },
         },
     )
-    def get_tab_content(self, request: HttpRequest, tab_id: int,
-                        accept_lang:
-                        LangEnum = Header(alias='Accept-Language'),
-                        ) -> CatalogTabs:
+    async def get_tab_content(self, request: HttpRequest, tab_id: int,
+                              accept_lang:
+                              LangEnum = Header(alias='Accept-Language'),
+                              ) -> CatalogTabs:
         """
         Get tab's content for catalog's page by tab id .
 
@@ -477,5 +543,5 @@ class CatalogController(ControllerBase):
           - **422**: Error: Not Found.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.game_service.get_tab_content(tab_id=tab_id)
+        result = await self.game_service.aget_tab_content(tab_id=tab_id)
         return result
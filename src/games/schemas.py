@@ -6,7 +6,7 @@ object and json
 """
 from typing import List
 
-from ninja import ModelSchema, Field
+from ninja import Field, ModelSchema, Schema
 
 from config.settings import ABSOLUTE_URL
 from src.games.models import CatalogPage, Game, WorthLookItem, CalendarBlockItem, CalendarBlock, CatalogTabs
@@ -209,12 +209,24 @@ class WorthLookItemSchema(ModelSchema):
 
     @staticmethod
     def resolve_offers(obj):
-        # count = (Product.objects
-        #          .filter(catalog_page=obj.catalog_page)
-        #          .count())
-        # print(obj.catalog_page.products.count())
-        return obj.catalog_page.products.count()
+        # annotated by GameService.get_worth_look
+        return obj.offers
 
     class Meta:
         model = WorthLookItem
         fields = ["catalog_page", "image", "image_alt"]
+
+
+class CatalogPageBundleSchema(Schema):
+    """
+    Pydantic schema for catalog's page bundle.
+
+    Purpose of this schema to return page,
+    worth look items and calendar by one request,
+    names of parts which failed are in errors
+    """
+
+    page: CatalogPageSchema
+    worth_look: List[WorthLookItemSchema]
+    calendar: List[CalendarBlockSchema]
+    errors: List[str]
@@ -3,11 +3,13 @@
     Module contains class for managing games and related entities.
 
 """
-from django.db.models import Prefetch, QuerySet
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, QuerySet
 from django.utils.translation import gettext as _
 from ninja.errors import HttpError
 
 from src.games.models import CalendarBlock, CalendarBlockItem, CatalogPage, CatalogTabs, Game, WorthLookItem
+from src.games.schemas import CalendarBlockSchema, CatalogPageSchema, WorthLookItemSchema
+from src.main.bundles import Bundle
 from src.products.models import Product
 from src.products.utils import paginate
 
@@ -64,12 +66,9 @@ class GameService:
         pr2 = Prefetch("catalog_pages",
                        queryset=CatalogPage.objects.filter(parent=None),
                        to_attr="items")
-        objects = Game.objects.prefetch_related(pr2).all()
-        for obj in objects:
-            if not (Product.objects
-                    .filter(catalog_page__game=obj)
-                    .exists()):
-                objects = objects.exclude(id=obj.id)
+        objects = (Game.objects
+                   .prefetch_related(pr2)
+                   .filter(Exists(Product.objects.filter(catalog_page__game=OuterRef("pk")))))
         return objects
 
     @staticmethod
@@ -116,7 +115,9 @@ class GameService:
         except CatalogPage.DoesNotExist:
             raise HttpError(404, _("Not Found: No CatalogPage matches" " the given query."))
         items = (WorthLookItem.objects
-                 .prefetch_related('catalog_page__products')
+                 .select_related('catalog_page')
+                 .annotate(offers=Count('catalog_page__products',
+                                        filter=Q(catalog_page__products__is_deleted=False)))
                  .filter(carousel__catalogpage=page))
         return items
 
@@ -162,3 +163,80 @@ class GameService:
         except CatalogTabs.DoesNotExist:
             raise HttpError(404, _("Not Found: No CatalogTab matches" " the given query."))
         return tab
+
+    @staticmethod
+    async def aget_games() -> list:
+        """
+        Async version of get_games.
+
+        :return: list of Game model instances with root catalog pages in items
+        """
+        return [game async for game in GameService.get_games()]
+
+    @staticmethod
+    async def aget_catalog_page(page_id: int) -> CatalogPage:
+        """
+        Async version of get_catalog_page.
+
+        Game and tabs are loaded in advance, because
+        schema can't make queries in event loop.
+
+        :param page_id: id of page
+        :return: CatalogPage model instance
+        """
+        try:
+            page = await (CatalogPage.objects
+                          .select_related('game')
+                          .prefetch_related('tabs')
+                          .aget(id=page_id))
+        except CatalogPage.DoesNotExist:
+            raise HttpError(404, _("Not Found: No CatalogPage matches" " the given query."))
+        return page
+
+    @staticmethod
+    async def aget_worth_look(page_id: int) -> list:
+        """
+        Async version of get_worth_look.
+
+        :param page_id: id of page
+        :return: list of WorthLookItem model instances
+        """
+        if not await CatalogPage.objects.filter(id=page_id).aexists():
+            raise HttpError(404, _("Not Found: No CatalogPage matches" " the given query."))
+        items = (WorthLookItem.objects
+                 .select_related('catalog_page')
+                 .annotate(offers=Count('catalog_page__products',
+                                        filter=Q(catalog_page__products__is_deleted=False)))
+                 .filter(carousel__catalogpage=page_id))
+        return [item async for item in items]
+
+    @staticmethod
+    async def aget_tab_content(tab_id: int) -> CatalogTabs:
+        """
+        Async version of get_tab_content.
+
+        :param tab_id: id of CatalogTabs model's instance we want to get
+        :return: CatalogTabs model instance
+        """
+        try:
+            tab = await CatalogTabs.objects.aget(id=tab_id)
+        except CatalogTabs.DoesNotExist:
+            raise HttpError(404, _("Not Found: No CatalogTab matches" " the given query."))
+        return tab
+
+    @staticmethod
+    async def get_catalog_page_bundle(page_id: int) -> dict:
+        """
+        Gets catalog page, its worth look items and calendar concurrently.
+
+        Page is required, other parts are replaced
+        by empty lists if they failed or timed out.
+
+        :param page_id: id of page
+        :return: dict rendered by CatalogPageBundleSchema
+        """
+        bundle = (Bundle()
+                  .add("page", GameService.get_catalog_page, page_id, schema=CatalogPageSchema, required=True)
+                  .add("worth_look", GameService.get_worth_look, page_id, schema=WorthLookItemSchema, default=[])
+                  .add("calendar", GameService.get_calendar, page_id, schema=CalendarBlockSchema, default=[]))
+        return await bundle.run()
@@ -1,7 +1,6 @@
 import pytest
-from ninja_extra.testing import TestClient
 from src.games.api import CatalogController
-from src.main.utils import make_request
+from src.main.utils import TestClient, make_request
 from src.games.schemas import *
 from src.products.schemas import TabContentSchema
 
@@ -1,11 +1,10 @@
 import pytest
-from ninja_extra.testing import TestClient
 from jsonschema import validate
 from src.games.api import GamesController
 import jsonschema
 
 from src.games.schemas import *
-from src.main.utils import make_request
+from src.main.utils import TestClient, make_request
 from src.products.schemas import GameCarouselsMainSchema
 
 client = TestClient(GamesController)
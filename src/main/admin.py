@@ -480,4 +480,8 @@ class PromoCodeAdmin(ModelAdmin):
     def has_change_permission(self, request, obj=None):
         return False
 
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        PromoCode.objects.invalidate()
+
     form = PromoCodeForm
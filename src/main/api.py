@@ -61,9 +61,9 @@ class MainController(ControllerBase):
             },
         },
     )
-    def get_reviews(self, request: HttpRequest, page: int, page_size: int,
-                    accept_lang: LangEnum =
-                    Header(alias='Accept-Language')) -> dict:
+    async def get_reviews(self, request: HttpRequest, page: int, page_size: int,
+                          accept_lang: LangEnum =
+                          Header(alias='Accept-Language')) -> dict:
         """
         Get data for section Reviews.
 
@@ -76,7 +76,7 @@ class MainController(ControllerBase):
           - **422**: Error: Unprocessable Entity.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.main_service.get_reviews(page, page_size)
+        result = await self.main_service.aget_reviews(page, page_size)
         return result
 
     @http_get(
@@ -90,10 +90,10 @@ class MainController(ControllerBase):
             },
         },
     )
-    def get_why_choose_us(self, request: HttpRequest,
-                          accept_lang:
-                          LangEnum = Header(alias='Accept-Language')
-                          ) -> WhyChooseUs:
+    async def get_why_choose_us(self, request: HttpRequest,
+                                accept_lang:
+                                LangEnum = Header(alias='Accept-Language')
+                                ) -> WhyChooseUs:
         """
         Get data for section WhyChooseUs.
 
@@ -101,7 +101,7 @@ class MainController(ControllerBase):
           - **200**: Success response with the data.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.main_service.get_why_choose_us()
+        result = await self.main_service.aget_why_choose_us()
         return result
 
     @http_get(
@@ -115,10 +115,10 @@ class MainController(ControllerBase):
             },
         },
     )
-    def get_instagram(self, request: HttpRequest,
-                      accept_lang:
-                      LangEnum = Header(alias='Accept-Language'),
-                      ) -> Insta:
+    async def get_instagram(self, request: HttpRequest,
+                            accept_lang:
+                            LangEnum = Header(alias='Accept-Language'),
+                            ) -> Insta:
         """
         Get data for section Instagram.
 
@@ -126,7 +126,7 @@ class MainController(ControllerBase):
           - **200**: Success response with the data.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.main_service.get_instagram()
+        result = await self.main_service.aget_instagram()
         return result
 
     @http_get(
@@ -154,10 +154,10 @@ class MainController(ControllerBase):
             },
         },
     )
-    def get_news(self, request: HttpRequest, page: int, page_size: int,
-                 accept_lang:
-                 LangEnum = Header(alias='Accept-Language'),
-                 ) -> dict:
+    async def get_news(self, request: HttpRequest, page: int, page_size: int,
+                       accept_lang:
+                       LangEnum = Header(alias='Accept-Language'),
+                       ) -> dict:
         """
         Get data for section News.
 
@@ -170,7 +170,7 @@ class MainController(ControllerBase):
           - **422**: Error: Unprocessable Entity.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.main_service.get_news(page, page_size)
+        result = await self.main_service.aget_news(page, page_size)
         return result
 
     @http_get(
@@ -184,10 +184,10 @@ class MainController(ControllerBase):
             },
         },
     )
-    def get_settings(self, request: HttpRequest,
-                     accept_lang:
-                     LangEnum = Header(alias='Accept-Language'),
-                     ) -> Setting:
+    async def get_settings(self, request: HttpRequest,
+                           accept_lang:
+                           LangEnum = Header(alias='Accept-Language'),
+                           ) -> Setting:
         """
         Get data for footer and header of the site.
 
@@ -195,6 +195,6 @@ class MainController(ControllerBase):
           - **200**: Success response with the data.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.main_service.get_settings()
+        result = await self.main_service.aget_settings()
         return result
 
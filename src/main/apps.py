@@ -27,3 +27,7 @@ class MainConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "src.main"
+
+    def ready(self):
+        # connect receivers of signals for metrics and system checks
+        from src.main import checks, instrumentation, metrics  # noqa: F401
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains class for benchmarking storefront traffic.
+
+"""
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from ninja_jwt.tokens import AccessToken
+
+from src.games.models import CatalogPage, Game
+from src.orders.models import Order
+from src.products.models import Product, ProductTabs
+from src.users.models import User
+
+API_PREFIX = "/api"
+
+
+def percentile(values: list, percent: int) -> float:
+    """
+    Get percentile of values by linear interpolation.
+
+    :param values: measured values
+    :param percent: percentile from 1 to 99
+    :return: value of percentile
+    """
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def summarize(latencies: list, queries: list, errors: int) -> dict:
+    """
+    Get statistic of measured requests, latency is in milliseconds.
+    """
+    result = {"requests": len(latencies), "errors": errors}
+    if latencies:
+        result.update({
+            "mean": round(statistics.fmean(latencies), 2),
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2),
+        })
+    if queries:
+        result["queries_per_request"] = round(statistics.fmean(queries), 2)
+    return result
+
+
+class StorefrontBenchmark:
+    """
+    A class for replaying weighted mix of storefront calls.
+
+    Every iteration picks one scenario by its weight and sends
+    all its requests. Requests are sent by Django test client in
+    the same process (queries per request are counted) or by httpx
+    to running server (e.g. local gunicorn) when base_url is given.
+    """
+
+    # scenario name -> weight
+    SCENARIOS = {
+        "home": 30,
+        "carousels": 25,
+        "product_page": 30,
+        "add_to_cart": 10,
+        "checkout": 5,
+    }
+    # read-only part of traffic served by async endpoints
+    CATALOG_SCENARIOS = {
+        "home": 30,
+        "carousels": 25,
+        "product_page": 30,
+    }
+
+    def __init__(self, base_url: str = None, seed: int = None, language: str = "en", scenarios: dict = None):
+        """
+        :param base_url: url of running server (default is test client)
+        :param seed: seed of scenarios order
+        :param language: value of Accept-Language header
+        :param scenarios: dict scenario name -> weight (default is SCENARIOS)
+        """
+        self.base_url = base_url
+        self.scenarios = scenarios or self.SCENARIOS
+        self.random = random.Random(seed)
+        self.headers = {"Accept-Language": language}
+        self.games = list(Game.objects.values_list("id", flat=True))
+        self.pages = list(CatalogPage.objects.values_list("id", flat=True))
+        self.products = list(Product.objects.values_list("id", flat=True))
+        self.fixed_products = list(Product.objects.filter(price_type="fixed").values_list("id", flat=True))
+        self.tabs = list(ProductTabs.objects.values_list("id", flat=True))
+        users = list(User.objects.filter(is_active=True).order_by("id")[:100])
+        if not (self.games and self.pages and self.fixed_products and users):
+            raise ValueError("Database has no data for benchmark, run init_script first")
+        self.tokens = [f"Bearer {AccessToken.for_user(user)}" for user in users]
+
+    def get_dataset(self) -> dict:
+        return {
+            "games": len(self.games),
+            "catalog_pages": len(self.pages),
+            "products": len(self.products),
+            "users": User.objects.count(),
+            "orders": Order.objects.count(),
+        }
+
+    def get_calls(self, scenario: str) -> list:
+        """
+        Get requests of scenario.
+
+        :param scenario: name of scenario
+        :return: list of tuples (method, path, params, payload, authorized)
+        """
+        game_id = self.random.choice(self.games)
+        page_id = self.random.choice(self.pages)
+        paging = {"page": 1, "page_size": 12}
+        match scenario:
+            case "home":
+                return [
+                    ("get", "/games/", None, None, False),
+                    ("get", "/products/hot-offers/", paging, None, False),
+                    ("get", "/products/bestsellers/", paging, None, False),
+                    ("get", "/products/trending/", None, None, False),
+                    ("get", "/main/reviews/", paging, None, False),
+                    ("get", "/main/news/", paging, None, False),
+                    ("get", "/main/settings/", None, None, False),
+                ]
+            case "carousels":
+                return [
+                    ("get", "/games/product-carousels/", {"game_id": game_id, **paging}, None, False),
+                    ("get", f"/games/{game_id}/catalog-pages/", None, None, False),
+                    ("get", f"/catalog-page/{page_id}/", None, None, False),
+                    ("get", f"/catalog-page/{page_id}/worth-look/", None, None, False),
+                ]
+            case "product_page":
+                calls = [
+                    ("get", f"/products/{self.random.choice(self.products)}/", None, None, False),
+                    ("get", "/products/freqbot-section/", None, None, False),
+                ]
+                if self.tabs:
+                    calls.append(("get", f"/products/tab-content/{self.random.choice(self.tabs)}/",
+                                  None, None, False))
+                return calls
+            case "add_to_cart":
+                return [
+                    ("post", f"/products/{self.random.choice(self.fixed_products)}/to-cart/",
+                     None, {"attributes": [], "quantity": 1}, True),
+                    ("get", "/orders/my-cart/", paging, None, True),
+                ]
+            case "checkout":
+                return [
+                    ("post", f"/products/{self.random.choice(self.fixed_products)}/to-cart/",
+                     None, {"attributes": [], "quantity": 1}, True),
+                    ("post", "/orders/new/", None, None, True),
+                    ("get", "/orders/my-orders/", paging, None, True),
+                ]
+        raise ValueError(f"Unknown scenario {scenario}")
+
+    def send(self, client, method: str, path: str, params: dict, payload: dict, headers: dict) -> tuple:
+        """
+        Send one request.
+
+        :return: tuple (status code, latency in ms, count of queries or None)
+        """
+        url = API_PREFIX + path
+        if self.base_url:
+            started = time.perf_counter()
+            response = client.request(method, url, params=params, json=payload, headers=headers)
+            return response.status_code, (time.perf_counter() - started) * 1000, None
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            if method == "get":
+                response = client.get(url, params, headers=headers)
+            else:
+                response = client.post(url, json.dumps(payload or {}),
+                                       content_type="application/json", headers=headers)
+            latency = (time.perf_counter() - started) * 1000
+        return response.status_code, latency, len(context.captured_queries)
+
+    def run_scenario(self, client, scenario: str, token: str) -> list:
+        headers = dict(self.headers, Authorization=token)
+        results = []
+        for method, path, params, payload, authorized in self.get_calls(scenario):
+            status, latency, queries = self.send(client, method, path, params, payload,
+                                                 headers if authorized else self.headers)
+            results.append((scenario, status, latency, queries))
+        return results
+
+    def run(self, iterations: int = 200, warmup: int = 20, concurrency: int = 1) -> dict:
+        """
+        Replay weighted mix of scenarios and collect statistic.
+
+        :param iterations: count of measured scenarios
+        :param warmup: count of scenarios sent before measuring
+        :param concurrency: count of parallel clients (only with base_url)
+        :return: report which can be dumped to json
+        """
+        if not self.base_url:
+            concurrency = 1
+        names, weights = list(self.scenarios), list(self.scenarios.values())
+        plan = [(self.random.choices(names, weights)[0], self.random.choice(self.tokens))
+                for i in range(warmup + iterations)]
+        clients = [httpx.Client(base_url=self.base_url, timeout=30) if self.base_url else Client()
+                   for i in range(concurrency)]
+        for scenario, token in plan[:warmup]:
+            self.run_scenario(clients[0], scenario, token)
+
+        started = time.perf_counter()
+        measured = plan[warmup:]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            chunks = executor.map(
+                lambda number: [result
+                                for scenario, token in measured[number::concurrency]
+                                for result in self.run_scenario(clients[number], scenario, token)],
+                range(concurrency),
+            )
+            results = [result for chunk in chunks for result in chunk]
+        duration = time.perf_counter() - started
+        for client in clients:
+            if self.base_url:
+                client.close()
+
+        scenarios = {}
+        for name in names:
+            rows = [row for row in results if row[0] == name]
+            scenarios[name] = summarize([row[2] for row in rows],
+                                        [row[3] for row in rows if row[3] is not None],
+                                        len([row for row in rows if row[1] >= 400]))
+        total = summarize([row[2] for row in results],
+                          [row[3] for row in results if row[3] is not None],
+                          len([row for row in results if row[1] >= 400]))
+        total["throughput"] = round(len(results) / duration, 2) if duration else None
+        return {
+            "date": timezone.now().isoformat(),
+            "target": self.base_url or "test client",
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "duration": round(duration, 3),
+            "dataset": self.get_dataset(),
+            "total": total,
+            "scenarios": scenarios,
+        }
+
+
+def compare_servers(targets: dict, levels: list, iterations: int = 200, warmup: int = 20, seed: int = None) -> dict:
+    """
+    Compare throughput of running servers under growing concurrency.
+
+    Used for comparing gunicorn sync workers (config.wsgi) with
+    uvicorn workers (config.asgi) on catalog traffic.
+
+    :param targets: dict name -> url of running server
+    :param levels: counts of parallel clients
+    :param iterations: count of measured scenarios per level
+    :param warmup: count of scenarios sent before measuring
+    :param seed: seed of scenarios order, the same for every target
+    :return: report which can be dumped to json
+    """
+    results = {}
+    for name, url in targets.items():
+        results[name] = {}
+        for level in levels:
+            benchmark = StorefrontBenchmark(base_url=url, seed=seed, scenarios=StorefrontBenchmark.CATALOG_SCENARIOS)
+            results[name][str(level)] = benchmark.run(iterations=iterations, warmup=warmup,
+                                                      concurrency=level)["total"]
+    report = {
+        "date": timezone.now().isoformat(),
+        "targets": targets,
+        "iterations": iterations,
+        "results": results,
+    }
+    if len(targets) == 2:
+        # throughput of the second target relative to the first one
+        first, second = (results[name] for name in targets)
+        report["speedup"] = {level: round(second[level]["throughput"] / first[level]["throughput"], 2)
+                             if first[level].get("throughput") else None
+                             for level in first}
+    return report
+
+
+class ConnectionBenchmark:
+    """
+    A class for measuring cost of connection setup per request.
+
+    Request lifecycle is simulated by request_started and request_finished
+    signals, so connection is opened, checked and closed by Django
+    in the same way as for real requests.
+    """
+
+    MODES = {
+        "new_connection": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+        "persistent": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True},
+    }
+
+    def __init__(self, alias: str = DEFAULT_DB_ALIAS, queries: int = 3):
+        """
+        :param alias: alias of database
+        :param queries: count of queries per request
+        """
+        self.connection = connections[alias]
+        self.queries = queries
+
+    def send_request(self) -> float:
+        """
+        :return: time of simulated request in ms
+        """
+        started = time.perf_counter()
+        request_started.send(sender=self.__class__)
+        with self.connection.cursor() as cursor:
+            for i in range(self.queries):
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+        request_finished.send(sender=self.__class__)
+        return (time.perf_counter() - started) * 1000
+
+    def run(self, requests: int = 200) -> dict:
+        """
+        Measure requests with new and persistent connections.
+
+        :param requests: count of requests for every mode
+        :return: report which can be dumped to json
+        """
+        settings_dict = self.connection.settings_dict
+        original = {key: settings_dict.get(key) for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS")}
+        report = {"date": timezone.now().isoformat(),
+                  "vendor": self.connection.vendor,
+                  "host": settings_dict.get("HOST"),
+                  "requests": requests,
+                  "queries_per_request": self.queries}
+        try:
+            for mode, values in self.MODES.items():
+                self.connection.close()
+                settings_dict.update(values)
+                self.send_request()
+                report[mode] = summarize([self.send_request() for i in range(requests)], [], 0)
+        finally:
+            self.connection.close()
+            settings_dict.update(original)
+        report["saving_per_request"] = round(report["new_connection"]["p50"] - report["persistent"]["p50"], 2)
+        return report
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains classes for composing bundle endpoints
+    from independent service calls.
+
+"""
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.db.models import QuerySet
+from django.utils.translation import gettext as _
+from loguru import logger
+from ninja.errors import HttpError
+
+from config import settings
+
+# every thread keeps own database connection, so parts of one
+# bundle are queried in parallel and count of connections is bounded
+executor = ThreadPoolExecutor(max_workers=settings.BUNDLE_WORKERS, thread_name_prefix="bundle")
+
+
+class BundlePart:
+    """
+    One independent part of bundle.
+    """
+
+    def __init__(self, name: str, func, args: tuple, kwargs: dict, schema=None, required: bool = False,
+                 default=None):
+        """
+        :param name: key of part in result
+        :param func: sync service method
+        :param schema: schema for rendering result of func
+        :param required: failure of part fails whole bundle
+        :param default: value of optional part if it failed
+        """
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.schema = schema
+        self.required = required
+        self.default = default
+
+
+class Bundle:
+    """
+    A class for fetching several datasets of one page concurrently.
+
+    Parts are sync service methods, they run in threads of executor
+    with copy of request context (language, routing to replica,
+    metrics), so latency of bundle is latency of its slowest part.
+    Result of part is rendered by its schema in the same thread,
+    because schemas can make queries and event loop can't.
+    Failed or timed out optional part gets its default value
+    and its name is added to "errors" of result.
+    """
+
+    def __init__(self, timeout: float = None):
+        """
+        :param timeout: seconds for every part (default is BUNDLE_TIMEOUT)
+        """
+        self.timeout = timeout if timeout is not None else settings.BUNDLE_TIMEOUT
+        self.parts = []
+
+    def add(self, name: str, func, *args, schema=None, required: bool = False, default=None, **kwargs) -> "Bundle":
+        self.parts.append(BundlePart(name, func, args, kwargs, schema, required, default))
+        return self
+
+    @staticmethod
+    def call(part: BundlePart):
+        """
+        Call part in thread of executor and render its result.
+
+        Connections are handled as at the start and the end of request,
+        so CONN_MAX_AGE and CONN_HEALTH_CHECKS apply to them too.
+        """
+        close_old_connections()
+        try:
+            result = part.func(*part.args, **part.kwargs)
+            if part.schema is None:
+                return result
+            if isinstance(result, (list, tuple, QuerySet)):
+                return [part.schema.from_orm(item).model_dump(mode="json") for item in result]
+            return part.schema.from_orm(result).model_dump(mode="json")
+        finally:
+            close_old_connections()
+
+    async def run_part(self, part: BundlePart):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        # thread of timed out part isn't interrupted, it finishes in background
+        return await asyncio.wait_for(loop.run_in_executor(executor, context.run, self.call, part), self.timeout)
+
+    async def run(self) -> dict:
+        """
+        Run all parts concurrently.
+
+        :return: dict part name -> rendered result with list of failed parts in "errors"
+        """
+        started = time.perf_counter()
+        results = await asyncio.gather(*[self.run_part(part) for part in self.parts], return_exceptions=True)
+        bundle = {"errors": []}
+        for part, result in zip(self.parts, results):
+            if not isinstance(result, BaseException):
+                bundle[part.name] = result
+                continue
+            if part.required:
+                if isinstance(result, asyncio.TimeoutError):
+                    raise HttpError(504, _("Gateway Timeout"))
+                raise result
+            logger.bind(part=part.name, error=repr(result)).warning("Part of bundle failed")
+            bundle[part.name] = part.default
+            bundle["errors"].append(part.name)
+        logger.bind(parts=len(self.parts), errors=bundle["errors"],
+                    duration=round((time.perf_counter() - started) * 1000, 2)).debug("Bundle fetched")
+        return bundle
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains system checks of database connections settings.
+
+"""
+import importlib.util
+
+import django
+from django.core.checks import Error, Warning, register
+
+from config import settings
+
+
+def get_connections_budget() -> dict:
+    """
+    Count connections which can be opened by all processes.
+
+    :return: dict with connections per web process and totals
+    """
+    if settings.DB_POOL:
+        per_web_process = settings.DB_POOL_MAX_SIZE
+    elif settings.SERVER_INTERFACE == "asgi":
+        per_web_process = settings.WEB_ASGI_CONCURRENCY
+    else:
+        per_web_process = settings.WEB_THREADS
+    if not settings.DB_POOL:
+        per_web_process += settings.BUNDLE_WORKERS
+    web = settings.WEB_WORKERS * per_web_process
+    # every celery child process and beat keep one connection
+    celery = settings.CELERY_WORKER_CONCURRENCY + 1
+    return {"per_web_process": per_web_process, "web": web, "celery": celery, "total": web + celery}
+
+
+# settings only are checked, so it's run on every start, not only by migrate
+@register()
+def check_connections(app_configs, **kwargs):
+    errors = []
+    if settings.DB_POOL and (django.VERSION < (5, 1) or importlib.util.find_spec("psycopg_pool") is None):
+        errors.append(Error(
+            "DB_POOL requires Django 5.1+ with psycopg 3 and psycopg_pool.",
+            hint="Disable DB_POOL, persistent connections (DB_CONN_MAX_AGE) are used then.",
+            id="main.E001",
+        ))
+    if settings.DB_POOL and settings.DB_POOL_MAX_SIZE < settings.WEB_THREADS:
+        errors.append(Warning(
+            "DB_POOL_MAX_SIZE is less than WEB_THREADS, threads will wait for connections.",
+            id="main.W001",
+        ))
+    budget = get_connections_budget()
+    if budget["total"] > settings.DB_MAX_CONNECTIONS:
+        errors.append(Warning(
+            f"Web and celery workers can open {budget['total']} connections, "
+            f"but DB_MAX_CONNECTIONS is {settings.DB_MAX_CONNECTIONS}.",
+            hint="Decrease WEB_CONCURRENCY, WEB_THREADS, BUNDLE_WORKERS, DB_POOL_MAX_SIZE "
+                 "or CELERY_WORKER_CONCURRENCY.",
+            id="main.W002",
+        ))
+    return errors
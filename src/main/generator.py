@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains class for generating big synthetic dataset.
+
+"""
+import io
+import os
+import random
+import shutil
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from faker import Faker
+
+from config import settings
+from src.games.models import CatalogPage, Game
+from src.main.models import OrderItem, OrderItemAttribute
+from src.orders.models import Cart, CartItem, Order
+from src.products.models import Filter, Product, ProductTabs, SubFilter, Tag
+from src.users.models import User
+
+IMAGES_DIR = "generated"
+FILTER_TYPES = ["Select", "Radio", "CheckBox", "Slider"]
+FILTERS_PER_PRODUCT = 4
+SUBFILTERS_PER_FILTER = 4
+TABS_PER_PRODUCT = 2
+# every RANGE_EVERY product has price type range and filters tree
+RANGE_EVERY = 3
+TEXT_POOL_SIZE = 500
+
+
+def copy_value(value) -> str:
+    """
+    Convert value to text format of COPY.
+    """
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (str(value)
+            .replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r"))
+
+
+class DataGenerator:
+    """
+    A class for generating big deterministic dataset.
+
+    Rows get explicit primary keys counted from current maximum
+    (orders get UUIDs from seeded generator), so relations are calculated without reading inserted rows back.
+    Texts are picked from pools generated by Faker once and images
+    are shared files copied to media once. Same seed and same
+    until date give same data on the same initial database.
+    """
+
+    def __init__(self, seed: int = 0, chunk_size: int = 5000, use_copy: bool = False,
+                 until: datetime = None, days: int = 365, log=None):
+        """
+        :param seed: seed of random generators
+        :param chunk_size: count of rows inserted by one statement
+        :param use_copy: insert rows by postgres COPY instead of INSERT
+        :param until: date of the latest order (default today)
+        :param days: orders are spread over this count of days before until
+        :param log: function for progress messages
+        """
+        if use_copy and connection.vendor != "postgresql":
+            raise ValueError("COPY is supported only by PostgreSQL")
+        self.random = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.use_copy = use_copy
+        until = until or datetime.now(timezone.utc).date()
+        self.until = datetime.combine(until, time.max, tzinfo=timezone.utc)
+        self.seconds = days * 24 * 3600
+        self.log = log or (lambda message: None)
+
+        fake_en, fake_uk = Faker("en_US"), Faker("uk_UA")
+        fake_en.seed_instance(seed)
+        fake_uk.seed_instance(seed)
+        self.words_en = [fake_en.word().capitalize() for i in range(TEXT_POOL_SIZE)]
+        self.words_uk = [fake_uk.word().capitalize() for i in range(TEXT_POOL_SIZE)]
+        self.texts_en = [fake_en.text(max_nb_chars=500) for i in range(TEXT_POOL_SIZE // 10)]
+        self.texts_uk = [fake_uk.text(max_nb_chars=500) for i in range(TEXT_POOL_SIZE // 10)]
+        self.names = [(fake_en.first_name(), fake_en.last_name()) for i in range(TEXT_POOL_SIZE)]
+        self.images = {}
+
+    def word(self, index: int, language: str = "en") -> str:
+        words = self.words_en if language == "en" else self.words_uk
+        return words[index % len(words)]
+
+    def text(self, language: str = "en") -> str:
+        return self.random.choice(self.texts_en if language == "en" else self.texts_uk)
+
+    def image(self, folder: str) -> str:
+        """
+        Get name of shared image from seed folder.
+
+        Every image of pool is copied to media only once
+        :param folder: name of folder in seed directory
+        :return: name of file relative to MEDIA_ROOT
+        """
+        if folder not in self.images:
+            files = sorted(os.listdir(os.path.join("seed", folder)))
+            os.makedirs(os.path.join(settings.MEDIA_ROOT, IMAGES_DIR, folder), exist_ok=True)
+            for name in files:
+                target = os.path.join(settings.MEDIA_ROOT, IMAGES_DIR, folder, name)
+                if not os.path.exists(target):
+                    shutil.copyfile(os.path.join("seed", folder, name), target)
+            self.images[folder] = [f"{IMAGES_DIR}/{folder}/{name}" for name in files]
+        return self.random.choice(self.images[folder])
+
+    @staticmethod
+    def next_id(model) -> int:
+        # only for models with integer primary key
+        return (model._base_manager.aggregate(max_id=Max("id"))["max_id"] or 0) + 1
+
+    @contextmanager
+    def explicit_dates(self, *models):
+        """
+        Keep generated values of auto_now_add fields.
+        """
+        fields = [field for model in models for field in model._meta.concrete_fields
+                  if getattr(field, "auto_now_add", False)]
+        for field in fields:
+            field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field in fields:
+                field.auto_now_add = True
+
+    def copy(self, model, instances: list) -> None:
+        fields = model._meta.concrete_fields
+        buffer = io.StringIO()
+        for instance in instances:
+            buffer.write("\t".join(copy_value(field.get_db_prep_save(field.pre_save(instance, True), connection))
+                                   for field in fields))
+            buffer.write("\n")
+        buffer.seek(0)
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+                               f"FROM STDIN", buffer)
+
+    def insert(self, model, instances: list) -> None:
+        """
+        Insert instances with explicit primary keys by chunks.
+        """
+        for start in range(0, len(instances), self.chunk_size):
+            chunk = instances[start:start + self.chunk_size]
+            if self.use_copy:
+                self.copy(model, chunk)
+            else:
+                model.objects.bulk_create(chunk)
+
+    @staticmethod
+    def reset_sequences(*models) -> None:
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    def create_games(self, games_count: int, pages_count: int) -> list:
+        """
+        Create games with catalog pages.
+
+        :return: ids of created catalog pages
+        """
+        game_id, page_id = self.next_id(Game), self.next_id(CatalogPage)
+        games, pages = [], []
+        for i in range(games_count):
+            games.append(Game(id=game_id + i,
+                              name=self.word(game_id + i),
+                              logo_filter=self.image("filter_logo"),
+                              logo_product=self.image("product_logo"),
+                              logo_filter_alt_en=self.word(i),
+                              logo_filter_alt_uk=self.word(i, "uk"),
+                              logo_product_alt_en=self.word(i),
+                              logo_product_alt_uk=self.word(i, "uk"),
+                              order=i))
+            for j in range(pages_count):
+                index = i * pages_count + j
+                pages.append(CatalogPage(id=page_id + index,
+                                         title_en=self.word(index),
+                                         title_uk=self.word(index, "uk"),
+                                         description_en=self.text(),
+                                         description_uk=self.text("uk"),
+                                         game_id=game_id + i,
+                                         order=j))
+        self.insert(Game, games)
+        self.insert(CatalogPage, pages)
+        self.reset_sequences(Game, CatalogPage)
+        return [page.id for page in pages]
+
+    def create_products(self, count: int, page_ids: list) -> list:
+        """
+        Create products with tabs, range products get filters tree.
+
+        :return: list of tuples (product id, price, lists of (subfilter id, price) by filters)
+        """
+        tags = list(Tag.objects.values_list("id", flat=True)) or [None]
+        product_id, tab_id = self.next_id(Product), self.next_id(ProductTabs)
+        filter_id, subfilter_id = self.next_id(Filter), self.next_id(SubFilter)
+        products = []
+        for start in range(0, count, self.chunk_size):
+            rows, tabs, filters, subfilters = [], [], [], []
+            for i in range(start, min(start + self.chunk_size, count)):
+                is_range = i % RANGE_EVERY == 0
+                price = self.random.randint(5, 600)
+                rows.append(Product(id=product_id + i,
+                                    title_en=f"Product {product_id + i}",
+                                    title_uk=f"Продукт {product_id + i}",
+                                    subtitle_en=self.word(i),
+                                    subtitle_uk=self.word(i, "uk"),
+                                    description_en=self.text(),
+                                    description_uk=self.text("uk"),
+                                    image=self.image("banner"),
+                                    card_img=self.image("card_image"),
+                                    image_alt_en=self.word(i),
+                                    image_alt_uk=self.word(i, "uk"),
+                                    card_img_alt_en=self.word(i + 1),
+                                    card_img_alt_uk=self.word(i + 1, "uk"),
+                                    price=price,
+                                    price_type="range" if is_range else "fixed",
+                                    bonus_points=self.random.randint(10, 150),
+                                    sale_percent=0,
+                                    bought_count=self.random.randint(0, 1000),
+                                    catalog_page_id=page_ids[i % len(page_ids)],
+                                    tag_id=self.random.choice(tags)))
+                for j in range(TABS_PER_PRODUCT):
+                    tabs.append(ProductTabs(id=tab_id + i * TABS_PER_PRODUCT + j,
+                                            title_en=self.word(j),
+                                            title_uk=self.word(j, "uk"),
+                                            content_en=self.text(),
+                                            content_uk=self.text("uk"),
+                                            product_id=product_id + i,
+                                            order=j))
+                tree = []
+                if is_range:
+                    for j in range(FILTERS_PER_PRODUCT):
+                        current_filter = filter_id + (i // RANGE_EVERY) * FILTERS_PER_PRODUCT + j
+                        filters.append(Filter(id=current_filter,
+                                              title_en=self.word(current_filter),
+                                              title_uk=self.word(current_filter, "uk"),
+                                              type=FILTER_TYPES[j],
+                                              product_id=product_id + i,
+                                              order=j))
+                        choices = []
+                        for k in range(SUBFILTERS_PER_FILTER):
+                            current = subfilter_id + (current_filter - filter_id) * SUBFILTERS_PER_FILTER + k
+                            subfilter_price = self.random.randint(5, 100)
+                            subfilters.append(SubFilter(id=current,
+                                                        title_en=self.word(current),
+                                                        title_uk=self.word(current, "uk"),
+                                                        price=subfilter_price,
+                                                        filter_id=current_filter,
+                                                        order=k))
+                            choices.append((current, subfilter_price))
+                        tree.append(choices)
+                products.append((product_id + i, price, tree))
+            with transaction.atomic():
+                self.insert(Product, rows)
+                self.insert(ProductTabs, tabs)
+                self.insert(Filter, filters)
+                self.insert(SubFilter, subfilters)
+            self.log(f"Products: {min(start + self.chunk_size, count)}/{count}")
+        self.reset_sequences(Product, ProductTabs, Filter, SubFilter)
+        return products
+
+    def create_users(self, count: int, carts_share: float, products: list) -> list:
+        """
+        Create customers, some of them get carts with items.
+
+        :return: ids of created users
+        """
+        password = make_password("sword123")
+        user_id, cart_id, item_id = self.next_id(User), self.next_id(Cart), self.next_id(CartItem)
+        now = self.until
+        user_ids = []
+        for start in range(0, count, self.chunk_size):
+            users, carts, items = [], [], []
+            for i in range(start, min(start + self.chunk_size, count)):
+                first_name, last_name = self.names[i % len(self.names)]
+                users.append(User(id=user_id + i,
+                                  email=f"user{user_id + i}@example.com",
+                                  first_name=first_name,
+                                  last_name=last_name,
+                                  password=password,
+                                  is_active=True,
+                                  bonus_points=self.random.randint(0, 500),
+                                  date_joined=now))
+                if self.random.random() < carts_share:
+                    carts.append(Cart(id=cart_id, user_id=user_id + i, date_created=now))
+                    for product_id, price, tree in self.random.sample(products, min(3, len(products))):
+                        if not tree:
+                            items.append(CartItem(id=item_id, cart_id=cart_id, product_id=product_id,
+                                                  quantity=1, date_created=now))
+                            item_id = item_id + 1
+                    cart_id = cart_id + 1
+            with transaction.atomic(), self.explicit_dates(Cart, CartItem):
+                self.insert(User, users)
+                self.insert(Cart, carts)
+                self.insert(CartItem, items)
+            user_ids.extend(user.id for user in users)
+            self.log(f"Users: {min(start + self.chunk_size, count)}/{count}")
+        self.reset_sequences(User, Cart, CartItem)
+        return user_ids
+
+    def create_orders(self, count: int, user_ids: list, products: list) -> None:
+        """
+        Create orders with items and attributes spread over days.
+        """
+        item_id = self.next_id(OrderItem)
+        attribute_id = self.next_id(OrderItemAttribute)
+        number = max(Order.objects.aggregate(number=Max("number"))["number"] or 0, 1_000_000_000) + 1
+        # primary key of order is UUID, it's derived from seeded generator and
+        # unique number, so the next run with the same seed doesn't repeat it
+        namespace = uuid.UUID(int=self.random.getrandbits(128))
+        for start in range(0, count, self.chunk_size):
+            orders, items, attributes = [], [], []
+            for i in range(start, min(start + self.chunk_size, count)):
+                order_id = uuid.uuid5(namespace, str(number + i))
+                date_created = self.until - timedelta(seconds=self.random.randint(0, self.seconds))
+                total_price = 0
+                for product_id, price, tree in self.random.sample(products, min(self.random.randint(1, 3),
+                                                                                len(products))):
+                    quantity = self.random.randint(1, 3)
+                    chosen = [self.random.choice(choices) for choices in tree]
+                    cost = price + sum(subfilter_price for current, subfilter_price in chosen)
+                    items.append(OrderItem(id=item_id, order_id=order_id, product_id=product_id,
+                                           quantity=quantity, cost=cost, date_created=date_created))
+                    for current, subfilter_price in chosen:
+                        attributes.append(OrderItemAttribute(id=attribute_id,
+                                                             title=self.word(current),
+                                                             subtitle=self.word(current + 1),
+                                                             subfilter_id=current,
+                                                             order_item_id=item_id))
+                        attribute_id = attribute_id + 1
+                    item_id = item_id + 1
+                    total_price = total_price + cost * quantity
+                orders.append(Order(id=order_id,
+                                    user_id=self.random.choice(user_ids),
+                                    number=number + i,
+                                    status="COMPLETED" if self.random.random() < 0.9 else "CANCELED",
+                                    total_price=total_price,
+                                    date_created=date_created))
+            with transaction.atomic(), self.explicit_dates(Order, OrderItem):
+                self.insert(Order, orders)
+                self.insert(OrderItem, items)
+                self.insert(OrderItemAttribute, attributes)
+            self.log(f"Orders: {min(start + self.chunk_size, count)}/{count}")
+        self.reset_sequences(OrderItem, OrderItemAttribute)
+
+    def generate(self, games: int, pages: int, products: int, users: int, orders: int,
+                 carts_share: float = 0.1) -> None:
+        """
+        Generate whole dataset.
+
+        :param games: count of games
+        :param pages: count of catalog pages per game
+        :param products: count of products
+        :param users: count of customers
+        :param orders: count of orders
+        :param carts_share: share of customers with not empty cart
+        """
+        page_ids = self.create_games(games, pages)
+        product_rows = self.create_products(products, page_ids)
+        user_ids = self.create_users(users, carts_share, product_rows)
+        if user_ids and product_rows:
+            self.create_orders(orders, user_ids, product_rows)
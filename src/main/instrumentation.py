@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains classes for collecting per-request metrics.
+
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django_redis.client import DefaultClient
+from loguru import logger
+from ninja.renderers import JSONRenderer
+
+from config import settings
+
+# upper bounds of histogram buckets in milliseconds
+HISTOGRAM_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+_metrics = ContextVar("request_metrics", default=None)
+_missing = object()
+
+
+class RequestMetrics:
+    """
+    Counters of one request.
+
+    Instance is stored in context variable while request
+    is processed, so db wrapper, cache client and renderer
+    add their measurements without access to request.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serialization_time = 0.0
+        self._lock = threading.Lock()
+
+    def add_query(self, duration: float) -> None:
+        # queries of one request can run in several threads (bundles)
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+
+    @staticmethod
+    def open():
+        return _metrics.set(RequestMetrics())
+
+    @staticmethod
+    def close(token) -> None:
+        _metrics.reset(token)
+
+    @staticmethod
+    def current() -> Optional["RequestMetrics"]:
+        return _metrics.get()
+
+
+class QueryTimer:
+    """
+    Database execute wrapper counting queries and logging slow ones.
+
+    Wrapper is installed to every connection when it's opened and
+    adds queries to metrics of current request, so queries made in
+    threads of async ORM and bundles are counted too.
+    """
+
+    def __call__(self, execute, sql, params, many, context):
+        metrics = RequestMetrics.current()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if metrics is not None:
+                metrics.add_query(duration)
+            if duration * 1000 >= settings.INSTRUMENTATION_SLOW_QUERY:
+                logger.bind(sql=sql[:2000], duration=round(duration * 1000, 2)).warning("Slow query")
+
+
+query_timer = QueryTimer()
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # outermost wrapper, so wrappers pushed later are removed correctly
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_timer)
+
+
+class InstrumentedCacheClient(DefaultClient):
+    """
+    Redis cache client counting hits and misses of current request.
+    """
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, default=_missing, version=version, client=client)
+        metrics = RequestMetrics.current()
+        if metrics is not None:
+            if value is _missing:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None, client=None):
+        result = super().get_many(keys, version=version, client=client)
+        metrics = RequestMetrics.current()
+        if metrics is not None:
+            metrics.cache_hits += len(result)
+            metrics.cache_misses += len(keys) - len(result)
+        return result
+
+
+class InstrumentedJSONRenderer(JSONRenderer):
+    """
+    JSON renderer measuring time of serialization.
+    """
+
+    def render(self, request, data, *, response_status):
+        started = time.perf_counter()
+        try:
+            return super().render(request, data, response_status=response_status)
+        finally:
+            metrics = RequestMetrics.current()
+            if metrics is not None:
+                metrics.serialization_time += time.perf_counter() - started
+
+
+class RouteHistograms:
+    """
+    Latency histograms of routes.
+
+    Histograms live in memory of worker process,
+    every gunicorn worker collects its own requests.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, duration: float, queries: int) -> None:
+        """
+        :param route: url pattern of route
+        :param duration: request time in milliseconds
+        :param queries: count of db queries of request
+        """
+        with self._lock:
+            item = self._routes.get(route)
+            if item is None:
+                item = self._routes[route] = {"count": 0, "sum": 0.0, "queries": 0,
+                                              "buckets": [0] * len(HISTOGRAM_BUCKETS)}
+            item["count"] += 1
+            item["sum"] += duration
+            item["queries"] += queries
+            item["buckets"][bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Get copy of histograms with cumulative buckets.
+
+        :return: dict route -> statistic
+        """
+        with self._lock:
+            routes = {route: dict(item, buckets=list(item["buckets"])) for route, item in self._routes.items()}
+        result = {}
+        for route, item in sorted(routes.items()):
+            cumulative, buckets = 0, {}
+            for bound, count in zip(HISTOGRAM_BUCKETS, item["buckets"]):
+                cumulative = cumulative + count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            result[route] = {
+                "count": item["count"],
+                "mean": round(item["sum"] / item["count"], 2),
+                "queries_per_request": round(item["queries"] / item["count"], 2),
+                "buckets": buckets,
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_histograms = RouteHistograms()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from src.main.benchmark import StorefrontBenchmark
+
+
+class Command(BaseCommand):
+    help = "Replay weighted mix of storefront requests and print latency report as json"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default=None,
+                            help="url of running server, e.g. http://127.0.0.1:8000 (default is test client)")
+        parser.add_argument("--iterations", type=int, default=200, help="count of measured scenarios")
+        parser.add_argument("--warmup", type=int, default=20, help="count of scenarios before measuring")
+        parser.add_argument("--concurrency", type=int, default=1, help="count of parallel clients (with --url)")
+        parser.add_argument("--seed", type=int, default=None, help="seed of scenarios order")
+        parser.add_argument("--output", default=None, help="path of json report (default is stdout)")
+        parser.add_argument("--init", action="store_true", help="fill empty database by init_script first")
+        parser.add_argument("--games", type=int, default=3)
+        parser.add_argument("--pages", type=int, default=5)
+        parser.add_argument("--products", type=int, default=3)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--orders", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options["init"]:
+            call_command("init_script",
+                         games=options["games"],
+                         pages=options["pages"],
+                         products=options["products"],
+                         users=options["users"],
+                         orders=options["orders"])
+        benchmark = StorefrontBenchmark(base_url=options["url"], seed=options["seed"])
+        report = benchmark.run(iterations=options["iterations"],
+                               warmup=options["warmup"],
+                               concurrency=options["concurrency"])
+        report = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(report)
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import json
+
+from django.core.management.base import BaseCommand
+
+from src.main.benchmark import ConnectionBenchmark
+
+
+class Command(BaseCommand):
+    help = "Compare per-request time with new and persistent database connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="count of requests for every mode")
+        parser.add_argument("--queries", type=int, default=3, help="count of queries per request")
+        parser.add_argument("--database", default="default", help="alias of database")
+        parser.add_argument("--output", default=None, help="path of json report (default is stdout)")
+
+    def handle(self, *args, **options):
+        report = ConnectionBenchmark(alias=options["database"], queries=options["queries"]).run(options["requests"])
+        report = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(report)
+        else:
+            self.stdout.write(report)
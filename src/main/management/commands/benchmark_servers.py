@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import json
+
+from django.core.management.base import BaseCommand
+
+from src.main.benchmark import compare_servers
+
+
+class Command(BaseCommand):
+    help = "Compare throughput of WSGI and ASGI servers on catalog requests under concurrency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi-url", default="http://127.0.0.1:8000", help="url of gunicorn (make wsgi)")
+        parser.add_argument("--asgi-url", default="http://127.0.0.1:8001", help="url of uvicorn workers (make asgi)")
+        parser.add_argument("--concurrency", default="1,8,32,64", help="comma separated counts of parallel clients")
+        parser.add_argument("--iterations", type=int, default=200, help="count of measured scenarios per level")
+        parser.add_argument("--warmup", type=int, default=20, help="count of scenarios before measuring")
+        parser.add_argument("--seed", type=int, default=1, help="seed of scenarios order")
+        parser.add_argument("--output", default=None, help="path of json report (default is stdout)")
+
+    def handle(self, *args, **options):
+        report = compare_servers({"wsgi": options["wsgi_url"], "asgi": options["asgi_url"]},
+                                 levels=[int(level) for level in options["concurrency"].split(",")],
+                                 iterations=options["iterations"],
+                                 warmup=options["warmup"],
+                                 seed=options["seed"])
+        report = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(report)
+        else:
+            self.stdout.write(report)
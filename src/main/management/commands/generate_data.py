@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.main.generator import DataGenerator
+
+
+class Command(BaseCommand):
+    help = ("Generate big deterministic dataset for performance tests, "
+            "e.g. --products 100000 --users 100000 --orders 1000000 --copy")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="seed of random generators")
+        parser.add_argument("--games", type=int, default=5)
+        parser.add_argument("--pages", type=int, default=10, help="count of catalog pages per game")
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--carts-share", type=float, default=0.1,
+                            help="share of users with not empty cart")
+        parser.add_argument("--days", type=int, default=365, help="orders are spread over this count of days")
+        parser.add_argument("--until", type=date.fromisoformat, default=None,
+                            help="date of the latest order, YYYY-MM-DD (default today)")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="count of rows inserted at once")
+        parser.add_argument("--copy", action="store_true", help="insert rows by PostgreSQL COPY")
+
+    def handle(self, *args, **options):
+        try:
+            generator = DataGenerator(seed=options["seed"],
+                                      chunk_size=options["chunk_size"],
+                                      use_copy=options["copy"],
+                                      until=options["until"],
+                                      days=options["days"],
+                                      log=self.stdout.write)
+        except ValueError as e:
+            raise CommandError(str(e))
+        generator.generate(games=options["games"],
+                           pages=options["pages"],
+                           products=options["products"],
+                           users=options["users"],
+                           orders=options["orders"],
+                           carts_share=options["carts_share"])
+        self.stdout.write(self.style.SUCCESS("Data generated successfully"))
@@ -3,6 +3,7 @@ import os
 import random
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.core.files import File
 from django.core.management.base import BaseCommand
 from faker import Faker
@@ -10,6 +11,8 @@ from faker.providers import date_time
 
 from src.games.models import *
 from src.main.models import *
+from src.orders.models import Cart, CartItem, Order
+from src.orders.services.order_service import OrderService
 from src.products.models import *
 from src.users.models import Character
 
@@ -24,7 +27,17 @@ class Command(BaseCommand):
         self.fake_en = Faker("en_US")
         self.fake_uk = Faker("uk_UA")
 
+    def add_arguments(self, parser):
+        parser.add_argument("--games", type=int, default=3, help="count of games")
+        parser.add_argument("--pages", type=int, default=5, help="count of catalog pages per game")
+        parser.add_argument("--products", type=int, default=3, help="count of products per catalog page")
+        parser.add_argument("--users", type=int, default=0, help="count of customers with carts")
+        parser.add_argument("--orders", type=int, default=0, help="count of completed orders per customer")
+
     def handle(self, null=None, *args, **options):
+        self.games = options.get("games", 3)
+        self.pages = options.get("pages", 5)
+        self.products = options.get("products", 3)
         self._create_superuser()
         self._create_games()
         self._create_main_page()
@@ -33,6 +46,7 @@ class Command(BaseCommand):
         self._create_pages()
         self._create_tags()
         self._create_products()
+        self._create_customers(options.get("users", 0), options.get("orders", 0))
 
     def _create_superuser(self):
         user = User.objects.create(
@@ -56,7 +70,7 @@ class Command(BaseCommand):
         )
 
     def _create_games(self):
-        for i in range(3):
+        for i in range(self.games):
             random_filter_logo = random.choice(os.listdir(os.path.join("seed", "filter_logo")))
             random_product_logo = random.choice(os.listdir(os.path.join("seed", "product_logo")))
             filter_logo = open(os.path.join("seed", "filter_logo", random_filter_logo), "rb")
@@ -113,7 +127,7 @@ class Command(BaseCommand):
 
     def _create_pages(self):
         for game in Game.objects.all():
-            for j in range(5):
+            for j in range(self.pages):
                 worth_look = WorthLook.objects.create(
                     title=self.fake_en.word().capitalize(),
                 )
@@ -245,7 +259,7 @@ class Command(BaseCommand):
     def _create_products(self):
         tags = Tag.objects.values_list("id", flat=True)
         for key, page in enumerate(CatalogPage.objects.all()):
-            for i in range(1, 4):
+            for i in range(1, self.products + 1):
                 random_card_image = random.choice(os.listdir(os.path.join("seed", "card_image")))
                 random_image = random.choice(os.listdir(os.path.join("seed", "banner")))
                 card_image = open(os.path.join("seed", "card_image", random_card_image), "rb")
@@ -312,3 +326,37 @@ class Command(BaseCommand):
             )
             for j in range(1, 4):
                 freqbot.products.add(random.choice(products_ids))
+
+    def _create_customers(self, users_count: int, orders_count: int):
+        password = make_password("sword123")
+        users = User.objects.bulk_create([
+            User(
+                first_name=self.fake_en.first_name(),
+                last_name=self.fake_en.last_name(),
+                email=f"customer{i}@example.com",
+                password=password,
+                is_active=True,
+            )
+            for i in range(users_count)
+        ])
+        products = list(Product.objects.filter(price_type="fixed"))
+        if not products:
+            return
+        for user in users:
+            cart = Cart.objects.create(user=user)
+            CartItem.objects.bulk_create([
+                CartItem(cart=cart, product=product, quantity=1)
+                for product in random.sample(products, min(3, len(products)))
+            ])
+            for i in range(orders_count):
+                items = random.sample(products, min(3, len(products)))
+                order = Order.objects.create(
+                    user=user,
+                    number=OrderService.create_number(),
+                    status="COMPLETED",
+                    total_price=sum(product.price for product in items),
+                )
+                OrderItem.objects.bulk_create([
+                    OrderItem(order=order, product=product, quantity=1, cost=product.price)
+                    for product in items
+                ])
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Module contain classes Managers for models in app main.
+
+These Managers implement most frequently used methods
+for selecting data in models
+"""
+from celery import current_app
+from django.db import models, transaction
+
+
+class OutboxTaskManager(models.Manager):
+    """
+    A Manager class for managing outbox of celery tasks.
+
+    Tasks are stored in db in the same transaction as data
+    they depend on and published to broker by relay after commit.
+    """
+
+    def enqueue(self, task, **kwargs):
+        """
+        Store celery task for publishing after commit.
+
+        :param task: celery task (function decorated with shared_task)
+        :param kwargs: keyword arguments of task
+        :return: OutboxTask model instance
+        """
+        return self.create(task_name=task.name, kwargs=kwargs)
+
+    def relay(self, batch_size: int) -> int:
+        """
+        Publish stored tasks to broker and remove them from outbox.
+
+        Rows are locked with SKIP LOCKED, so several relays
+        can work at the same time without publishing tasks twice
+        :param batch_size: count of tasks published in one transaction
+        :return: count of published tasks
+        """
+        total = 0
+        while True:
+            with transaction.atomic():
+                batch = list(self.get_queryset()
+                             .select_for_update(skip_locked=True)
+                             .order_by("id")[:batch_size])
+                for item in batch:
+                    current_app.send_task(item.task_name, kwargs=item.kwargs)
+                self.filter(id__in=[item.id for item in batch]).delete()
+            total = total + len(batch)
+            if len(batch) < batch_size:
+                return total
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Module contain classes Managers for models in app main.
+
+These Managers implement most frequently used methods
+for selecting data in models
+"""
+from django.core.cache import cache
+from django.db import models
+
+PROMO_CODES_CACHE_KEY = "promo_codes:map"
+PROMO_CODES_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class PromoCodeManager(models.Manager):
+    """
+    A Manager class for managing promo codes.
+
+    This class keeps map code -> (id, discount, from_date, until_date)
+    in cache, so validating of promo code doesn't touch db.
+    """
+
+    def get_map(self) -> dict:
+        """
+        Returns cached map of all promo codes in the site.
+
+        Map is rebuilt with one query when cache is empty
+        :return: dict code -> (id, discount, from_date, until_date)
+        """
+        codes = cache.get(PROMO_CODES_CACHE_KEY)
+        if codes is None:
+            codes = {
+                code: (pk, discount, from_date, until_date)
+                for pk, code, discount, from_date, until_date in (
+                    super().get_queryset()
+                    .values_list("id", "code", "discount",
+                                 "from_date", "until_date")
+                )
+            }
+            cache.set(PROMO_CODES_CACHE_KEY, codes,
+                      PROMO_CODES_CACHE_TIMEOUT)
+        return codes
+
+    def get_cached(self, code: str):
+        """
+        Returns promo code built from cached map.
+
+        :param code: promo code
+        :return: PromoCode model instance or None if code doesn't exist
+        """
+        data = self.get_map().get(code)
+        if data is None:
+            return None
+        pk, discount, from_date, until_date = data
+        return self.model(id=pk, code=code, discount=discount,
+                          from_date=from_date, until_date=until_date)
+
+    def is_used_by(self, promo_code_id: int, user_id: int) -> bool:
+        """
+        Checks if user has already used promo code.
+
+        Makes single query to m2m table without joins
+        """
+        through = self.model.users.through
+        return (through.objects
+                .filter(promocode_id=promo_code_id, user_id=user_id)
+                .exists())
+
+    @staticmethod
+    def invalidate() -> None:
+        cache.delete(PROMO_CODES_CACHE_KEY)
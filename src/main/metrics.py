@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains registry of metrics exported in Prometheus text format.
+
+"""
+import threading
+import time
+from collections import defaultdict
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+
+from config import settings
+
+# upper bounds of histogram buckets in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf"))
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, float("inf"))
+STORAGE_KEY = "metrics"
+
+# name -> (type, help, buckets)
+METRICS = {
+    "http_request_duration_seconds": ("histogram", "Latency of API requests by route", DURATION_BUCKETS),
+    "http_requests_total": ("counter", "Count of API requests by route and status", None),
+    "http_request_db_queries_total": ("counter", "Count of ORM queries by route", None),
+    "cache_hits_total": ("counter", "Count of cache hits", None),
+    "cache_misses_total": ("counter", "Count of cache misses", None),
+    "celery_task_duration_seconds": ("histogram", "Duration of celery tasks", DURATION_BUCKETS),
+    "celery_task_queue_lag_seconds": ("histogram", "Time between publishing and start of celery tasks",
+                                      LAG_BUCKETS),
+    "celery_tasks_total": ("counter", "Count of finished celery tasks by state", None),
+    "checkouts_total": ("counter", "Count of checkouts by result", None),
+}
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def sample_key(name: str, labels: dict) -> str:
+    """
+    Get name of sample with labels as it's written in exposition.
+    """
+    if not labels:
+        return name
+    return "%s{%s}" % (name, ",".join(f'{label}="{escape(value)}"' for label, value in sorted(labels.items())))
+
+
+class LocalStorage:
+    """
+    Storage of metrics in memory of process, is used by tests and single process runs.
+    """
+
+    def __init__(self):
+        self.values = defaultdict(float)
+
+    def add(self, values: dict) -> None:
+        for key, value in values.items():
+            self.values[key] += value
+
+    def read(self) -> dict:
+        return dict(self.values)
+
+    def clear(self) -> None:
+        self.values.clear()
+
+
+class RedisStorage:
+    """
+    Storage of metrics in redis hash shared by web and celery workers.
+    """
+
+    @staticmethod
+    def get_connection():
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    def add(self, values: dict) -> None:
+        pipeline = self.get_connection().pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.hincrbyfloat(STORAGE_KEY, key, value)
+        pipeline.execute()
+
+    def read(self) -> dict:
+        return {key.decode(): float(value) for key, value in self.get_connection().hgetall(STORAGE_KEY).items()}
+
+    def clear(self) -> None:
+        self.get_connection().delete(STORAGE_KEY)
+
+
+class MetricsRegistry:
+    """
+    Registry of counters and histograms.
+
+    Values are accumulated in memory of process and flushed
+    to shared storage not more often than METRICS_FLUSH_INTERVAL,
+    so recording of metric doesn't cost network call.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or (LocalStorage() if settings.METRICS_STORAGE == "local" else RedisStorage())
+        self._buffer = defaultdict(float)
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def inc(self, name: str, labels: dict = None, value: float = 1) -> None:
+        """
+        Increase counter.
+
+        :param name: name of metric from METRICS
+        :param labels: dict label -> value
+        :param value: increment
+        """
+        self.add({sample_key(name, labels or {}): value})
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        """
+        Add value to histogram.
+
+        :param name: name of histogram from METRICS
+        :param value: measured value
+        :param labels: dict label -> value
+        """
+        self.add(self.get_histogram_values(name, value, labels or {}))
+
+    @staticmethod
+    def get_histogram_values(name: str, value: float, labels: dict) -> dict:
+        """
+        Get increments of histogram samples, buckets are stored cumulative.
+        """
+        values = {sample_key(f"{name}_bucket", dict(labels, le=format_bound(bound))): 1
+                  for bound in METRICS[name][2] if value <= bound}
+        values[sample_key(f"{name}_sum", labels)] = value
+        values[sample_key(f"{name}_count", labels)] = 1
+        return values
+
+    def add(self, values: dict) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._buffer[key] += value
+        self.flush_if_needed()
+
+    def flush_if_needed(self) -> None:
+        if time.monotonic() - self._flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            values, self._buffer = self._buffer, defaultdict(float)
+            self._flushed_at = time.monotonic()
+        if values:
+            self.storage.add(values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer.clear()
+        self.storage.clear()
+
+    def render(self) -> str:
+        """
+        Get all metrics in Prometheus text format.
+        """
+        self.flush()
+        samples = self.storage.read()
+        lines = []
+        for name, (kind, description, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            prefixes = ([f"{name}_bucket", f"{name}_sum", f"{name}_count"] if kind == "histogram" else [name])
+            for key in sorted(samples):
+                if key.split("{")[0] in prefixes:
+                    lines.append(f"{key} {format_value(samples[key])}")
+        hits = samples.get("cache_hits_total", 0)
+        misses = samples.get("cache_misses_total", 0)
+        lines.append("# HELP cache_hit_ratio Share of cache hits")
+        lines.append("# TYPE cache_hit_ratio gauge")
+        lines.append(f"cache_hit_ratio {format_value(hits / (hits + misses) if hits + misses else 0)}")
+        return "\n".join(lines) + "\n"
+
+    def observe_request(self, route: str, method: str, status: int, duration: float,
+                        queries: int, cache_hits: int, cache_misses: int) -> None:
+        """
+        Record metrics of finished API request.
+
+        :param duration: request time in seconds
+        """
+        labels = {"route": route, "method": method}
+        values = self.get_histogram_values("http_request_duration_seconds", duration, labels)
+        values[sample_key("http_requests_total", dict(labels, status=status))] = 1
+        values[sample_key("http_request_db_queries_total", labels)] = queries
+        values["cache_hits_total"] = cache_hits
+        values["cache_misses_total"] = cache_misses
+        self.add(values)
+
+
+registry = MetricsRegistry()
+_task_started = {}
+
+
+def is_tracked(task_name: str) -> bool:
+    return task_name.rsplit(".", 1)[-1] in settings.METRICS_CELERY_TASKS
+
+
+@before_task_publish.connect
+def task_published(sender=None, headers=None, **kwargs):
+    if headers is not None and is_tracked(sender or ""):
+        headers["published_at"] = time.time()
+
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    if not is_tracked(task.name):
+        return
+    _task_started[task_id] = time.perf_counter()
+    published_at = task.request.get("published_at")
+    if published_at:
+        registry.observe("celery_task_queue_lag_seconds", max(time.time() - published_at, 0),
+                         {"task": task.name})
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None:
+        return
+    registry.observe("celery_task_duration_seconds", time.perf_counter() - started, {"task": task.name})
+    registry.inc("celery_tasks_total", {"task": task.name, "state": state or "UNKNOWN"})
+    registry.flush()
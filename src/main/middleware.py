@@ -1,24 +1,216 @@
+import cProfile
+import os
+import random
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings as django_settings
 from django.http import HttpRequest
-from django.middleware.locale import LocaleMiddleware
-from ninja import Header
+from django.utils import timezone
+from loguru import logger
 
 from config import settings
-from django.conf.urls.i18n import is_language_prefix_patterns_used
+from src.main.instrumentation import RequestMetrics, route_histograms
+from src.main.metrics import registry
+from src.main.routers import STICKY_COOKIE, RoutingState, is_replica_path
+
+API_ROUTE_PREFIX = "api/"
+
 
-from django.utils import translation
+class InstrumentationMiddleware:
+    """
+    Measure every request.
 
-from src.main.utils import LangEnum
+    Wall time, db queries and their time, cache hits and misses
+    and time of JSON serialization are sent in Server-Timing header,
+    logged by loguru and added to per-route histograms
+    and Prometheus metrics.
+    Small share of requests is profiled, profile is saved only
+    when request is slower than INSTRUMENTATION_PROFILE_THRESHOLD.
+    """
 
+    sync_capable = True
+    async_capable = True
 
-class MyMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = RequestMetrics.open()
+        metrics = RequestMetrics.current()
+        profiler = self.start_profiler()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            RequestMetrics.close(token)
+        return self.finish(request, response, metrics, profiler, duration)
+
+    async def __acall__(self, request: HttpRequest):
+        token = RequestMetrics.open()
+        metrics = RequestMetrics.current()
+        profiler = self.start_profiler()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            RequestMetrics.close(token)
+        return self.finish(request, response, metrics, profiler, duration)
+
+    def finish(self, request: HttpRequest, response, metrics: RequestMetrics, profiler, duration: float):
+        """
+        Record measurements of finished request.
+
+        :param duration: request time in milliseconds
+        """
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "<unmatched>"
+        route_histograms.observe(route, duration, metrics.queries)
+        if route.startswith(API_ROUTE_PREFIX):
+            registry.observe_request(route, request.method, response.status_code, duration / 1000,
+                                     metrics.queries, metrics.cache_hits, metrics.cache_misses)
+        if profiler is not None:
+            self.stop_profiler(profiler, route, duration)
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            response["Server-Timing"] = self.get_server_timing(metrics, duration)
+        if settings.INSTRUMENTATION_LOG_ALL or duration >= settings.INSTRUMENTATION_SLOW_REQUEST:
+            log = logger.bind(method=request.method,
+                              path=request.path,
+                              route=route,
+                              status=response.status_code,
+                              duration=round(duration, 2),
+                              queries=metrics.queries,
+                              db_time=round(metrics.db_time * 1000, 2),
+                              cache_hits=metrics.cache_hits,
+                              cache_misses=metrics.cache_misses,
+                              serialization_time=round(metrics.serialization_time * 1000, 2))
+            if duration >= settings.INSTRUMENTATION_SLOW_REQUEST:
+                log.warning("Slow request {} {}", request.method, request.path)
+            else:
+                log.info("Request {} {}", request.method, request.path)
+        return response
+
+    @staticmethod
+    def get_server_timing(metrics: RequestMetrics, duration: float) -> str:
+        return ", ".join([
+            f"total;dur={duration:.2f}",
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+            f"ser;dur={metrics.serialization_time * 1000:.2f}",
+        ])
+
+    @staticmethod
+    def start_profiler():
+        if random.random() >= settings.INSTRUMENTATION_PROFILE_RATE:
+            return None
+        if settings.INSTRUMENTATION_PROFILER == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("pyinstrument isn't installed, cProfile is used")
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    @staticmethod
+    def stop_profiler(profiler, route: str, duration: float) -> None:
+        """
+        Stop profiler and save its trace if request was slow.
+
+        :param profiler: cProfile or pyinstrument profiler
+        :param route: url pattern of route
+        :param duration: request time in milliseconds
+        """
+        is_cprofile = isinstance(profiler, cProfile.Profile)
+        if is_cprofile:
+            profiler.disable()
+        else:
+            profiler.stop()
+        if duration < settings.INSTRUMENTATION_PROFILE_THRESHOLD:
+            return
+        os.makedirs(settings.INSTRUMENTATION_PROFILE_DIR, exist_ok=True)
+        name = "{}-{}-{}".format(timezone.now().strftime("%Y%m%d%H%M%S%f"),
+                                 re.sub(r"[^\w]+", "_", route).strip("_") or "root",
+                                 int(duration))
+        path = os.path.join(settings.INSTRUMENTATION_PROFILE_DIR, name)
+        if is_cprofile:
+            path = path + ".prof"
+            profiler.dump_stats(path)
+        else:
+            path = path + ".html"
+            with open(path, "w") as file:
+                file.write(profiler.output_html())
+        logger.bind(route=route, duration=round(duration, 2), profile=path).warning("Slow request profiled")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Allow storefront GET requests to read from replica.
+
+    Client which has written something (cart, order, session) reads
+    from default during DB_REPLICA_STICKY_SECONDS, so it sees own writes.
+    Guests are pinned by cookie, authenticated users also by cache key,
+    because they can use several devices.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DB_REPLICA:
+            return self.get_response(request)
+        token = self.open(request)
+        state = RoutingState.current()
+        try:
+            response = self.get_response(request)
+        finally:
+            RoutingState.close(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request: HttpRequest):
+        if not settings.DB_REPLICA:
+            return await self.get_response(request)
+        token = self.open(request)
+        state = RoutingState.current()
+        try:
+            response = await self.get_response(request)
+        finally:
+            RoutingState.close(token)
+        return self.finish(response, state)
 
-    def __call__(self, request: HttpRequest()):
-        print(request.path_info)
-        # print(111)
-        # print(request.META['HTTP_ACCEPT_LANGUAGE'])
-        print(request.headers['Accept-Language'])
-        response = self.get_response(request,)
+    @staticmethod
+    def open(request: HttpRequest):
+        replica = is_replica_path(request.method, request.path) and STICKY_COOKIE not in request.COOKIES
+        return RoutingState.open(replica)
 
+    @staticmethod
+    def finish(response, state: RoutingState):
+        if state.wrote:
+            response.set_cookie(STICKY_COOKIE, "1",
+                                max_age=settings.DB_REPLICA_STICKY_SECONDS,
+                                httponly=True,
+                                secure=django_settings.SESSION_COOKIE_SECURE,
+                                samesite=django_settings.SESSION_COOKIE_SAMESITE)
+            if state.user_id is not None:
+                RoutingState.pin_user(state.user_id)
         return response
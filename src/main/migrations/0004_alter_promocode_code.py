@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='promocode',
+            name='code',
+            field=models.CharField(max_length=215, unique=True),
+        ),
+    ]
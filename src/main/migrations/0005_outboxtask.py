@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_alter_promocode_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=255)),
+                ('kwargs', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Outbox task',
+                'verbose_name_plural': 'Outbox tasks',
+                'db_table': 'outbox_tasks',
+            },
+        ),
+    ]
@@ -11,13 +11,17 @@
        Setting
        PromoCode
        Subscriber
+       OutboxTask
 """
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from imagekit.models.fields import ImageSpecField
 from imagekit.processors import ResizeToFill
 
 from src.games.models import Game
+from src.main.managers.outbox_manager import OutboxTaskManager
+from src.main.managers.promo_code_manager import PromoCodeManager
 from src.main.tasks import share_news
 from src.orders.models import Order
 from src.products.models import FreqBought, Product, SubFilter
@@ -90,9 +94,13 @@ class News(models.Model):
         return self.title
 
     def save(self, *args, **kwargs):
-        if self._state.adding:
-            share_news.delay(news_title=self.title, news_descr=self.description)
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if adding:
+                OutboxTask.objects.enqueue(share_news,
+                                           news_title=self.title,
+                                           news_descr=self.description)
 
     class Meta:
         verbose_name = "News"
@@ -182,11 +190,12 @@ class PromoCode(models.Model):
 
     """
 
-    code = models.CharField(max_length=215)
+    code = models.CharField(max_length=215, unique=True)
     from_date = models.DateField()
     until_date = models.DateField()
     discount = models.IntegerField(default=0)
     users = models.ManyToManyField(User, related_name="promo_codes")
+    objects = PromoCodeManager()
 
     def __str__(self):
         """
@@ -196,6 +205,15 @@ class PromoCode(models.Model):
         """
         return self.code
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        PromoCode.objects.invalidate()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        PromoCode.objects.invalidate()
+        return result
+
     class Meta:
         verbose_name = "Promo codes"
         verbose_name_plural = "Promo codes"
@@ -284,3 +302,25 @@ class OrderItemAttribute(models.Model):
 
     class Meta:
         db_table = "sub_orders_attributes"
+
+
+class OutboxTask(models.Model):
+    """
+    Model is storing celery tasks which have to be published to broker.
+
+    Tasks are created in the same transaction as related data
+    and published by task relay_outbox after commit
+    """
+
+    task_name = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    date_created = models.DateTimeField(auto_now_add=True)
+    objects = OutboxTaskManager()
+
+    def __str__(self):
+        return self.task_name
+
+    class Meta:
+        verbose_name = "Outbox task"
+        verbose_name_plural = "Outbox tasks"
+        db_table = "outbox_tasks"
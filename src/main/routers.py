@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains database router sending storefront reads to replica.
+
+"""
+import re
+from contextvars import ContextVar
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from config import settings
+
+STICKY_COOKIE = "db_primary"
+STICKY_KEY = "db_primary:{}"
+
+_state = ContextVar("routing_state", default=None)
+_paths = [re.compile(pattern) for pattern in settings.DB_REPLICA_PATHS]
+
+
+def is_replica_path(method: str, path: str) -> bool:
+    """
+    Check if request only reads data which can be stale for a few seconds.
+    """
+    return method in ("GET", "HEAD") and any(pattern.match(path) for pattern in _paths)
+
+
+class RoutingState:
+    """
+    Routing of one request.
+
+    Instance is stored in context variable while request is processed.
+    Reads go to replica only when request allowed it and nothing
+    was written by this request yet.
+    """
+
+    def __init__(self, replica: bool = False):
+        self.replica = replica
+        self.wrote = False
+        self.user_id = None
+
+    @staticmethod
+    def open(replica: bool = False):
+        return _state.set(RoutingState(replica))
+
+    @staticmethod
+    def close(token) -> None:
+        _state.reset(token)
+
+    @staticmethod
+    def current() -> Optional["RoutingState"]:
+        return _state.get()
+
+    @staticmethod
+    def set_user(user_id: int) -> None:
+        """
+        Remember authenticated user and read from default
+        if the user has written something recently.
+        """
+        state = _state.get()
+        if state is None:
+            return
+        state.user_id = user_id
+        if state.replica and cache.get(STICKY_KEY.format(user_id)):
+            state.replica = False
+
+    @staticmethod
+    def pin_user(user_id: int) -> None:
+        cache.set(STICKY_KEY.format(user_id), 1, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+class ReplicaRouter:
+    """
+    Router of reads to REPLICA_DATABASE.
+
+    Everything outside of request (celery, commands, shell) and all
+    writes use default database. Migrations are applied only to default,
+    replica gets them by replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.wrote:
+            return DEFAULT_DB_ALIAS
+        # data of open transaction is visible only in default
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return settings.REPLICA_DATABASE
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases contain the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 
 
 from src.main.models import Insta, News, PromoCode, Review, Setting, WhyChooseUs
-from src.products.utils import paginate
+from src.products.utils import apaginate, paginate
 from django.utils.translation import gettext as _
 
 User = get_user_model()
@@ -73,3 +73,53 @@ class MainService:
         """
         items = News.objects.select_related('game').all()
         return paginate(items=items, page=page, page_size=page_size)
+
+    @staticmethod
+    async def aget_why_choose_us() -> list:
+        """
+        Async version of get_why_choose_us.
+
+        :return: list of WhyChooseUs model instances
+        """
+        return [item async for item in WhyChooseUs.objects.all()]
+
+    @staticmethod
+    async def aget_instagram() -> list:
+        """
+        Async version of get_instagram.
+
+        :return: list of Insta model instances
+        """
+        return [item async for item in Insta.objects.all()]
+
+    @staticmethod
+    async def aget_reviews(page: int, page_size: int) -> dict:
+        """
+        Async version of get_reviews.
+
+        :param page: the page number we want to get
+        :param page_size: length of queryset per page
+        :return: dict which contains parameters for pagination
+        """
+        return await apaginate(items=Review.objects.all(), page=page, page_size=page_size)
+
+    @staticmethod
+    async def aget_settings() -> Setting:
+        """
+        Async version of get_settings.
+
+        :return: Setting model instance
+        """
+        return await Setting.objects.afirst()
+
+    @staticmethod
+    async def aget_news(page: int, page_size: int) -> dict:
+        """
+        Async version of get_news.
+
+        :param page: the page number we want to get
+        :param page_size: length of queryset per page
+        :return: dict which contains parameters for pagination
+        """
+        items = News.objects.select_related('game').all()
+        return await apaginate(items=items, page=page, page_size=page_size)
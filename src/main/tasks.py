@@ -3,13 +3,63 @@
 In this module described all celery task for implementing
 asynchronous logic in application orders
 """
-from itertools import chain
+import uuid
+from smtplib import SMTPException
 
 from celery.app import shared_task
-from django.core.mail import send_mail, EmailMessage, send_mass_mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
 from config import settings
 from src.users.models import User, Subscriber
 
+SHARE_NEWS_PROGRESS_TIMEOUT = 60 * 60 * 24
+
+
+def _progress_key(dispatch_id: str, name: str) -> str:
+    return f"share_news:{dispatch_id}:{name}"
+
+
+def _add_progress(dispatch_id: str, name: str, value: int) -> None:
+    key = _progress_key(dispatch_id, name)
+    cache.add(key, 0, SHARE_NEWS_PROGRESS_TIMEOUT)
+    cache.incr(key, value)
+
+
+def get_share_news_progress(dispatch_id: str) -> dict:
+    """
+    Get progress of news dispatch.
+
+    :param dispatch_id: id returned by task share_news
+    :return: dict with count of chunks and how many of them are sent
+    """
+    keys = [_progress_key(dispatch_id, name)
+            for name in ("chunks", "chunks_done", "sent")]
+    values = cache.get_many(keys)
+    chunks, chunks_done, sent = (values.get(key, 0) for key in keys)
+    return {"chunks": chunks, "chunks_done": chunks_done, "sent": sent}
+
+
+def iter_news_recipients(chunk_size: int):
+    """
+    Yield lists of unique recipients' emails.
+
+    Emails are deduplicated by db (UNION) and streamed
+    with server-side cursor, so memory usage doesn't depend
+    on count of subscribers
+    :param chunk_size: length of every yielded list
+    """
+    users = User.objects.filter(notify_me=True).values_list("email", flat=True)
+    subscribers = Subscriber.objects.values_list("email", flat=True)
+    recipients = users.union(subscribers).order_by("email")
+    chunk = []
+    for email in recipients.iterator(chunk_size=chunk_size):
+        chunk.append(email)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 
 @shared_task
 def share_news(news_title: str,
@@ -17,12 +67,72 @@ def share_news(news_title: str,
     """
     Send letter with news to subscribers.
 
+    Recipients are split on chunks and every chunk
+    is sent by separate task send_news_chunk
     :param news_title: title of news
     :param news_descr:  description of news
     """
-    users = User.objects.filter(notify_me=True).values_list('email', flat=True)
-    subscribers = Subscriber.objects.values_list('email', flat=True)
-    recipients = list(set(chain(users, subscribers)))
-    messages = [(news_title, news_descr, settings.DEFAULT_FROM_EMAIL, [recipient]) for recipient in recipients]
-    send_mass_mail(messages)
-    return {"message": "News shared successfully"}
+    dispatch_id = uuid.uuid4().hex
+    chunks = 0
+    for emails in iter_news_recipients(settings.SHARE_NEWS_CHUNK_SIZE):
+        chunks = chunks + 1
+        cache.set(_progress_key(dispatch_id, "chunks"), chunks,
+                  SHARE_NEWS_PROGRESS_TIMEOUT)
+        send_news_chunk.delay(dispatch_id=dispatch_id,
+                              news_title=news_title,
+                              news_descr=news_descr,
+                              emails=emails)
+    return {"message": "News shared successfully",
+            "dispatch_id": dispatch_id,
+            "chunks": chunks}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_news_chunk(self,
+                    dispatch_id: str,
+                    news_title: str,
+                    news_descr: str,
+                    emails: list) -> dict:
+    """
+    Send letter with news to chunk of subscribers.
+
+    All letters of chunk are sent through one SMTP connection
+    one by one, in case of SMTP error only recipients which
+    didn't get the letter are retried. Delivery is at least once:
+    letter accepted by server before connection failed can be sent again
+    :param dispatch_id: id of news dispatch for tracking progress
+    :param news_title: title of news
+    :param news_descr:  description of news
+    :param emails: recipients of chunk
+    """
+    sent = 0
+    done = 0
+    try:
+        with get_connection() as connection:
+            for email in emails:
+                message = EmailMessage(news_title, news_descr,
+                                       settings.DEFAULT_FROM_EMAIL, [email])
+                sent = sent + (connection.send_messages([message]) or 0)
+                done = done + 1
+    except SMTPException as exc:
+        _add_progress(dispatch_id, "sent", sent)
+        raise self.retry(exc=exc, kwargs={"dispatch_id": dispatch_id,
+                                          "news_title": news_title,
+                                          "news_descr": news_descr,
+                                          "emails": emails[done:]})
+    _add_progress(dispatch_id, "sent", sent)
+    _add_progress(dispatch_id, "chunks_done", 1)
+    return {"message": "News chunk sent successfully", "sent": sent}
+
+
+@shared_task
+def relay_outbox() -> dict:
+    """
+    Publish to broker celery tasks stored in outbox.
+
+    Is launched periodically by celery beat
+    """
+    from src.main.models import OutboxTask
+
+    published = OutboxTask.objects.relay(settings.OUTBOX_RELAY_BATCH_SIZE)
+    return {"message": "Outbox relayed successfully", "published": published}
@@ -0,0 +1,61 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from ninja.errors import HttpError
+
+from src.games.models import CatalogPage
+from src.games.services.games_service import GameService
+from src.main.models import News
+from src.products.models import Product
+from src.products.services.product_service import ProductService
+from src.products.utils import apaginate, paginate
+
+
+@pytest.mark.django_db
+class TestAsyncServices:
+
+    @pytest.mark.parametrize("page", [1, 2, 100, 0])
+    def test_apaginate(self, page):
+        expected = paginate(page=page, items=News.objects.order_by("id"), page_size=2)
+        result = async_to_sync(apaginate)(page=page, items=News.objects.order_by("id"), page_size=2)
+        assert [item.id for item in result["items"]] == [item.id for item in expected["items"]]
+        assert ({key: result[key] for key in ("count", "next", "previous")}
+                == {key: expected[key] for key in ("count", "next", "previous")})
+
+    def test_relations_are_loaded(self):
+        """
+        Schemas of async endpoints are rendered in event loop,
+        so everything they read has to be loaded by service.
+        """
+        page = async_to_sync(GameService.aget_catalog_page)(CatalogPage.objects.filter(game__isnull=False)
+                                                            .first().id)
+        product = async_to_sync(ProductService.aget_product_by_id)(Product.objects.first().id)
+        games = async_to_sync(GameService.aget_games)()
+        with CaptureQueriesContext(connection) as context:
+            assert page.game.logo_product_alt is not None
+            list(page.tabs.all())
+            assert product.catalog_page.game.id
+            product.price_from()
+            list(product.tabs.all())
+            [game.items for game in games]
+        assert len(context.captured_queries) == 0
+
+    def test_not_found(self):
+        with pytest.raises(HttpError) as error:
+            async_to_sync(ProductService.aget_product_by_id)(-1)
+        assert error.value.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", [
+    "/api/main/news/?page=1&page_size=3",
+    "/api/main/settings/",
+    "/api/games/",
+    "/api/products/hot-offers/?page=1&page_size=3",
+    "/api/products/freqbot-section/",
+])
+def test_async_endpoints(path):
+    response = async_to_sync(AsyncClient().get)(path, headers={"Accept-Language": "en"})
+    assert response.status_code == 200
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from src.main.benchmark import StorefrontBenchmark, percentile, summarize
+
+
+class TestBenchmarkStatistic:
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == pytest.approx(50.5)
+        assert percentile(values, 99) == pytest.approx(99.01)
+        assert percentile([7.0], 95) == 7.0
+
+    def test_summarize(self):
+        result = summarize([10.0, 20.0, 30.0], [3, 5, 7], errors=1)
+        assert result["requests"] == 3
+        assert result["errors"] == 1
+        assert result["p50"] == 20.0
+        assert result["queries_per_request"] == 5.0
+
+
+@pytest.mark.django_db
+class TestStorefrontBenchmark:
+
+    def test_run(self):
+        benchmark = StorefrontBenchmark(seed=1)
+        report = benchmark.run(iterations=10, warmup=2)
+        assert set(report["scenarios"]) == set(StorefrontBenchmark.SCENARIOS)
+        assert report["total"]["requests"] > 0
+        assert report["total"]["throughput"] > 0
+        assert "queries_per_request" in report["total"]
+        assert json.loads(json.dumps(report)) == report
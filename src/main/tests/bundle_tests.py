@@ -0,0 +1,99 @@
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from ninja.errors import HttpError
+
+from src.games.models import CatalogPage
+from src.games.services.games_service import GameService
+from src.main.bundles import Bundle
+from src.main.instrumentation import RequestMetrics
+from src.products.models import Product
+from src.products.services.product_service import ProductService
+
+
+def sleep(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def fail():
+    raise HttpError(404, "Not Found")
+
+
+def count_products() -> int:
+    return Product.objects.count()
+
+
+class TestBundle:
+
+    def test_parts_run_concurrently(self):
+        bundle = Bundle(timeout=5).add("first", sleep, 0.3).add("second", sleep, 0.3).add("third", sleep, 0.3)
+        started = time.perf_counter()
+        result = async_to_sync(bundle.run)()
+        assert time.perf_counter() - started < 0.8
+        assert result == {"first": 0.3, "second": 0.3, "third": 0.3, "errors": []}
+
+    def test_optional_part_failed(self):
+        bundle = Bundle(timeout=0.2).add("slow", sleep, 1, default=0).add("failed", fail, default=[])
+        result = async_to_sync(bundle.run)()
+        assert result == {"slow": 0, "failed": [], "errors": ["slow", "failed"]}
+
+    def test_required_part_failed(self):
+        with pytest.raises(HttpError) as error:
+            async_to_sync(Bundle().add("failed", fail, required=True).run)()
+        assert error.value.status_code == 404
+
+        with pytest.raises(HttpError) as error:
+            async_to_sync(Bundle(timeout=0.1).add("slow", sleep, 1, required=True).run)()
+        assert error.value.status_code == 504
+
+
+@pytest.mark.django_db
+class TestBundleQueries:
+    """
+    Parts use own connections, so only data
+    committed to test database is visible to them.
+    """
+
+    def test_queries_are_counted(self):
+        token = RequestMetrics.open()
+        try:
+            result = async_to_sync(Bundle().add("first", count_products).add("second", count_products).run)()
+            assert RequestMetrics.current().queries == 2
+        finally:
+            RequestMetrics.close(token)
+        assert result["first"] == result["second"]
+
+    def test_services(self):
+        product = Product.objects.first()
+        result = async_to_sync(ProductService.get_product_bundle)(None, product.id)
+        assert result["product"]["id"] == product.id
+        assert result["errors"] == []
+        assert [tab["id"] for tab in result["tabs"]] == list(product.tabs.values_list("id", flat=True))
+
+        page = CatalogPage.objects.filter(game__isnull=False).first()
+        result = async_to_sync(GameService.get_catalog_page_bundle)(page.id)
+        assert result["page"]["game_id"] == page.game_id
+        assert result["errors"] == []
+
+        with pytest.raises(HttpError) as error:
+            async_to_sync(ProductService.get_product_bundle)(None, -1)
+        assert error.value.status_code == 404
+
+
+@pytest.mark.django_db
+def test_bundle_endpoints():
+    client = AsyncClient()
+    headers = {"Accept-Language": "en"}
+    product_id = Product.objects.first().id
+    page_id = CatalogPage.objects.filter(game__isnull=False).first().id
+
+    response = async_to_sync(client.get)(f"/api/products/{product_id}/bundle/", headers=headers)
+    assert response.status_code == 200
+    assert set(response.json()) == {"product", "tabs", "frequently_bought", "errors"}
+
+    response = async_to_sync(client.get)(f"/api/catalog-page/{page_id}/bundle/", headers=headers)
+    assert response.status_code == 200
+    assert set(response.json()) == {"page", "worth_look", "calendar", "errors"}
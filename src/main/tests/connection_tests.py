@@ -0,0 +1,47 @@
+import django
+from django.core.checks import run_checks
+
+from config import settings
+from src.main.checks import check_connections, get_connections_budget
+
+
+class TestConnectionsBudget:
+
+    def test_persistent_connections(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL", False)
+        monkeypatch.setattr(settings, "SERVER_INTERFACE", "wsgi")
+        monkeypatch.setattr(settings, "WEB_WORKERS", 4)
+        monkeypatch.setattr(settings, "WEB_THREADS", 2)
+        monkeypatch.setattr(settings, "BUNDLE_WORKERS", 1)
+        monkeypatch.setattr(settings, "CELERY_WORKER_CONCURRENCY", 3)
+        assert get_connections_budget() == {"per_web_process": 3, "web": 12, "celery": 4, "total": 16}
+
+    def test_asgi(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL", False)
+        monkeypatch.setattr(settings, "SERVER_INTERFACE", "asgi")
+        monkeypatch.setattr(settings, "WEB_ASGI_CONCURRENCY", 20)
+        monkeypatch.setattr(settings, "BUNDLE_WORKERS", 0)
+        monkeypatch.setattr(settings, "WEB_WORKERS", 2)
+        monkeypatch.setattr(settings, "CELERY_WORKER_CONCURRENCY", 1)
+        assert get_connections_budget()["web"] == 40
+
+    def test_pool(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL", True)
+        monkeypatch.setattr(settings, "DB_POOL_MAX_SIZE", 5)
+        monkeypatch.setattr(settings, "WEB_WORKERS", 2)
+        monkeypatch.setattr(settings, "CELERY_WORKER_CONCURRENCY", 1)
+        assert get_connections_budget()["total"] == 12
+
+    def test_budget_is_exceeded(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL", False)
+        monkeypatch.setattr(settings, "SERVER_INTERFACE", "wsgi")
+        monkeypatch.setattr(settings, "WEB_WORKERS", 50)
+        monkeypatch.setattr(settings, "WEB_THREADS", 4)
+        monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 100)
+        assert "main.W002" in [error.id for error in check_connections(None)]
+
+    def test_pool_is_not_supported(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL", True)
+        monkeypatch.setattr(django, "VERSION", (5, 0, 2, "final", 0))
+        # check is run without database tag, e.g. by runserver
+        assert "main.E001" in [error.id for error in run_checks()]
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from src.main.generator import DataGenerator, FILTERS_PER_PRODUCT, SUBFILTERS_PER_FILTER, copy_value
+from src.main.models import OrderItem, OrderItemAttribute
+from src.orders.models import Order
+from src.products.models import Filter, Product, SubFilter
+
+
+def test_copy_value():
+    assert copy_value(None) == r"\N"
+    assert copy_value(True) == "t"
+    assert copy_value("a\tb\nc\\") == "a\\tb\\nc\\\\"
+
+
+@pytest.mark.django_db
+class TestDataGenerator:
+
+    @pytest.mark.parametrize("use_copy", [False, True])
+    def test_generate(self, use_copy):
+        generator = DataGenerator(seed=1, chunk_size=7, use_copy=use_copy, until=date(2024, 6, 30), days=30)
+        products_count, orders_count = Product.objects.count(), Order.objects.count()
+        generator.generate(games=2, pages=2, products=12, users=5, orders=20)
+
+        assert Product.objects.count() == products_count + 12
+        assert Order.objects.count() == orders_count + 20
+        product = Product.objects.filter(price_type="range").order_by("-id").first()
+        assert Filter.objects.filter(product=product).count() == FILTERS_PER_PRODUCT
+        assert (SubFilter.objects.filter(filter__product=product).count()
+                == FILTERS_PER_PRODUCT * SUBFILTERS_PER_FILTER)
+        orders = Order.objects.order_by("-number")[:20]
+        assert all(order.date_created.date() <= date(2024, 6, 30) for order in orders)
+        order = orders[0]
+        total = sum(item.cost * item.quantity for item in OrderItem.objects.filter(order=order))
+        assert order.total_price == pytest.approx(total)
+        assert OrderItemAttribute.objects.filter(order_item__order__in=orders).exists()
+        # sequences are moved after explicit ids
+        assert Product.objects.create(title="New", subtitle="", description="", price=1,
+                                      price_type="fixed").id > product.id
+
+    def test_deterministic(self):
+        first = DataGenerator(seed=5, until=date(2024, 6, 30))
+        second = DataGenerator(seed=5, until=date(2024, 6, 30))
+        assert first.words_en == second.words_en
+        assert ([first.random.random() for i in range(3)]
+                == [second.random.random() for i in range(3)])
+        first.generate(games=1, pages=1, products=3, users=2, orders=3)
+        prices = list(Order.objects.order_by("-number").values_list("total_price", flat=True)[:3])
+        second.generate(games=1, pages=1, products=3, users=2, orders=3)
+        assert list(Order.objects.order_by("-number").values_list("total_price", flat=True)[:3]) == prices
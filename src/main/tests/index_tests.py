@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+from django.db import connection
+
+from src.main.models import PromoCode
+from src.orders.models import CartItem, Order
+from src.products.models import Product
+from src.statistic.services.statistic_service import StatisticService
+from src.users.models import User
+
+
+def explain(queryset) -> str:
+    """
+    Get plan of query when planner can't choose sequential scan
+    (test tables are too small for fair choice)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+@pytest.mark.django_db
+class TestIndexes:
+
+    # partial indexes of products all can serve filtered top of bestsellers,
+    # choice between them depends on statistics, so any of them is valid
+    @pytest.mark.parametrize("queryset,index_name", [
+        (lambda: Product.objects.bestsellers()[:12], 'products_bestsellers_idx'),
+        (lambda: Product.objects.hot_all()[:12], ('products_tag_idx', 'products_bestsellers_idx')),
+        (lambda: Product.objects.filter(catalog_page_id=1)[:12],
+         ('products_catalog_page_idx', 'products_bestsellers_idx')),
+        (lambda: Order.objects.filter(user_id=1)[:10], 'orders_user_created_idx'),
+        (lambda: StatisticService().get_completed_orders(date(2024, 1, 1), date(2024, 1, 7)),
+         'orders_status_created_idx'),
+        (lambda: CartItem.objects.filter(cart_id=1, product_id=1), 'cart_items_cart_product_idx'),
+        (lambda: (User.objects
+                  .filter(notify_me=True)
+                  .order_by('email')
+                  .values_list('email', flat=True)),
+         'users_notify_me_idx'),
+    ])
+    def test_index_scan(self, queryset, index_name):
+        plan = explain(queryset())
+        index_names = index_name if isinstance(index_name, tuple) else (index_name,)
+        lines = [line for line in plan.splitlines() if any(name in line for name in index_names)]
+        assert lines, plan
+        assert 'Index' in lines[0]
+
+    def test_promo_code_index_scan(self):
+        plan = explain(PromoCode.objects.filter(code='PYTHON'))
+        assert 'Index' in plan
+        assert 'code' in plan
@@ -0,0 +1,59 @@
+import pytest
+from django.test import Client
+
+from config import settings
+from src.main.instrumentation import RequestMetrics, RouteHistograms, route_histograms
+from src.main.middleware import InstrumentationMiddleware
+from src.users.models import User
+
+
+class TestRouteHistograms:
+
+    def test_snapshot(self):
+        histograms = RouteHistograms()
+        histograms.observe("api/main/settings/", 3, 1)
+        histograms.observe("api/main/settings/", 30, 3)
+        histograms.observe("api/main/settings/", 7000, 5)
+        result = histograms.snapshot()["api/main/settings/"]
+        assert result["count"] == 3
+        assert result["queries_per_request"] == 3
+        assert result["buckets"]["5"] == 1
+        assert result["buckets"]["50"] == 2
+        assert result["buckets"]["5000"] == 2
+        assert result["buckets"]["+Inf"] == 3
+
+    def test_server_timing(self):
+        metrics = RequestMetrics()
+        metrics.queries, metrics.db_time, metrics.cache_hits = 2, 0.004, 1
+        header = InstrumentationMiddleware.get_server_timing(metrics, 12.5)
+        assert header.startswith("total;dur=12.50")
+        assert 'db;dur=4.00;desc="2 queries"' in header
+        assert 'cache;desc="1 hits, 0 misses"' in header
+
+
+@pytest.mark.django_db
+class TestInstrumentationMiddleware:
+
+    def test_request_is_measured(self, monkeypatch):
+        monkeypatch.setattr(settings, "INSTRUMENTATION_SERVER_TIMING", True)
+        route_histograms.reset()
+        response = Client().get("/api/main/settings/", headers={"Accept-Language": "en"})
+        assert response.status_code == 200
+        assert "db;dur=" in response["Server-Timing"]
+        assert "ser;dur=" in response["Server-Timing"]
+        assert route_histograms.snapshot()["api/main/settings/"]["queries_per_request"] >= 1
+
+    def test_slow_request_is_profiled(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "INSTRUMENTATION_PROFILE_RATE", 1)
+        monkeypatch.setattr(settings, "INSTRUMENTATION_PROFILE_THRESHOLD", 0)
+        monkeypatch.setattr(settings, "INSTRUMENTATION_PROFILE_DIR", tmp_path)
+        Client().get("/api/main/settings/", headers={"Accept-Language": "en"})
+        assert [path.suffix for path in tmp_path.iterdir()] == [".prof"]
+
+    def test_histograms_are_admin_only(self):
+        client = Client()
+        assert client.get("/admin/instrumentation/").status_code == 302
+        client.force_login(User.objects.filter(is_superuser=True).first())
+        response = client.get("/admin/instrumentation/")
+        assert response.status_code == 200
+        assert "routes" in response.json()
@@ -1,11 +1,20 @@
+import uuid
+from smtplib import SMTPException
+
 import pytest
-from ninja_extra.testing import TestClient
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
 from jsonschema import validate
 from src.main.api import MainController
 import jsonschema
 from src.main.schemas import NewsSchema, NewsSectionSchema, SettingsOutSchema, ReviewsSectionSchema, WhyChooseUsSchema, \
     InstaSchema
-from src.main.utils import make_request
+from src.main.models import OutboxTask
+from src.main.tasks import get_share_news_progress, relay_outbox, send_news_chunk, share_news
+from src.main.utils import TestClient, make_request
+from src.users.models import Subscriber, User
+from config import settings
+from config.celery import app
 
 client = TestClient(MainController)
 headers = {
@@ -100,3 +109,72 @@ class TestMainController:
                                           headers=headers)
         assert is_valid is schema_status
         assert response.status_code == expected_status
+
+
+@pytest.mark.django_db
+class TestShareNews:
+    def test_share_news_by_chunks(self, monkeypatch):
+        monkeypatch.setattr(app.conf, "task_always_eager", True)
+        monkeypatch.setattr(settings, "SHARE_NEWS_CHUNK_SIZE", 2)
+        emails = [f"subscriber{i}@example.com" for i in range(5)]
+        Subscriber.objects.bulk_create([Subscriber(email=email) for email in emails])
+        User.objects.create_user(email=emails[0], password="sword123", notify_me=True)
+        mail.outbox = []
+
+        result = share_news(news_title="Title", news_descr="Description")
+
+        recipients = [message.to[0] for message in mail.outbox]
+        assert len(recipients) == len(set(recipients))
+        assert set(emails) <= set(recipients)
+        assert result["chunks"] == (len(recipients) + 1) // 2
+        progress = get_share_news_progress(result["dispatch_id"])
+        assert progress == {"chunks": result["chunks"],
+                            "chunks_done": result["chunks"],
+                            "sent": len(recipients)}
+
+    def test_retry_only_unsent(self, monkeypatch):
+        original = EmailBackend.send_messages
+
+        def send_messages(backend, messages):
+            if messages[0].to[0] == "second@example.com":
+                raise SMTPException("connection lost")
+            return original(backend, messages)
+
+        retried = {}
+
+        def retry(exc, kwargs):
+            retried.update(kwargs)
+            return exc
+
+        monkeypatch.setattr(EmailBackend, "send_messages", send_messages)
+        monkeypatch.setattr(send_news_chunk, "retry", retry)
+        mail.outbox = []
+        emails = ["first@example.com", "second@example.com", "third@example.com"]
+        dispatch_id = uuid.uuid4().hex
+
+        with pytest.raises(SMTPException):
+            send_news_chunk.run(dispatch_id=dispatch_id, news_title="Title",
+                                news_descr="Description", emails=emails)
+
+        assert [message.to[0] for message in mail.outbox] == ["first@example.com"]
+        assert retried["emails"] == ["second@example.com", "third@example.com"]
+        assert get_share_news_progress(dispatch_id) == {"chunks": 0, "chunks_done": 0, "sent": 1}
+
+
+@pytest.mark.django_db
+class TestOutbox:
+    def test_relay_outbox(self, monkeypatch):
+        published = []
+        monkeypatch.setattr(app, "send_task",
+                            lambda name, kwargs: published.append((name, kwargs)))
+        monkeypatch.setattr(settings, "OUTBOX_RELAY_BATCH_SIZE", 2)
+        OutboxTask.objects.all().delete()
+        for i in range(3):
+            OutboxTask.objects.enqueue(share_news, news_title=f"Title {i}", news_descr="...")
+
+        result = relay_outbox()
+
+        assert result["published"] == 3
+        assert [kwargs["news_title"] for name, kwargs in published] == ["Title 0", "Title 1", "Title 2"]
+        assert all(name == share_news.name for name, kwargs in published)
+        assert OutboxTask.objects.exists() is False
@@ -0,0 +1,60 @@
+import pytest
+from django.test import Client
+
+from config import settings
+
+from src.main.metrics import LocalStorage, MetricsRegistry, registry, sample_key
+
+
+@pytest.fixture
+def local_registry(monkeypatch):
+    monkeypatch.setattr(registry, "storage", LocalStorage())
+    registry.clear()
+    return registry
+
+
+class TestMetricsRegistry:
+
+    def test_sample_key(self):
+        assert sample_key("checkouts_total", {}) == "checkouts_total"
+        assert (sample_key("http_requests_total", {"route": 'a"b', "method": "GET"})
+                == 'http_requests_total{method="GET",route="a\\"b"}')
+
+    def test_render(self):
+        metrics = MetricsRegistry(storage=LocalStorage())
+        metrics.inc("checkouts_total", {"result": "user"})
+        metrics.inc("checkouts_total", {"result": "user"})
+        metrics.observe("celery_task_duration_seconds", 0.3, {"task": "send_news_chunk"})
+        metrics.inc("cache_hits_total", value=3)
+        metrics.inc("cache_misses_total")
+        text = metrics.render()
+        assert "# TYPE checkouts_total counter" in text
+        assert 'checkouts_total{result="user"} 2' in text
+        assert 'celery_task_duration_seconds_bucket{le="0.25",task="send_news_chunk"}' not in text
+        assert 'celery_task_duration_seconds_bucket{le="0.5",task="send_news_chunk"} 1' in text
+        assert 'celery_task_duration_seconds_bucket{le="+Inf",task="send_news_chunk"} 1' in text
+        assert 'celery_task_duration_seconds_count{task="send_news_chunk"} 1' in text
+        assert "cache_hit_ratio 0.75" in text
+
+
+@pytest.mark.django_db
+class TestMetricsView:
+
+    def test_request_metrics(self, local_registry):
+        client = Client()
+        client.get("/api/main/settings/", headers={"Accept-Language": "en"})
+        response = client.get("/internal/metrics")
+        assert response.status_code == 200
+        text = response.content.decode()
+        assert 'http_requests_total{method="GET",route="api/main/settings/",status="200"} 1' in text
+        assert 'http_request_duration_seconds_count{method="GET",route="api/main/settings/"} 1' in text
+
+    def test_external_address(self, local_registry):
+        response = Client(REMOTE_ADDR="8.8.8.8").get("/internal/metrics")
+        assert response.status_code == 404
+
+    def test_token(self, local_registry, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+        assert Client().get("/internal/metrics").status_code == 404
+        assert Client().get("/internal/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 404
+        assert Client().get("/internal/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
@@ -0,0 +1,211 @@
+import json
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from loguru import logger
+from ninja_jwt.tokens import AccessToken
+
+from config.urls import main_api
+from src.games.models import CalendarBlock, CalendarBlockItem, CatalogTabs, WorthLookItem
+from src.main.models import News, OrderItem, PromoCode, Review
+from src.orders.models import Attribute, Cart, CartItem, Order
+from src.orders.services.order_service import OrderService
+from src.products.models import Product, ProductTabs, SubFilter, Tag
+from src.users.models import Character, User
+
+# rows added to every listed collection before first and second measuring
+SMALL_DATASET = 2
+LARGE_DATASET = 10
+SEARCH_LINE = "Query budget"
+QUERY_PARAMS = {
+    "page": 1,
+    # whole collections are returned, so seeded rows are always serialized
+    "page_size": 10_000,
+    "limit": 10,
+    "search_line": SEARCH_LINE,
+}
+
+
+def clone(instance, **values):
+    """
+    Save copy of model instance with new primary key
+    """
+    instance = type(instance)._base_manager.get(pk=instance.pk)
+    instance.pk = None
+    instance.id = None
+    instance._state.adding = True
+    for field, value in values.items():
+        setattr(instance, field, value)
+    instance.save()
+    return instance
+
+
+def clone_product(product: Product, **values) -> Product:
+    copy = clone(product, **values)
+    for item in product.filters.all():
+        copy_filter = clone(item, product=copy)
+        for subfilter in item.subfilters.all():
+            clone(subfilter, filter=copy_filter)
+    return copy
+
+
+def get_refs(user: User) -> dict:
+    """
+    Get instances which ids are used as path parameters
+    """
+    product = (Product.objects
+               .filter(catalog_page__game__isnull=False, filters__subfilters__isnull=False)
+               .select_related("catalog_page")
+               .first())
+    assert product is not None, "Database has no products with filters"
+    page = product.catalog_page
+    order = Order.objects.create(user=user, number=OrderService.create_number(),
+                                 status="COMPLETED", total_price=product.price)
+    block = (CalendarBlock.objects.filter(calendar_id=page.calendar_id).first()
+             or CalendarBlock.objects.first())
+    return {
+        "user": user,
+        "product": product,
+        "page": page,
+        "order": order,
+        "block": block,
+        "worth_look_item": WorthLookItem.objects.filter(carousel_id=page.worth_look_id).first(),
+        "product_tab": ProductTabs.objects.first(),
+        "catalog_tab": CatalogTabs.objects.first(),
+        "promo_code": PromoCode.objects.create(code="QUERY_BUDGET",
+                                               from_date=date.today() - timedelta(days=1),
+                                               until_date=date.today() + timedelta(days=1),
+                                               discount=10),
+    }
+
+
+def seed(refs: dict, count: int) -> None:
+    """
+    Add count rows to every collection returned by GET routes
+    """
+    user, product, order = refs["user"], refs["product"], refs["order"]
+    values = {"title_en": SEARCH_LINE, "bought_count": product.bought_count + 1_000_000}
+    if Tag.objects.filter(id=1).exists():
+        values["tag_id"] = 1
+    cart_id = Cart.objects.get_or_create_id(user_id=user.id)
+    for i in range(count):
+        copy = clone_product(product, **values)
+        item = CartItem.objects.create(cart_id=cart_id, product=copy, quantity=1)
+        Attribute.objects.create(cart_item=item,
+                                 sub_filter=SubFilter.objects.filter(filter__product=copy).first())
+        OrderItem.objects.create(order=order, product=copy, quantity=1, cost=copy.price)
+        clone(order, number=OrderService.create_number())
+        Character.objects.create(user=user, name=f"{SEARCH_LINE} {i}")
+        for instance in (Review.objects.first(), News.objects.first(), refs["worth_look_item"],
+                         CalendarBlockItem.objects.filter(block=refs["block"]).first()):
+            if instance is not None:
+                clone(instance)
+
+
+def get_path_resolvers(path: str, refs: dict) -> dict:
+    tab = refs["catalog_tab"] if path.startswith("/api/catalog-page/") else refs["product_tab"]
+    return {
+        "product_id": lambda: refs["product"].id,
+        "game_id": lambda: refs["page"].game_id,
+        "page_id": lambda: refs["page"].id,
+        "block_id": lambda: refs["block"].id,
+        "number": lambda: refs["order"].number,
+        "promo_code": lambda: refs["promo_code"].code,
+        "tab_id": lambda: tab.id,
+    }
+
+
+def get_routes(refs: dict) -> list:
+    """
+    Get urls of all GET routes registered on main_api
+
+    :return: list of tuples (route path, url, query params)
+    """
+    routes = []
+    for path, methods in main_api.get_openapi_schema()["paths"].items():
+        if "get" not in methods:
+            continue
+        resolvers = get_path_resolvers(path, refs)
+        path_params = {}
+        query = {"game_id": refs["page"].game_id}
+        for param in methods["get"].get("parameters", []):
+            name = param["name"]
+            if param["in"] == "path":
+                assert name in resolvers, f"Unknown path parameter {name} of {path}"
+                path_params[name] = resolvers[name]()
+            elif param["in"] == "query" and name in QUERY_PARAMS:
+                query[name] = QUERY_PARAMS[name]
+            elif param["in"] == "query" and name not in query:
+                assert not param.get("required"), f"Unknown query parameter {name} of {path}"
+        routes.append((path, path.format(**path_params), query))
+    return routes
+
+
+def measure(client: Client, url: str, query: dict) -> dict:
+    """
+    Request url once for warming caches and once with capturing queries
+    """
+    client.get(url, query)
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        response = client.get(url, query)
+        total_time = time.perf_counter() - started
+    db_time = sum(float(item["time"]) for item in context.captured_queries)
+    return {
+        "status": response.status_code,
+        "queries": len(context.captured_queries),
+        "db_time": round(db_time * 1000, 2),
+        "python_time": round((total_time - db_time) * 1000, 2),
+    }
+
+
+def write_report(report: list) -> None:
+    for row in report:
+        logger.info("{path}: {queries} queries, db {db_time} ms, python {python_time} ms".format(**row))
+    path = os.environ.get("QUERY_BUDGET_REPORT")
+    if path:
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    def test_query_count_is_constant(self):
+        """
+        Count of queries of every GET route doesn't depend on size of returned collections.
+
+        POST, PUT and DELETE routes are excluded: they change
+        rows which next measuring depends on (cart, orders, promo
+        codes), and they work with single objects from payload,
+        so they have no collections which could grow with data.
+        """
+        user = User.objects.get(email="user@example.com")
+        client = Client(headers={"Accept-Language": "en",
+                                 "Authorization": f"Bearer {AccessToken.for_user(user)}"})
+        refs = get_refs(user)
+        routes = get_routes(refs)
+        assert routes
+
+        seed(refs, SMALL_DATASET)
+        small = {path: measure(client, url, query) for path, url, query in routes}
+        seed(refs, LARGE_DATASET - SMALL_DATASET)
+        large = {path: measure(client, url, query) for path, url, query in routes}
+
+        report = [{"path": path,
+                   "status": large[path]["status"],
+                   "queries": large[path]["queries"],
+                   "small_queries": small[path]["queries"],
+                   "db_time": large[path]["db_time"],
+                   "python_time": large[path]["python_time"]}
+                  for path, url, query in routes]
+        write_report(report)
+
+        assert [row["path"] for row in report if row["status"] >= 500] == []
+        assert [(row["path"], row["small_queries"], row["queries"])
+                for row in report if row["small_queries"] != row["queries"]] == []
@@ -0,0 +1,98 @@
+import pytest
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from config import settings
+from src.games.models import Game
+from src.main.middleware import ReplicaRoutingMiddleware
+from src.main.routers import STICKY_COOKIE, STICKY_KEY, ReplicaRouter, RoutingState, is_replica_path
+from src.orders.models import Order
+
+router = ReplicaRouter()
+
+
+def test_is_replica_path():
+    assert is_replica_path("GET", "/api/products/hot-offers/") is True
+    assert is_replica_path("GET", "/api/orders/100/detail/") is True
+    assert is_replica_path("POST", "/api/products/1/to-cart/") is False
+    assert is_replica_path("GET", "/api/orders/my-cart/") is False
+
+
+def test_outside_of_request():
+    assert router.db_for_read(Game) == "default"
+    assert router.db_for_write(Game) == "default"
+    assert router.allow_migrate(settings.REPLICA_DATABASE, "games") is False
+
+
+@pytest.mark.django_db
+class TestReplicaRouter:
+
+    @pytest.fixture(autouse=True)
+    def outside_of_transaction(self, monkeypatch):
+        # every test runs in transaction of django_db, it is hidden from router
+        monkeypatch.setattr(connections[DEFAULT_DB_ALIAS], "in_atomic_block", False)
+
+    def test_read_your_writes(self, monkeypatch):
+        token = RoutingState.open(replica=True)
+        try:
+            assert router.db_for_read(Game) == settings.REPLICA_DATABASE
+            monkeypatch.setattr(connections[DEFAULT_DB_ALIAS], "in_atomic_block", True)
+            assert router.db_for_read(Game) == "default"
+            monkeypatch.setattr(connections[DEFAULT_DB_ALIAS], "in_atomic_block", False)
+            assert router.db_for_write(Order) == "default"
+            assert router.db_for_read(Game) == "default"
+            assert RoutingState.current().wrote is True
+        finally:
+            RoutingState.close(token)
+
+    def test_pinned_user(self):
+        cache.delete(STICKY_KEY.format(-1))
+        token = RoutingState.open(replica=True)
+        try:
+            RoutingState.set_user(-1)
+            assert router.db_for_read(Game) == settings.REPLICA_DATABASE
+            RoutingState.pin_user(-1)
+            RoutingState.set_user(-1)
+            assert router.db_for_read(Game) == "default"
+        finally:
+            RoutingState.close(token)
+            cache.delete(STICKY_KEY.format(-1))
+
+
+class TestReplicaRoutingMiddleware:
+
+    @staticmethod
+    def get_response(write: bool) -> ReplicaRoutingMiddleware:
+        def view(request):
+            response = HttpResponse(router.db_for_read(Game))
+            if write:
+                router.db_for_write(Order)
+            return response
+
+        return ReplicaRoutingMiddleware(view)
+
+    def test_requests(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_REPLICA", True)
+        factory = RequestFactory()
+
+        response = self.get_response(False)(factory.get("/api/games/"))
+        assert response.content.decode() == settings.REPLICA_DATABASE
+        assert STICKY_COOKIE not in response.cookies
+
+        response = self.get_response(False)(factory.get("/api/orders/my-cart/"))
+        assert response.content.decode() == "default"
+
+        response = self.get_response(True)(factory.post("/api/products/1/to-cart/"))
+        assert response.cookies[STICKY_COOKIE]["max-age"] == settings.DB_REPLICA_STICKY_SECONDS
+
+        request = factory.get("/api/games/")
+        request.COOKIES[STICKY_COOKIE] = "1"
+        assert self.get_response(False)(request).content.decode() == "default"
+        assert RoutingState.current() is None
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_REPLICA", False)
+        response = self.get_response(False)(RequestFactory().get("/api/games/"))
+        assert response.content.decode() == "default"
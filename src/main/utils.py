@@ -1,15 +1,18 @@
 # -*- coding: utf-8 -*-
+import inspect
 import json
 import random
 from enum import Enum
 
 import jsonschema
 import pytest
+from asgiref.sync import async_to_sync
 from jsonschema import validate
 from loguru import logger
-from ninja.testing.client import NinjaResponse, TestClient
+from ninja.testing.client import NinjaResponse
 from ninja_extra import status
 from ninja_extra.exceptions import APIException
+from ninja_extra.testing import TestClient as ControllerTestClient
 
 from config import settings
 
@@ -24,6 +27,22 @@ class CustomAPIException(APIException):
     message = "Not Found"
 
 
+async def await_result(awaitable):
+    return await awaitable
+
+
+class TestClient(ControllerTestClient):
+    """
+    Test client of controller calling both sync and async endpoints.
+    """
+
+    def _call(self, func, request, kwargs) -> NinjaResponse:
+        response = func(request, **kwargs)
+        if inspect.isawaitable(response):
+            response = async_to_sync(await_result)(response)
+        return NinjaResponse(response)
+
+
 @pytest.mark.django_db
 def make_request(
     request_str: str,
@@ -69,3 +88,20 @@ def badge_callback(request):
 
 def permission_callback(request):
     return True
+
+
+def save_changed(instance, values: dict) -> list:
+    """
+    Set new values of model instance and save only changed fields.
+
+    :param instance: model instance
+    :param values: dict field name -> new value
+    :return: names of changed fields (nothing is saved if it's empty)
+    """
+    changed = [key for key, value in values.items()
+               if getattr(instance, key) != value]
+    for key in changed:
+        setattr(instance, key, values[key])
+    if changed:
+        instance.save(update_fields=changed)
+    return changed
@@ -10,17 +10,16 @@ from ninja_extra import http_delete, http_get, http_post
 from ninja_extra.controllers.base import ControllerBase, api_controller
 from ninja_extra.throttling.decorator import throttle
 from ninja_extra.throttling.model import BaseThrottle, DynamicRateThrottle, UserRateThrottle
-from ninja_jwt.authentication import JWTAuth
 
 from src.main.models import PromoCode
 from src.main.schemas import OrderOutSchema, PromoCodeSchema
 from src.main.utils import LangEnum
-from src.orders.models import Cart
+from src.orders.models import Cart, CartItem
 from src.orders.schemas import CartOutSchema
 from src.orders.services.order_service import OrderService
 from src.products.utils import paginate
 from src.users.schemas import CabinetOrdersSection, MessageOutSchema, OrdersItemSchema, OrdersDetailOutSchema
-from src.users.utils import OptionalJWTAuth
+from src.users.utils import CachedJWTAuth, OptionalJWTAuth
 
 
 @api_controller("/orders/", tags=["Orders"], permissions=[])
@@ -96,11 +95,11 @@ class OrderController(ControllerBase):
           - **401**: ERROR: Unauthorized.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        cart = self.order_service.get_my_cart(
+        cart = self.order_service.get_cart_with_items(
             request=request,
         )
         bonuses, price, count = self.order_service.calc_total(cart)
-        result = paginate(items=cart.items.all(),
+        result = paginate(items=cart.items.all() if cart else CartItem.objects.none(),
                           page_size=page_size, page=page)
         result['total_bonuses'] = bonuses
         result['total_price'] = price
@@ -261,7 +260,7 @@ class OrderController(ControllerBase):
     @http_get(
         "/check-promo-code/{promo_code}/",
         response=PromoCodeSchema,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -355,7 +354,7 @@ class OrderController(ControllerBase):
     @http_post(
         "/{number}/repeat-order/",
         response=MessageOutSchema,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -431,7 +430,7 @@ class OrderController(ControllerBase):
     @http_get(
         "/my-orders/",
         response=CabinetOrdersSection,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -487,7 +486,7 @@ class OrderController(ControllerBase):
           - **500**: Internal server error if an unexpected error occurs.
         """
         result = self.order_service.get_my_orders(
-            user_id=request.user.id,
+            user=request.user,
             page=page,
             page_size=page_size,
         )
@@ -496,7 +495,7 @@ class OrderController(ControllerBase):
     @http_get(
         "/{number}/detail/",
         response=OrdersDetailOutSchema,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -553,6 +552,6 @@ class OrderController(ControllerBase):
           - **500**: Internal server error if an unexpected error occurs.
         """
         result = (self.order_service
-                  .get_order_detail(user_id=request.user.id,
+                  .get_order_detail(user=request.user,
                                     number=number))
         return paginate(items=result, page_size=page_size, page=page)
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from src.orders.services.order_service import OrderService
+
+
+class Command(BaseCommand):
+    help = "Save snapshots of orders created before snapshots existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="count of orders saved in one transaction")
+
+    def handle(self, *args, **options):
+        updated = OrderService().backfill_snapshots(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Snapshots saved: {updated}"))
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from src.orders.services.cleanup_service import CleanupService
+
+
+class Command(BaseCommand):
+    help = "Delete expired sessions and guest's carts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="primary keys processed in one transaction")
+        parser.add_argument("--time-limit", type=int, default=None,
+                            help="seconds after which command is stopped (can be resumed)")
+        parser.add_argument("--reset", action="store_true",
+                            help="start from the beginning instead of resuming")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            CleanupService.reset()
+        service = CleanupService(batch_size=options["batch_size"],
+                                 time_limit=options["time_limit"])
+        result = service.collect()
+        self.stdout.write(f"Deleted sessions: {result['sessions']}")
+        self.stdout.write(f"Deleted carts: {result['carts']} (items: {result['cart_items']})")
+        if result["sessions_finished"] and result["carts_finished"]:
+            self.stdout.write(self.style.SUCCESS("Garbage collected successfully"))
+        else:
+            self.stdout.write(self.style.WARNING("Time limit is over, run command again to continue"))
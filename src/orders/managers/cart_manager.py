@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Module contain classes Managers for models in app orders.
+
+These Managers implement most frequently used methods
+for selecting data in models
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Value, When
+
+from config import settings
+
+
+class CartManager(models.Manager):
+    """
+    A Manager class for resolving carts of users and guests.
+
+    Ids of carts are cached by owner (user id or guest key),
+    so endpoints which need only cart id don't touch
+    sessions and carts tables.
+    """
+
+    @staticmethod
+    def _cache_key(user_id: int = None, guest_key: str = None) -> str:
+        if user_id is not None:
+            return f"cart:user:{user_id}"
+        return f"cart:guest:{guest_key}"
+
+    @staticmethod
+    def _lookup(user_id: int = None, guest_key: str = None) -> dict:
+        if user_id is not None:
+            return {"user_id": user_id}
+        return {"session_key": guest_key}
+
+    def get_id(self, user_id: int = None, guest_key: str = None) -> int | None:
+        """
+        Get id of existing cart.
+
+        :param user_id: id of authenticated user
+        :param guest_key: key of guest from cookie
+        :return: cart id or None if cart isn't created yet
+        """
+        key = self._cache_key(user_id, guest_key)
+        cart_id = cache.get(key)
+        if cart_id is None:
+            cart_id = (self.filter(**self._lookup(user_id, guest_key))
+                       .values_list("id", flat=True)
+                       .first())
+            if cart_id is not None:
+                cache.set(key, cart_id, settings.CART_ID_CACHE_TIMEOUT)
+        return cart_id
+
+    def get_or_create_id(self, user_id: int = None, guest_key: str = None) -> int:
+        """
+        Get id of cart, cart is created if it doesn't exist.
+
+        :param user_id: id of authenticated user
+        :param guest_key: key of guest from cookie
+        :return: cart id
+        """
+        cart_id = self.get_id(user_id, guest_key)
+        if cart_id is None:
+            cart, created = self.get_or_create(**self._lookup(user_id, guest_key))
+            cart_id = cart.id
+            cache.set(self._cache_key(user_id, guest_key), cart_id, settings.CART_ID_CACHE_TIMEOUT)
+        return cart_id
+
+    def expired(self, cutoff):
+        """
+        Get guest's carts which weren't used since cutoff.
+
+        :param cutoff: datetime of last allowed activity
+        :return: Cart queryset
+        """
+        from src.orders.models import CartItem
+
+        recent_items = CartItem.objects.filter(cart_id=OuterRef("id"), date_created__gte=cutoff)
+        return (self.filter(user__isnull=True)
+                .filter(Q(date_created__lt=cutoff) | Q(date_created__isnull=True))
+                .exclude(Exists(recent_items)))
+
+    def forget(self, user_id: int = None, guest_key: str = None) -> None:
+        """
+        Remove cached cart id (after cart is deleted).
+        """
+        cache.delete(self._cache_key(user_id, guest_key))
+
+    def forget_guests(self, guest_keys: list) -> None:
+        """
+        Remove cached ids of deleted guest's carts.
+        """
+        cache.delete_many([self._cache_key(guest_key=guest_key) for guest_key in guest_keys if guest_key])
+
+    @transaction.atomic
+    def merge(self, guest_cart_id: int, user_id: int) -> int:
+        """
+        Move items of guest's cart to user's cart.
+
+        Items with the same product (freqbot) and set of attributes
+        are merged by summing quantities. Whatever size of cart is,
+        merge takes constant count of queries
+        :param guest_cart_id: id of guest's cart
+        :param user_id: id of user who has just logged in
+        :return: id of user's cart
+        """
+        from src.orders.models import Attribute, CartItem
+
+        user_cart_id = self.get_id(user_id=user_id)
+        if user_cart_id is None:
+            # user has no cart yet, guest's cart becomes user's one
+            self.filter(id=guest_cart_id).update(user_id=user_id, session_key=None)
+            cache.set(self._cache_key(user_id=user_id), guest_cart_id, settings.CART_ID_CACHE_TIMEOUT)
+            return guest_cart_id
+
+        items = list(CartItem.objects
+                     .filter(cart_id__in=[guest_cart_id, user_cart_id])
+                     .values_list("id", "cart_id", "product_id", "freqbot_id", "quantity"))
+        attributes = defaultdict(set)
+        for cart_item_id, sub_filter_id in (Attribute.objects
+                                            .filter(cart_item_id__in=[item[0] for item in items])
+                                            .values_list("cart_item_id", "sub_filter_id")):
+            attributes[cart_item_id].add(sub_filter_id)
+
+        user_items = {(product_id, freqbot_id, frozenset(attributes[item_id])): item_id
+                      for item_id, cart_id, product_id, freqbot_id, quantity in items
+                      if cart_id == user_cart_id}
+        added, moved = defaultdict(int), []
+        for item_id, cart_id, product_id, freqbot_id, quantity in items:
+            if cart_id != guest_cart_id:
+                continue
+            user_item_id = user_items.get((product_id, freqbot_id, frozenset(attributes[item_id])))
+            if user_item_id is None:
+                moved.append(item_id)
+            else:
+                added[user_item_id] += quantity
+
+        if added:
+            (CartItem.objects
+             .filter(id__in=added)
+             .update(quantity=F("quantity") + Case(*[When(id=item_id, then=Value(quantity))
+                                                     for item_id, quantity in added.items()],
+                                                   default=Value(0))))
+        if moved:
+            CartItem.objects.filter(id__in=moved).update(cart_id=user_cart_id)
+        # merged items and their attributes are deleted with guest's cart
+        self.filter(id=guest_cart_id).delete()
+        return user_cart_id
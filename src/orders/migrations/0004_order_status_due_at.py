@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_alter_cart_session_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='status_due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'IN PROGRESS')), fields=['status_due_at'], name='orders_due_in_progress_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_status_due_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='snapshot',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-date_created'], name='orders_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='date_created',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+    ]
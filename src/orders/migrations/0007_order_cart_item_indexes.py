@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_cart_date_created'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'date_created'], name='orders_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['cart', 'product'], name='cart_items_cart_product_idx'),
+        ),
+    ]
@@ -11,9 +11,12 @@
 import uuid
 
 # -*- coding: utf-8 -*-
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from src.orders.managers.cart_manager import CartManager
 from src.products.models import FreqBought, Product, SubFilter
 from src.products.utils import make_sale
 from src.users.models import User
@@ -39,12 +42,25 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=ORDER_STATUS_CHOICES, default="CANCELED")
     date_created = models.DateTimeField(auto_now_add=True)
     total_price = models.FloatField()
+    # when order in progress has to be completed or canceled
+    status_due_at = models.DateTimeField(null=True, blank=True)
+    # items of order with prices and images at the moment of checkout
+    snapshot = models.JSONField(null=True, blank=True)
 
     class Meta:
         ordering = ["-date_created"]
         verbose_name = "Orders"
         verbose_name_plural = "Orders"
         db_table = "orders"
+        indexes = [
+            models.Index(fields=["user", "-date_created"], name="orders_user_created_idx"),
+            models.Index(fields=["status", "date_created"], name="orders_status_created_idx"),
+            models.Index(
+                fields=["status_due_at"],
+                name="orders_due_in_progress_idx",
+                condition=models.Q(status="IN PROGRESS"),
+            ),
+        ]
 
 
 class Cart(models.Model):
@@ -54,11 +70,20 @@ class Cart(models.Model):
 
     user = models.OneToOneField(User, null=True, on_delete=models.CASCADE)
     session_key = models.CharField(max_length=500, null=True, unique=True)
+    date_created = models.DateTimeField(auto_now_add=True, null=True)
+
+    objects = CartManager()
 
     class Meta:
         db_table = "carts"
 
 
+@receiver(post_delete, sender=Cart)
+def cart_deleted(sender, instance, **kwargs):
+    # cached id is removed after commit, so it isn't cached again by concurrent request
+    transaction.on_commit(lambda: Cart.objects.forget(instance.user_id, instance.session_key))
+
+
 class CartItem(models.Model):
     """
     Model represents cart's items in the site
@@ -142,6 +167,9 @@ class CartItem(models.Model):
     class Meta:
         ordering = ["-date_created"]
         db_table = "cart_items"
+        indexes = [
+            models.Index(fields=["cart", "product"], name="cart_items_cart_product_idx"),
+        ]
 
 
 class Attribute(models.Model):
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains class for deleting expired guest carts and sessions.
+
+"""
+import time
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from config import settings
+from src.orders.models import Attribute, Cart, CartItem
+
+SESSIONS_CURSOR_KEY = "gc:sessions:cursor"
+CARTS_CURSOR_KEY = "gc:carts:cursor"
+
+
+class CleanupService:
+    """
+    A service class for deleting expired guest carts and sessions.
+
+    Rows are deleted by short transactions, every one covers
+    only batch_size primary keys. Position of last processed
+    batch is stored in cache, so run interrupted by time limit
+    is continued by the next one.
+    """
+
+    def __init__(self, batch_size: int = None, time_limit: int = None):
+        """
+        :param batch_size: count of primary keys processed in one transaction
+        :param time_limit: seconds after which run is stopped
+        """
+        self.batch_size = batch_size or settings.GC_BATCH_SIZE
+        self.deadline = time.monotonic() + (time_limit or settings.GC_TIME_LIMIT)
+
+    def is_time_over(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Start next run from the beginning of tables.
+        """
+        cache.delete_many([SESSIONS_CURSOR_KEY, CARTS_CURSOR_KEY])
+
+    def delete_expired_sessions(self) -> dict:
+        """
+        Delete expired sessions in batches ordered by session key.
+
+        :return: count of deleted sessions and whether table is passed
+        """
+        now = timezone.now()
+        cursor = cache.get(SESSIONS_CURSOR_KEY, "")
+        deleted = 0
+        finished = False
+        while not self.is_time_over():
+            keys = list(Session.objects
+                        .filter(session_key__gt=cursor, expire_date__lt=now)
+                        .order_by("session_key")
+                        .values_list("session_key", flat=True)[:self.batch_size])
+            if keys:
+                with transaction.atomic():
+                    count, rows = (Session.objects
+                                   .filter(session_key__in=keys, expire_date__lt=now)
+                                   .delete())
+                deleted = deleted + count
+                cursor = keys[-1]
+            if len(keys) < self.batch_size:
+                cursor, finished = "", True
+                break
+        cache.set(SESSIONS_CURSOR_KEY, cursor, None)
+        return {"sessions": deleted, "sessions_finished": finished}
+
+    def delete_expired_carts(self) -> dict:
+        """
+        Delete guest's carts which weren't used for CART_GUEST_TTL seconds.
+
+        Table is walked by ranges of ids, items and attributes
+        of carts are deleted in the same transaction
+        :return: count of deleted carts, items and whether table is passed
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.CART_GUEST_TTL)
+        cursor = cache.get(CARTS_CURSOR_KEY, 0)
+        max_id = Cart.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+        carts = items = 0
+        while cursor < max_id and not self.is_time_over():
+            upper = cursor + self.batch_size
+            with transaction.atomic():
+                expired = dict(Cart.objects
+                               .expired(cutoff)
+                               .filter(id__gt=cursor, id__lte=upper)
+                               .select_for_update(skip_locked=True)
+                               .values_list("id", "session_key"))
+                if expired:
+                    Attribute.objects.filter(cart_item__cart_id__in=list(expired)).delete()
+                    count, rows = CartItem.objects.filter(cart_id__in=list(expired)).delete()
+                    items = items + count
+                    count, rows = Cart.objects.filter(id__in=list(expired)).delete()
+                    carts = carts + count
+            Cart.objects.forget_guests(list(expired.values()))
+            cursor = upper
+        finished = cursor >= max_id
+        cache.set(CARTS_CURSOR_KEY, 0 if finished else cursor, None)
+        return {"carts": carts, "cart_items": items, "carts_finished": finished}
+
+    def collect(self) -> dict:
+        """
+        Delete expired sessions and guest's carts.
+
+        :return: counts of deleted rows
+        """
+        result = self.delete_expired_sessions()
+        result.update(self.delete_expired_carts())
+        return result
@@ -3,24 +3,31 @@
     Module contains class for managing orders on site
 """
 import random
+from datetime import timedelta
 from typing import Tuple, Any
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
 # -*- coding: utf-8 -*-
-from django.db.models import QuerySet
-from django.forms import model_to_dict
+from django.db.models import F, QuerySet
 from django.http import HttpRequest
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.translation import get_language
 from django.utils.translation import gettext as _
 from ninja.errors import HttpError
 
+from config import settings
+from config.settings import ABSOLUTE_URL
+
+from src.main.metrics import registry
 from src.main.models import OrderItem, OrderItemAttribute, PromoCode, Setting
 from src.main.schemas import OrderOutSchema
 from src.main.services.main_service import MainService
 from src.orders.models import Cart, CartItem, Order
-from src.orders.tasks import change_order_status
+from src.orders.utils import get_guest_key, new_guest_key
+from src.products.models import FreqBought, Product, SubFilter
 from src.products.utils import make_sale, paginate
 from src.users.schemas import MessageOutSchema
 from loguru import logger
@@ -38,38 +45,59 @@ class OrderService:
     """
 
     @staticmethod
-    def get_my_cart(request: HttpRequest) -> Cart:
+    def get_cart_id(request: HttpRequest, create: bool = False) -> int | None:
         """
-        Gets info for user's cart.
+        Gets id of user's or guest's cart.
 
+        Cart id is taken from cache by user id or guest key,
+        cart is created only on first write (create=True)
         :param request: HttpRequest
-        :return: Cart model instance
+        :param create: create cart if it doesn't exist
+        :return: cart id or None if cart isn't created yet
         """
         if not request.auth.is_anonymous:
-            user = request.auth
-            cart, status = (Cart.objects
-                            .prefetch_related(
-                                "items__product__catalog_page__game",
-                                "items__attributes__sub_filter__filter",
-                                "items__freqbot__products__catalog_page__game",
-                            )
-                            .get_or_create(user=user))
-        else:
-            session_id = request.session.session_key
-            if session_id is None:
-                request.session.create()
-                request.session.save()
-                session_id = request.session.session_key
-            cart, status = (Cart.objects
-                            .prefetch_related(
-                                "items__product__catalog_page__game",
-                                "items__attributes__sub_filter__filter",
-                                "items__freqbot__products__catalog_page__game",
-                            )
-                            .get_or_create(
-                                session_key=session_id
-                            ))
-        return cart
+            if create:
+                return Cart.objects.get_or_create_id(user_id=request.auth.id)
+            return Cart.objects.get_id(user_id=request.auth.id)
+        guest_key = get_guest_key(request)
+        cart_id = Cart.objects.get_id(guest_key=guest_key) if guest_key else None
+        if cart_id is None and create:
+            cart_id = Cart.objects.get_or_create_id(guest_key=new_guest_key(request))
+        return cart_id
+
+    @staticmethod
+    def merge_guest_cart(request: HttpRequest, user: User) -> None:
+        """
+        Move guest's cart to user after log in.
+
+        :param request: HttpRequest of log in
+        :param user: User model instance who has just logged in
+        """
+        guest_key = get_guest_key(request)
+        guest_cart_id = Cart.objects.get_id(guest_key=guest_key) if guest_key else None
+        if guest_cart_id is None:
+            return
+        Cart.objects.merge(guest_cart_id=guest_cart_id, user_id=user.id)
+        Cart.objects.forget(guest_key=guest_key)
+
+    def get_cart_with_items(self, request: HttpRequest) -> Cart | None:
+        """
+        Gets user's or guest's cart with prefetched items.
+
+        :param request: HttpRequest
+        :return: Cart model instance or None if cart isn't created yet
+        """
+        cart_id = self.get_cart_id(request=request)
+        if cart_id is None:
+            return None
+        return (Cart.objects
+                .prefetch_related(
+                    "items__product__catalog_page__game",
+                    "items__attributes__sub_filter__filter",
+                    "items__freqbot__products__catalog_page__game",
+                )
+                .filter(id=cart_id)
+                .first())
 
     def delete_cart_item(self, request: HttpRequest, item_id: int) -> MessageOutSchema:
         """
@@ -79,12 +107,12 @@ class OrderService:
         :param item_id: cart's item id
         :return: Cart model instance
         """
-        cart = self.get_my_cart(request=request)
-        try:
-            item = CartItem.objects.get(cart_id=cart.id, id=item_id)
-        except CartItem.DoesNotExist:
+        cart_id = self.get_cart_id(request=request)
+        deleted = 0
+        if cart_id is not None:
+            deleted, rows = CartItem.objects.filter(cart_id=cart_id, id=item_id).delete()
+        if not deleted:
             raise HttpError(404, _("Not Found: No CartItem matches" " the given query."))
-        item.delete()
         return MessageOutSchema(message=_("Cart items has been deleted successfully"))
 
     @staticmethod
@@ -96,9 +124,11 @@ class OrderService:
         return num
 
     @staticmethod
-    def calc_total(cart: Cart) -> [float, float, int]:
+    def calc_total(cart: Cart | None) -> [float, float, int]:
         total_price = 0
         total_bonuses = 0
+        if cart is None:
+            return total_bonuses, total_price, 0
         items = (cart.items
                  .select_related('product')
                  .prefetch_related('freqbot__products')
@@ -116,33 +146,66 @@ class OrderService:
         return total_bonuses, total_price, cart.items.count()
 
     @staticmethod
+    def get_discounts(user: User, promo_code: PromoCode = None) -> list:
+        """
+        Get list of discounts (in percents) for user's order.
+
+        :param user: User model instance
+        :param promo_code: promo code for order if exists
+        :return: discounts which have to be applied one by one
+        """
+        discounts = []
+        if promo_code:
+            discounts.append(promo_code.discount)
+        if user.subscribe_sale_active:
+            setting = Setting.objects.first()
+            discounts.append(setting.subscribe_sale)
+        return discounts
+
+    @staticmethod
+    def add_bonus_points(user: User, bonuses: int, **values) -> None:
+        """
+        Add bonus points to user with one UPDATE.
+
+        Points are added by db (F expression), so concurrent
+        checkouts don't overwrite each other
+        :param user: User model instance
+        :param bonuses: count of added bonus points
+        :param values: other fields of user which have to be updated
+        """
+        User.objects.filter(id=user.id).update(bonus_points=F("bonus_points") + bonuses, **values)
+        user.bonus_points = user.bonus_points + bonuses
+        for key, value in values.items():
+            setattr(user, key, value)
+
     def finish_order(
+            self,
             user: User,
             order: Order,
             total_price: float,
             bonuses: int,
             promo_code: PromoCode = None,
     ) -> None:
-        user.bonus_points = user.bonus_points + bonuses
-        user.save()
+        """
+        Apply discounts to order, charge bonuses and save order.
+
+        Subscribe sale is used once, so it is switched off
+        in the same UPDATE as bonus points are added
+        """
+        discounts = self.get_discounts(user=user, promo_code=promo_code)
+        values = {"subscribe_sale_active": False} if user.subscribe_sale_active else {}
+        self.add_bonus_points(user, bonuses, **values)
         if promo_code:
-            total_price = make_sale(total_price, promo_code.discount)
-            user.promo_codes.add(promo_code)
-            for item in order.items.all():
-                item: OrderItem
-                item.cost = make_sale(item.cost, promo_code.discount)
-                item.save()
-        if user.subscribe_sale_active:
-            setting = Setting.objects.first()
-            total_price = make_sale(total_price, setting.subscribe_sale)
-            for item in order.items.all():
-                item: OrderItem
-                item.cost = make_sale(item.cost, setting.subscribe_sale)
-                item.save()
+            user.promo_codes.add(promo_code.id)
+        for discount in discounts:
+            total_price = make_sale(total_price, discount)
+            order.items.update(cost=F("cost") - F("cost") * discount / 100)
         order.total_price = total_price
-        order.save()
-        change_order_status.delay(order_id=order.id)
+        order.status_due_at = timezone.now() + timedelta(seconds=settings.ORDER_PROCESSING_TIME)
+        order.snapshot = self.make_snapshot(order)
+        order.save(update_fields=["total_price", "status_due_at", "snapshot"])
 
+    @transaction.atomic
     def create_order(self, request: HttpRequest, code: str | None = None) \
             -> OrderOutSchema:
         """
@@ -151,12 +214,14 @@ class OrderService:
         :param request: HttpRequest
         :param code: promo code for order if exists
         """
-        cart = self.get_my_cart(request=request)
-        if cart.items.count() <= 0:
+        cart = self.get_cart_with_items(request=request)
+        if cart is None or cart.items.count() <= 0:
+            registry.inc("checkouts_total", {"result": "empty_cart"})
             raise HttpError(400, _("Your cart is empty"))
         auth_user = False
 
         if random.choice([True, False, False]):
+            registry.inc("checkouts_total", {"result": "rejected"})
             raise HttpError(400, _(""
                                    "Here is a text that will "
                                    "describe the possible "
@@ -206,74 +271,231 @@ class OrderService:
                 total_bonuses = total_bonuses + cart_item.bonus_points()
                 total_price = total_price + cart_item.price()
 
-            order.total_price = total_price
-            order.total_bonuses = total_bonuses
-            order.save()
             self.finish_order(
                 user=user, order=order, promo_code=promo_code,
                 total_price=total_price, bonuses=total_bonuses
             )
-            # clean user's cart
-            cart.items.all().delete()
-            if user.subscribe_sale_active:
-                user.subscribe_sale_active = False
-                user.save()
         cart.items.all().delete()
+        result = "user" if auth_user else "guest"
+        transaction.on_commit(lambda: registry.inc("checkouts_total", {"result": result}))
         return OrderOutSchema(message=_("Order issued successfully"),
                               auth_user=auth_user)
 
     @staticmethod
-    def get_my_orders(user_id: int, page: int, page_size: int) -> dict:
+    def make_snapshot(order: Order) -> list:
+        """
+        Make snapshot of order's items for order history.
+
+        Snapshot contains prices, attributes and images of ordered
+        products in all languages, so history of orders is
+        shown without joins and recalculation of prices
+        :param order: Order model instance with created items
+        :return: list of items which can be stored in JSONField
+        """
+        items = (order.items
+                 .select_related("product__catalog_page__game", "freqbot")
+                 .prefetch_related("attributes",
+                                   "freqbot__products__catalog_page__game"))
+        snapshot = []
+        for item in items:
+            if item.product is None and item.freqbot is None:
+                # both were deleted, nothing to show
+                continue
+            if item.product:
+                products = [item.product]
+                attributes = [
+                    {
+                        "subfilter_id": attr.subfilter_id,
+                        "title_en": attr.title_en,
+                        "title_uk": attr.title_uk,
+                        "subtitle_en": attr.subtitle_en,
+                        "subtitle_uk": attr.subtitle_uk,
+                    }
+                    for attr in item.attributes.all()
+                ]
+            else:
+                products = item.freqbot.products.all()
+                attributes = []
+            snapshot.append({
+                "cost": item.cost,
+                "quantity": item.quantity,
+                "product_id": item.product_id,
+                "freqbot_id": item.freqbot_id,
+                "attributes": attributes,
+                "products": [
+                    {
+                        "id": product.id,
+                        "title_en": product.title_en,
+                        "title_uk": product.title_uk,
+                        "subtitle_en": product.subtitle_en,
+                        "subtitle_uk": product.subtitle_uk,
+                        "card_img": ABSOLUTE_URL + product.card_img.url,
+                        "card_img_alt_en": product.card_img_alt_en,
+                        "card_img_alt_uk": product.card_img_alt_uk,
+                        **OrderService.get_game_logo(product),
+                    }
+                    for product in products
+                ],
+            })
+        return snapshot
+
+    @staticmethod
+    def get_game_logo(product) -> dict:
+        """
+        Get logo of product's game for snapshot.
+
+        Catalog page and game can be deleted,
+        logo and its alt are None then
+        :param product: Product model instance
+        :return: dict with game_logo and its alt in all languages
+        """
+        game = product.catalog_page.game if product.catalog_page else None
+        if game is None:
+            return {"game_logo": None, "game_logo_alt_en": None, "game_logo_alt_uk": None}
+        return {
+            "game_logo": ABSOLUTE_URL + game.logo_product.url,
+            "game_logo_alt_en": game.logo_product_alt_en,
+            "game_logo_alt_uk": game.logo_product_alt_uk,
+        }
+
+    def get_snapshot(self, order: Order) -> list:
+        """
+        Get snapshot of order's items.
+
+        Orders created before snapshots existed get their
+        snapshot made on the fly, it isn't saved, because reads
+        can go to replica (snapshots are saved by backfill_snapshots)
+        :param order: Order model instance
+        :return: snapshot of order's items
+        """
+        if order.snapshot is None:
+            return self.make_snapshot(order)
+        return order.snapshot
+
+    def backfill_snapshots(self, batch_size: int = 500) -> int:
+        """
+        Save snapshots of orders created before snapshots existed.
+
+        :param batch_size: count of orders saved in one transaction
+        :return: count of updated orders
+        """
+        updated = 0
+        while True:
+            with transaction.atomic():
+                orders = list(Order.objects
+                              .select_for_update(skip_locked=True)
+                              .filter(snapshot__isnull=True)
+                              .order_by("date_created")[:batch_size])
+                for order in orders:
+                    order.snapshot = self.make_snapshot(order)
+                Order.objects.bulk_update(orders, ["snapshot"])
+            updated = updated + len(orders)
+            if len(orders) < batch_size:
+                return updated
+
+    @staticmethod
+    def localize_snapshot(snapshot: list) -> list:
         """
-        Get user's orders by user's id.
+        Translate snapshot of order's items to current language.
+
+        :param snapshot: snapshot of order's items
+        :return: items in format of OrderSnapshotItemSchema
+        """
+        lang = get_language() if get_language() in ("en", "uk") else "en"
+        items = []
+        for item in snapshot:
+            attributes = [{"title": attr[f"title_{lang}"],
+                           "subtitle": attr[f"subtitle_{lang}"]}
+                          for attr in item["attributes"]]
+            items.append({
+                "cost": item["cost"],
+                "quantity": item["quantity"],
+                "items": [
+                    {
+                        "id": product["id"],
+                        "title": product[f"title_{lang}"],
+                        "subtitle": product[f"subtitle_{lang}"],
+                        "card_img": product["card_img"],
+                        "card_img_alt": product[f"card_img_alt_{lang}"],
+                        "game_logo": product["game_logo"],
+                        "game_logo_alt": product[f"game_logo_alt_{lang}"],
+                        "attributes": attributes,
+                    }
+                    for product in item["products"]
+                ],
+            })
+        return items
+
+    def set_repeat_available(self, orders: list) -> None:
+        """
+        Check for every order if it can be repeated.
+
+        Products, freqbots and sub filters of all orders are checked
+        with constant count of queries
+        :param orders: list of Order model instances
+        """
+        product_ids, freqbot_ids, subfilter_ids = set(), set(), set()
+        for order in orders:
+            for item in self.get_snapshot(order):
+                product_ids.add(item["product_id"])
+                freqbot_ids.add(item["freqbot_id"])
+                subfilter_ids.update(attr["subfilter_id"] for attr in item["attributes"])
+        products = set(Product.objects
+                       .filter(id__in=product_ids - {None})
+                       .values_list("id", flat=True))
+        freqbots = set(FreqBought.objects
+                       .filter(id__in=freqbot_ids - {None})
+                       .values_list("id", flat=True))
+        subfilters = dict(SubFilter.objects
+                          .filter(id__in=subfilter_ids - {None})
+                          .values_list("id", "filter__product_id"))
+        for order in orders:
+            order.repeat_available = all(
+                (item["product_id"] in products or item["freqbot_id"] in freqbots)
+                and all(subfilters.get(attr["subfilter_id"]) == item["product_id"]
+                        for attr in item["attributes"])
+                for item in order.snapshot
+            )
+
+    def get_my_orders(self, user: User, page: int, page_size: int) -> dict:
+        """
+        Get authenticated user's orders.
+
+        Orders are read from one table, items are
+        taken from snapshots of orders
         :param page: the page number we want to get
         :param page_size: length of queryset per page
-        :param user_id: user id
+        :param user: authenticated User model instance
         :return: paginated orders
         """
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise HttpError(404,
-                            _("Not Found: No User matches "
-                              "the given query."))
-        # Order.objects.prefetch_related('items__product__filters')
-        orders = (Order.objects
-                  .prefetch_related('items__attributes__subfilter__filter')
-                  .prefetch_related('items__product__filters')
-                  .prefetch_related('items__freqbot')
-                  .filter(user=user))
-        # orders = user.order_set.all()
-        return paginate(items=orders, page=page, page_size=page_size)
+        orders = Order.objects.filter(user=user)
+        result = paginate(items=orders, page=page, page_size=page_size)
+        result["items"] = list(result["items"])
+        self.set_repeat_available(result["items"])
+        return result
 
-    @staticmethod
-    def get_order_detail(user_id: int, number: int) -> QuerySet:
+    def get_order_detail(self, user: User, number: int) -> list:
         """
         Get user's order by order's number.
         :param number: number of order
-        :param user_id: user id
-        :return: paginated orders
+        :param user: authenticated User model instance
+        :return: order's items from snapshot
         """
         try:
-            user = User.objects.get(id=user_id)
-            order = (Order.objects
-                     .prefetch_related("items__attributes")
-                     .prefetch_related("items__freqbot")
-                     .prefetch_related("items__product__catalog_page__game")
-                     .get(user=user, number=number))
-
-        except User.DoesNotExist:
-            raise HttpError(404,
-                            _("Not Found: No User matches "
-                              "the given query."))
+            order = Order.objects.get(user=user, number=number)
         except Order.DoesNotExist:
             raise HttpError(404, _("Not Found: No Order matches "
                                    "the given query."))
-        return order.items.all()
+        return self.localize_snapshot(self.get_snapshot(order))
 
+    @transaction.atomic
     def repeat_order(self, user: User, number: str) -> MessageOutSchema:
         """
         Repeat user's order by order id.
+
+        New order with its items and attributes is created
+        by bulk inserts, prices are calculated once
+        from prefetched data with applied discounts
         :param user: User model instance
         :param number: order's number
         :return: message that repeated or not
@@ -281,14 +503,15 @@ class OrderService:
 
         try:
             order = (Order.objects
-                     .prefetch_related("items__attributes__subfilter__filter__product")
-                     .prefetch_related("items__product",
-                                       "items__freqbot")
+                     .prefetch_related("items__attributes__subfilter__filter",
+                                       "items__product",
+                                       "items__freqbot__products")
                      .get(number=number))
         except Order.DoesNotExist:
             raise HttpError(404, _("Not Found: No Order matches" " the given query."))
 
-        for item in order.items.all():
+        items = order.items.all()
+        for item in items:
             condition1 = item.freqbot and item.freqbot.is_deleted
             condition2 = item.product and item.product.is_deleted
             if condition1 or condition2:
@@ -296,54 +519,47 @@ class OrderService:
                                        "some products does "
                                        "not exists nowadays"))
             for attr in item.attributes.all():
-                if attr.subfilter is None or attr.subfilter.filter.product.id != item.product.id:
+                if attr.subfilter is None or attr.subfilter.filter.product_id != item.product_id:
                     raise HttpError(404, _("Cannot repeat order, "
                                            "some products does "
                                            "not exists nowadays"))
 
-        kwargs = model_to_dict(
-            order,
-            exclude=[
-                "id",
-                "user",
-                "status",
-                "number",
-            ],
-        )
-
-        new_order = Order.objects.create(**kwargs,
-                                         user=user,
-                                         status="IN PROGRESS",
-                                         number=self.create_number())
+        discounts = self.get_discounts(user=user)
         total_bonuses = 0
         total_price = 0
-        for item in order.items.all():
-            kwargs = model_to_dict(item, exclude=["id",
-                                                  "order",
-                                                  "freqbot",
-                                                  "date_created",
-                                                  "product"])
-            new_order_item = OrderItem.objects.create(
-                **kwargs,
-                order=new_order,
-                product=item.product,
-                freqbot=item.freqbot,
-            )
-            for attr in item.attributes.all():
-                kwargs = model_to_dict(attr, exclude=["id",
-                                                      "subfilter",
-                                                      "order_item"])
-                OrderItemAttribute.objects.create(
-                    **kwargs,
-                    subfilter=attr.subfilter,
-                    order_item=new_order_item,
-                )
-            new_order_item.cost = new_order_item.price()
-            new_order_item.save()
-            total_price = total_price + new_order_item.price()
-            total_bonuses = total_bonuses + new_order_item.bonus_points()
-        self.finish_order(user=user, order=new_order, promo_code=None,
-                          total_price=total_price, bonuses=total_bonuses)
+        new_order = Order(user=user,
+                          status="IN PROGRESS",
+                          number=self.create_number(),
+                          total_price=0)
+        new_items = []
+        for item in items:
+            cost = item.price()
+            for discount in discounts:
+                cost = make_sale(cost, discount)
+            new_items.append(OrderItem(order=new_order,
+                                       product_id=item.product_id,
+                                       freqbot_id=item.freqbot_id,
+                                       quantity=item.quantity,
+                                       cost=cost))
+            total_price = total_price + cost
+            total_bonuses = total_bonuses + item.bonus_points()
+        new_order.total_price = total_price
+        new_order.status_due_at = timezone.now() + timedelta(seconds=settings.ORDER_PROCESSING_TIME)
+        new_order.save()
+        OrderItem.objects.bulk_create(new_items)
+        OrderItemAttribute.objects.bulk_create([
+            OrderItemAttribute(title_en=attr.title_en,
+                               title_uk=attr.title_uk,
+                               subtitle_en=attr.subtitle_en,
+                               subtitle_uk=attr.subtitle_uk,
+                               subfilter_id=attr.subfilter_id,
+                               order_item=new_item)
+            for item, new_item in zip(items, new_items)
+            for attr in item.attributes.all()
+        ])
+        new_order.snapshot = self.make_snapshot(new_order)
+        new_order.save(update_fields=["snapshot"])
+        self.add_bonus_points(user, total_bonuses)
         return MessageOutSchema(message=_("Order repeated successfully"))
 
     @staticmethod
@@ -357,9 +573,8 @@ class OrderService:
         :rtype: dict
         """
 
-        try:
-            promo_code = PromoCode.objects.get(code=code)
-        except PromoCode.DoesNotExist:
+        promo_code = PromoCode.objects.get_cached(code=code)
+        if promo_code is None:
             raise HttpError(404, _("Not Found: No PromoCode matches "
                                    "the given query."))
         current_datetime = timezone.now().date()
@@ -367,7 +582,8 @@ class OrderService:
                 current_datetime >=
                 promo_code.from_date):
             raise HttpError(403, _("Promo code has been expired"))
-        if user.promo_codes.filter(code=code).exists():
+        if PromoCode.objects.is_used_by(promo_code_id=promo_code.id,
+                                        user_id=user.id):
             raise HttpError(410, _("Promo code has been already used"))
 
         return promo_code
@@ -4,38 +4,120 @@ In this module described all celery task for implementing
 asynchronous logic in application orders
 """
 import random
-from time import sleep
+from collections import Counter
 
 from celery.app import shared_task
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
 
+from config import settings
+from src.main.models import OrderItem
 from src.orders.models import Order
+from src.products.models import FreqBought, Product
+from src.statistic.services.statistic_service import StatisticService
+from src.statistic.services.trending_service import TrendingService
+
+
+def count_sold_products(order_ids: list) -> Counter:
+    """
+    Count sold items of products in orders.
+
+    Products from frequently bought sets are counted too
+    :param order_ids: ids of orders
+    :return: Counter product id -> quantity
+    """
+    counts = Counter()
+    items = OrderItem.objects.filter(order_id__in=order_ids)
+    for row in (items.filter(product__isnull=False)
+                .values("product_id")
+                .annotate(quantity=Sum("quantity"))):
+        counts[row["product_id"]] += row["quantity"]
+    freqbots = dict(items.filter(freqbot__isnull=False)
+                    .values("freqbot_id")
+                    .annotate(quantity=Sum("quantity"))
+                    .values_list("freqbot_id", "quantity"))
+    for freqbot_id, product_id in (FreqBought.products.through.objects
+                                   .filter(freqbought_id__in=list(freqbots))
+                                   .values_list("freqbought_id", "product_id")):
+        counts[product_id] += freqbots[freqbot_id]
+    return counts
+
+
+def increase_bought_count(counts: Counter) -> None:
+    """
+    Increase bought_count of products from completed orders.
+
+    Quantities are applied to all products with one UPDATE
+    :param counts: Counter product id -> sold quantity
+    """
+    if not counts:
+        return
+    delta = Case(*[When(id=product_id, then=Value(quantity))
+                   for product_id, quantity in counts.items()],
+                 default=Value(0))
+    (Product.objects.get_history()
+     .filter(id__in=counts)
+     .update(bought_count=F("bought_count") + delta))
+
+
+def change_orders_status(order_ids: list) -> dict:
+    """
+    Complete or cancel orders in progress.
+
+    :param order_ids: ids of orders in progress
+    :return: ids of completed and canceled orders
+    """
+    completed, canceled = [], []
+    for order_id in order_ids:
+        if random.choice([True, True, True, False]):
+            completed.append(order_id)
+        else:
+            canceled.append(order_id)
+    in_progress = Order.objects.filter(status="IN PROGRESS")
+    in_progress.filter(id__in=completed).update(status="COMPLETED", status_due_at=None)
+    in_progress.filter(id__in=canceled).update(status="CANCELED", status_due_at=None)
+    counts = count_sold_products(completed)
+    increase_bought_count(counts)
+    if completed:
+        transaction.on_commit(lambda: StatisticService().refresh_orders_sales(completed))
+        transaction.on_commit(lambda: TrendingService().add_sales(counts))
+    return {"completed": completed, "canceled": canceled}
+
+
+@shared_task
+def process_due_orders() -> dict:
+    """
+    Change status of all orders which processing time is over.
+
+    Is launched periodically by celery beat,
+    orders are processed by batches with bulk updates
+    """
+    completed = canceled = 0
+    batch_size = settings.ORDER_STATUS_BATCH_SIZE
+    while True:
+        with transaction.atomic():
+            order_ids = list(Order.objects
+                             .select_for_update(skip_locked=True)
+                             .filter(status="IN PROGRESS",
+                                     status_due_at__lte=timezone.now())
+                             .order_by("status_due_at")
+                             .values_list("id", flat=True)[:batch_size])
+            result = change_orders_status(order_ids)
+        completed = completed + len(result["completed"])
+        canceled = canceled + len(result["canceled"])
+        if len(order_ids) < batch_size:
+            return {"completed": completed, "canceled": canceled}
 
 
 @shared_task
-def change_order_status(order_id: int) -> dict:
-    """
-    Change specific order's status.
-
-    :param order_id: order's id for changing status
-    """
-    order = get_object_or_404(Order, id=order_id)
-    sleep(10)
-    if random.choice([True, True, True, False]):
-        order.status = "COMPLETED"
-        msg = "ORDER COMPLETED"
-        for item in order.items.all():
-            if item.product:
-                bought_count = item.product.bought_count + item.quantity
-                item.product.bought_count = bought_count
-                item.product.save()
-            if item.freqbot:
-                for product in item.freqbot.products.all():
-                    bought_count = product.bought_count + item.quantity
-                    product.bought_count = bought_count
-                    product.save()
-    else:
-        order.status = "CANCELED"
-        msg = "ORDER CANCELED"
-    order.save()
-    return {"message": msg}
+def collect_garbage() -> dict:
+    """
+    Delete expired sessions and guest's carts.
+
+    Is launched periodically by celery beat, every run
+    is limited by GC_TIME_LIMIT and continues previous one
+    """
+    from src.orders.services.cleanup_service import CleanupService
+
+    return CleanupService().collect()
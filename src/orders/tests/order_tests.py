@@ -1,6 +1,8 @@
 import json
 from datetime import timedelta
 
+import random
+
 import pytest
 from ninja_extra.testing import TestClient
 
@@ -10,13 +12,23 @@ from src.main.utils import make_request
 from loguru import logger
 
 from src.orders.api import OrderController
-from src.orders.models import Order
+from src.orders.models import Attribute, Cart, CartItem, Order
 from src.orders.schemas import CartOutSchema
+from src.orders.services.cleanup_service import CleanupService
+from src.orders.services.order_service import OrderService
+from src.orders.utils import CartCookieMiddleware
+from src.orders.tasks import process_due_orders
+from src.main.models import OrderItem
 from src.products.api import ProductController
-from src.products.models import Product
+from src.products.models import Product, SubFilter
 from src.users.models import User
-from src.users.schemas import MessageOutSchema, CabinetOrdersSchema
+from src.users.schemas import MessageOutSchema, CabinetOrdersSchema, OrdersDetailOutSchema
 import httpx
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.http import HttpRequest, HttpResponse
 from django.utils import timezone
 
 client = TestClient(OrderController)
@@ -114,6 +126,22 @@ class TestOrderController:
         assert is_valid is True
         assert response.status_code == 200
 
+    def test_get_order_detail(self, products_to_cart, access_token):
+        self.test_create_order(products_to_cart, access_token)
+        user = User.objects.get(email='user@example.com')
+        order = Order.objects.filter(user=user).first()
+        assert len(order.snapshot) == order.items.count()
+        headers['Authorization'] = access_token
+        rq_str = f'/{order.number}/detail/?page=1&page_size=10'
+        response, is_valid = make_request(request_str=rq_str,
+                                          schema=OrdersDetailOutSchema,
+                                          client=client,
+                                          headers=headers)
+
+        assert is_valid is True
+        assert response.status_code == 200
+        assert len(response.json()['items']) == len(order.snapshot)
+
     def test_repeat_my_order(self, products_to_cart, access_token):
         self.test_create_order(products_to_cart, access_token)
         user = User.objects.get(email='user@example.com')
@@ -181,3 +209,187 @@ class TestOrderController:
 
         assert is_valid is False
         assert response.status_code == 403
+
+    def test_promo_code_cache_invalidated(self, promo_code: PromoCode):
+        cached = PromoCode.objects.get_cached(promo_code.code)
+        assert cached.id == promo_code.id
+        assert cached.discount == promo_code.discount
+        promo_code.discount = 20
+        promo_code.save()
+        assert PromoCode.objects.get_cached(promo_code.code).discount == 20
+        promo_code.delete()
+        assert PromoCode.objects.get_cached(promo_code.code) is None
+
+
+@pytest.mark.django_db
+class TestOrderStatus:
+    def test_process_due_orders(self, monkeypatch):
+        monkeypatch.setattr(random, "choice", lambda seq: True)
+        product = Product.objects.first()
+        bought_count = product.bought_count
+        past = timezone.now() - timedelta(seconds=1)
+        due = [Order.objects.create(status="IN PROGRESS", total_price=0, status_due_at=past)
+               for i in range(3)]
+        not_due = Order.objects.create(status="IN PROGRESS", total_price=0,
+                                       status_due_at=timezone.now() + timedelta(hours=1))
+        for order in due:
+            OrderItem.objects.create(order=order, product=product, quantity=2, cost=0)
+
+        result = process_due_orders()
+
+        assert result["completed"] >= 3
+        assert Order.objects.filter(id__in=[order.id for order in due], status="COMPLETED").count() == 3
+        not_due.refresh_from_db()
+        assert not_due.status == "IN PROGRESS"
+        product.refresh_from_db()
+        assert product.bought_count == bought_count + 6
+
+
+@pytest.mark.django_db
+class TestOrderSnapshot:
+    def test_legacy_order_with_deleted_product(self):
+        user = User.objects.first()
+        order = Order.objects.create(user=user, status="COMPLETED", total_price=0)
+        OrderItem.objects.create(order=order, product=None, freqbot=None, quantity=1, cost=10)
+        product = Product.objects.first()
+        Product.objects.filter(id=product.id).update(catalog_page=None)
+        OrderItem.objects.create(order=order, product=product, quantity=1, cost=20)
+        assert order.snapshot is None
+
+        snapshot = OrderService().get_snapshot(order)
+
+        assert [item["product_id"] for item in snapshot] == [product.id]
+        assert snapshot[0]["products"][0]["game_logo"] is None
+        items = OrderService.localize_snapshot(snapshot)
+        assert items[0]["items"][0]["game_logo_alt"] is None
+        # snapshot isn't saved on read
+        order.refresh_from_db()
+        assert order.snapshot is None
+
+        call_command("backfill_snapshots")
+
+        order.refresh_from_db()
+        assert order.snapshot == snapshot
+
+
+@pytest.mark.django_db
+class TestBonusPoints:
+    def test_add_bonus_points_concurrent(self):
+        user = User.objects.first()
+        bonus_points = user.bonus_points
+        first, second = User.objects.get(id=user.id), User.objects.get(id=user.id)
+        OrderService.add_bonus_points(first, 10)
+        OrderService.add_bonus_points(second, 5, subscribe_sale_active=False)
+        user.refresh_from_db()
+        assert user.bonus_points == bonus_points + 15
+        assert user.subscribe_sale_active is False
+
+    def test_create_order_for_user(self, monkeypatch):
+        monkeypatch.setattr(random, "choice", lambda seq: False)
+        user = User.objects.create(email='checkout@example.com', username='checkout')
+        product = Product.objects.filter(price_type="fixed").first()
+        cart_id = Cart.objects.get_or_create_id(user_id=user.id)
+        CartItem.objects.create(cart_id=cart_id, product=product, quantity=2)
+        request = HttpRequest()
+        request.auth = user
+
+        result = OrderService().create_order(request)
+
+        assert result.auth_user is True
+        order = Order.objects.get(user=user)
+        assert order.status == "IN PROGRESS"
+        assert order.status_due_at is not None
+        assert len(order.snapshot) == 1
+        user.refresh_from_db()
+        assert user.bonus_points == product.bonus_points * 2
+        assert not CartItem.objects.filter(cart_id=cart_id).exists()
+
+
+@pytest.mark.django_db
+class TestCartIdentity:
+    @staticmethod
+    def make_guest_request(cookies: dict = None) -> HttpRequest:
+        request = HttpRequest()
+        request.auth = AnonymousUser()
+        request.COOKIES.update(cookies or {})
+        return request
+
+    def test_guest_cart_created_on_first_write(self, django_assert_num_queries):
+        carts_count = Cart.objects.count()
+        request = self.make_guest_request()
+        with django_assert_num_queries(0):
+            assert OrderService.get_cart_id(request) is None
+        cart_id = OrderService.get_cart_id(request, create=True)
+        assert Cart.objects.count() == carts_count + 1
+
+        response = CartCookieMiddleware(lambda rq: HttpResponse())(request)
+        cookie = response.cookies[settings.CART_COOKIE_NAME].value
+        next_request = self.make_guest_request({settings.CART_COOKIE_NAME: cookie})
+        with django_assert_num_queries(0):
+            assert OrderService.get_cart_id(next_request) == cart_id
+        assert OrderService().get_cart_with_items(next_request).id == cart_id
+
+    def test_merge_guest_cart(self, django_assert_max_num_queries):
+        user = User.objects.create(email='merge_cart@example.com', username='merge_cart')
+        first, second = Product.objects.all()[:2]
+        sub_filter = SubFilter.objects.first()
+        user_cart_id = Cart.objects.get_or_create_id(user_id=user.id)
+        user_item = CartItem.objects.create(cart_id=user_cart_id, product=first, quantity=3)
+        Attribute.objects.create(cart_item=user_item, sub_filter=sub_filter)
+
+        request = self.make_guest_request()
+        guest_cart_id = OrderService.get_cart_id(request, create=True)
+        guest_item = CartItem.objects.create(cart_id=guest_cart_id, product=first, quantity=1)
+        Attribute.objects.create(cart_item=guest_item, sub_filter=sub_filter)
+        CartItem.objects.create(cart_id=guest_cart_id, product=first, quantity=5)
+        CartItem.objects.create(cart_id=guest_cart_id, product=second, quantity=2)
+
+        with django_assert_max_num_queries(12):
+            OrderService.merge_guest_cart(request, user)
+
+        assert not Cart.objects.filter(id=guest_cart_id).exists()
+        items = CartItem.objects.filter(cart_id=user_cart_id)
+        assert items.count() == 3
+        user_item.refresh_from_db()
+        assert user_item.quantity == 4
+        assert items.get(product=second).quantity == 2
+        assert items.get(product=first, attributes__isnull=True).quantity == 5
+        assert OrderService.get_cart_id(request) is None
+
+
+    def test_deleted_cart_forgotten(self, django_capture_on_commit_callbacks):
+        user = User.objects.create(email='deleted_cart@example.com', username='deleted_cart')
+        request = self.make_guest_request()
+        guest_cart_id = OrderService.get_cart_id(request, create=True)
+        user_id = user.id
+        assert Cart.objects.get_or_create_id(user_id=user_id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Cart.objects.filter(id=guest_cart_id).delete()
+            user.delete()
+
+        assert OrderService.get_cart_id(request) is None
+        assert Cart.objects.get_id(user_id=user_id) is None
+
+
+@pytest.mark.django_db
+class TestCleanup:
+    def test_collect_garbage(self):
+        past = timezone.now() - timedelta(seconds=settings.CART_GUEST_TTL + 60)
+        old_cart = Cart.objects.create(session_key='expired-guest')
+        old_item = CartItem.objects.create(cart=old_cart, product=Product.objects.first(), quantity=1)
+        Cart.objects.filter(id=old_cart.id).update(date_created=past)
+        CartItem.objects.filter(id=old_item.id).update(date_created=past)
+        fresh_cart = Cart.objects.create(session_key='fresh-guest')
+        Session.objects.create(session_key='expired-session', session_data='',
+                               expire_date=timezone.now() - timedelta(days=1))
+        CleanupService.reset()
+
+        result = CleanupService(batch_size=2).collect()
+
+        assert result['sessions_finished'] and result['carts_finished']
+        assert result['carts'] >= 1
+        assert not Cart.objects.filter(id=old_cart.id).exists()
+        assert not CartItem.objects.filter(id=old_item.id).exists()
+        assert Cart.objects.filter(id=fresh_cart.id).exists()
+        assert not Session.objects.filter(session_key='expired-session').exists()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+This file contains methods for identifying carts of guests.
+
+    Guest is identified by random key stored in signed cookie,
+    so sessions don't have to be created and loaded from db
+    for anonymous visitors.
+"""
+import secrets
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest
+
+CART_COOKIE_SALT = "orders.cart"
+
+
+def get_guest_key(request: HttpRequest) -> str | None:
+    """
+    Get key of guest's cart from request.
+
+    Carts created before signed cookie was introduced
+    are keyed by session key, so session cookie is used
+    as fallback (its value is used only as key, session
+    isn't loaded)
+    :param request: HttpRequest
+    :return: guest key or None
+    """
+    key = getattr(request, "new_cart_key", None)
+    if not isinstance(key, str) or not key:
+        key = request.get_signed_cookie(settings.CART_COOKIE_NAME, default=None, salt=CART_COOKIE_SALT)
+    if not isinstance(key, str) or not key:
+        key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    # only non-empty string is valid key (requests of test clients are mocks)
+    return key if isinstance(key, str) and key else None
+
+
+def new_guest_key(request: HttpRequest) -> str:
+    """
+    Generate key for guest's new cart.
+
+    Key is sent to client by CartCookieMiddleware
+    :param request: HttpRequest
+    :return: guest key
+    """
+    request.new_cart_key = secrets.token_urlsafe(32)
+    return request.new_cart_key
+
+
+class CartCookieMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.set_cookie(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest):
+        return self.set_cookie(request, await self.get_response(request))
+
+    @staticmethod
+    def set_cookie(request: HttpRequest, response):
+        key = getattr(request, "new_cart_key", None)
+        if key is not None:
+            response.set_signed_cookie(
+                settings.CART_COOKIE_NAME,
+                key,
+                salt=CART_COOKIE_SALT,
+                max_age=settings.CART_COOKIE_AGE,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
@@ -6,10 +6,11 @@
 from typing import List
 
 from django.db.models import QuerySet
-from django.http import HttpRequest
+from django.http import HttpRequest, JsonResponse
 from ninja.params.functions import Header
 from ninja_extra import http_get, http_post
 from ninja_extra.controllers.base import ControllerBase, api_controller
+from pydantic.types import conint
 
 from src.main.utils import LangEnum
 from src.orders.services.order_service import OrderService
@@ -19,7 +20,9 @@ from src.products.schemas import (
     BestSellersSchema,
     FreqBoughtSchema,
     HotSectionSchema,
+    ProductBundleSchema,
     ProductCardSchema,
+    ProductSchema,
     ProductSearchSchema,
     TabContentSchema,
 )
@@ -252,7 +255,7 @@ class ProductController(ControllerBase):
             },
         },
     )
-    def get_hot_products(
+    async def get_hot_products(
         self,
         request: HttpRequest,
         page: int,
@@ -274,7 +277,7 @@ class ProductController(ControllerBase):
           - **500**: Internal server error if an unexpected error occurs.
         """
 
-        result = self.product_service.get_hot_products(
+        result = await self.product_service.aget_hot_products(
             game_id=game_id, page=page, page_size=page_size)
         return result
 
@@ -303,7 +306,7 @@ class ProductController(ControllerBase):
             },
         },
     )
-    def get_bestsellers(
+    async def get_bestsellers(
         self,
         request: HttpRequest,
         page: int,
@@ -325,7 +328,59 @@ class ProductController(ControllerBase):
           - **500**: Internal server error if an unexpected error occurs.
         """
 
-        result = self.product_service.best_sellers(page, page_size)
+        result = await self.product_service.abest_sellers(page, page_size)
+        return result
+
+    @http_get(
+        "/trending/",
+        response=List[ProductSchema],
+        openapi_extra={
+            "responses": {
+                404: {
+                    "description": "Error: Not Found (trending carousel is disabled)",
+                },
+                422: {
+                    "description": "Error: Unprocessable Entity",
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "properties": {
+                                    "detail": {
+                                        "type": "string",
+                                    }
+                                },
+                            }
+                        }
+                    },
+                },
+                500: {
+                    "description": "Internal server error if" " an unexpected error occurs.",
+                },
+            },
+        },
+    )
+    def get_trending(
+        self,
+        request: HttpRequest,
+        limit: conint(ge=1, le=50) = 10,
+        accept_lang: LangEnum = Header(alias="Accept-Language"),
+    ) -> list:
+        """
+        Endpoint gets products ranked by recent sales.
+
+        Every sale weighs less with time, so ranking shows
+        what is bought now, not over all time.
+
+        Please provide:
+         - **limit**  count of products (from 1 to 50)
+
+        Returns:
+          - **200**: Success response with the data.
+          - **404**: Error: Not Found.
+          - **422**: Error: Unprocessable Entity.
+          - **500**: Internal server error if an unexpected error occurs.
+        """
+        result = self.product_service.trending(limit)
         return result
 
     @http_get(
@@ -339,7 +394,7 @@ class ProductController(ControllerBase):
             },
         },
     )
-    def frequently_bought(
+    async def frequently_bought(
         self,
         request: HttpRequest,
         accept_lang: LangEnum = Header(alias="Accept-Language"),
@@ -354,7 +409,7 @@ class ProductController(ControllerBase):
           - **200**: Success response with the data.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.product_service.frequently_bought()
+        result = await self.product_service.afrequently_bought()
         return result
 
     @http_get(
@@ -397,7 +452,7 @@ class ProductController(ControllerBase):
             },
         },
     )
-    def get_tab_content(
+    async def get_tab_content(
         self,
         request: HttpRequest,
         tab_id: int,
@@ -416,7 +471,7 @@ class ProductController(ControllerBase):
           - **500**: Internal server error if an unexpected error occurs.
         """
 
-        result = self.product_service.get_tab_content(tab_id=tab_id)
+        result = await self.product_service.aget_tab_content(tab_id=tab_id)
         return result
 
     @http_get(
@@ -507,7 +562,7 @@ class ProductController(ControllerBase):
             },
         },
     )
-    def get_product_by_id(
+    async def get_product_by_id(
         self,
         request: HttpRequest,
         product_id: int,
@@ -525,6 +580,74 @@ class ProductController(ControllerBase):
           - **422**: Error: Unprocessable Entity.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.product_service.get_product_by_id(request,
-                                                        product_id)
+        result = await self.product_service.aget_product_by_id(product_id)
         return result
+
+    @http_get(
+        "/{product_id}/bundle/",
+        response=ProductBundleSchema,
+        openapi_extra={
+            "responses": {
+                404: {
+                    "description": "Error: Not Found",
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "properties": {
+                                    "detail": {
+                                        "type": "string",
+                                    }
+                                },
+                                "example": {"detail": "Not Found: " "No Product matches " "the given query."},
+                            }
+                        }
+                    },
+                },
+                422: {
+                    "description": "Error: Unprocessable Entity",
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "properties": {
+                                    "detail": {
+                                        "type": "string",
+                                    }
+                                },
+                            }
+                        }
+                    },
+                },
+                500: {
+                    "description": "Internal server error if" " an unexpected error occurs.",
+                },
+                504: {
+                    "description": "Error: Gateway Timeout if product wasn't fetched in time.",
+                },
+            },
+        },
+    )
+    async def get_product_bundle(
+        self,
+        request: HttpRequest,
+        product_id: int,
+        accept_lang: LangEnum = Header(alias="Accept-Language"),
+    ) -> JsonResponse:
+        """
+        Gets product, its tabs and frequently bought products by one request.
+
+        Parts are fetched concurrently, names of parts which
+        failed are returned in errors.
+
+        Please provide:
+         - **product_id**  id of product we want to get
+
+        Returns:
+          - **200**: Success response with the data.
+          - **404**: Error: Not Found.
+          - **422**: Error: Unprocessable Entity.
+          - **500**: Internal server error if an unexpected error occurs.
+          - **504**: Error: Gateway Timeout.
+        """
+        result = await self.product_service.get_product_bundle(request, product_id)
+        # parts are already rendered by their schemas in threads of bundle
+        return JsonResponse(result)
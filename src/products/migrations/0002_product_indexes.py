@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-bought_count'], name='products_bestsellers_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['tag', '-bought_count'], name='products_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['catalog_page', '-bought_count'], name='products_catalog_page_idx'),
+        ),
+    ]
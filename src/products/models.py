@@ -269,6 +269,14 @@ class Product(models.Model):
         verbose_name = "Products"
         verbose_name_plural = "Products"
         db_table = "products"
+        indexes = [
+            models.Index(fields=["-bought_count"], name="products_bestsellers_idx",
+                         condition=models.Q(is_deleted=False)),
+            models.Index(fields=["tag", "-bought_count"], name="products_tag_idx",
+                         condition=models.Q(is_deleted=False)),
+            models.Index(fields=["catalog_page", "-bought_count"], name="products_catalog_page_idx",
+                         condition=models.Q(is_deleted=False)),
+        ]
 
 
 class FreqBought(models.Model):
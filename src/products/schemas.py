@@ -324,3 +324,31 @@ class FreqBoughtSchema(ModelSchema):
             "id",
             "discount",
         ]
+
+
+class ProductTabContentSchema(ModelSchema):
+    """
+    Pydantic schema for model ProductTabs.
+
+    Purpose of this schema to return
+    tab with its content for product bundle
+    """
+
+    class Meta:
+        model = ProductTabs
+        fields = ["id", "title", "content"]
+
+
+class ProductBundleSchema(Schema):
+    """
+    Pydantic schema for product's page bundle.
+
+    Purpose of this schema to return product,
+    its tabs and frequently bought products by one request,
+    names of parts which failed are in errors
+    """
+
+    product: ProductCardSchema
+    tabs: List[ProductTabContentSchema]
+    frequently_bought: List[FreqBoughtSchema]
+    errors: List[str]
@@ -10,11 +10,15 @@ from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext as _
 from ninja.errors import HttpError
 
+from config import settings
+
 from src.orders.models import Attribute, Cart, CartItem
+from src.main.bundles import Bundle
 from src.orders.services.order_service import OrderService
 from src.products.models import Filter, FreqBought, Product, ProductTabs, SubFilter
-from src.products.schemas import AddToCartSchema
-from src.products.utils import paginate
+from src.products.schemas import AddToCartSchema, FreqBoughtSchema, ProductCardSchema, ProductTabContentSchema
+from src.products.utils import apaginate, paginate
+from src.statistic.services.trending_service import TrendingService
 from src.users.schemas import MessageOutSchema
 
 User = get_user_model()
@@ -47,7 +51,6 @@ class ProductService:
                        .get(id=product_id))
         except Product.DoesNotExist:
             raise HttpError(404, _("Not Found: No Product" " matches the given query."))
-        cart = OrderService().get_my_cart(request=request)
         if product.price_type == "range":
             attributes = set(body.attributes)
             for subfilter_id in attributes:
@@ -69,8 +72,9 @@ class ProductService:
                         ),
                     )
 
+            cart_id = OrderService.get_cart_id(request=request, create=True)
             create_item = True
-            cart_items = cart.items.filter(product=product)
+            cart_items = CartItem.objects.filter(cart_id=cart_id, product=product)
             for cart_item in cart_items:
                 attrs = cart_item.attributes.values_list("sub_filter_id", flat=True)
                 attrs1 = set(attrs)
@@ -82,16 +86,17 @@ class ProductService:
                     create_item = False
                     break
             if create_item:
-                cart_item = CartItem.objects.create(product=product, quantity=body.quantity, cart=cart)
+                cart_item = CartItem.objects.create(product=product, quantity=body.quantity, cart_id=cart_id)
                 for subfilter_id in attributes:
                     Attribute.objects.create(sub_filter_id=subfilter_id, cart_item=cart_item)
         if product.price_type == "fixed":
+            cart_id = OrderService.get_cart_id(request=request, create=True)
             try:
-                cart_item = cart.items.get(product=product)
+                cart_item = CartItem.objects.get(cart_id=cart_id, product=product)
                 cart_item.quantity = cart_item.quantity + body.quantity
                 cart_item.save()
             except CartItem.DoesNotExist:
-                (CartItem.objects.create(product=product, quantity=body.quantity, cart=cart))
+                (CartItem.objects.create(product=product, quantity=body.quantity, cart_id=cart_id))
         return MessageOutSchema(message=_("Product added to cart " "successfully"))
 
     @staticmethod
@@ -141,6 +146,19 @@ class ProductService:
         items = Product.objects.bestsellers()
         return paginate(items=items, page=page, page_size=page_size)
 
+    @staticmethod
+    def trending(limit: int) -> list:
+        """
+        Gets products ranked by recent sales.
+
+        Ranking is precomputed and served from cache
+        :param limit: length of result list
+        :return: list of Product model instances
+        """
+        if not settings.TRENDING_CAROUSEL:
+            raise HttpError(404, _("Not Found"))
+        return [product for product, score in TrendingService().get_top_products(limit)]
+
     @staticmethod
     def frequently_bought() -> QuerySet:
         """
@@ -168,6 +186,16 @@ class ProductService:
             raise HttpError(404, _("Not Found: No ProductTabs matches" " the given query."))
         return tab
 
+    @staticmethod
+    def get_product_tabs(product_id: int) -> QuerySet:
+        """
+        Returns tabs of product with their content.
+
+        :param product_id: id of Product model's instance
+        :return: ProductTabs queryset
+        """
+        return ProductTabs.objects.filter(product=product_id)
+
     @staticmethod
     def search_products(search_line: str, game_id: int = None) -> QuerySet:
         """
@@ -187,16 +215,105 @@ class ProductService:
 
     @staticmethod
     def freqbot_to_cart(freqbot_id: int, request: HttpRequest) -> MessageOutSchema:
-        cart = OrderService().get_my_cart(request=request)
         try:
             freqbot = FreqBought.objects.get(id=freqbot_id)
         except FreqBought.DoesNotExist:
             raise HttpError(404, _("Not Found: No FreqBought matches" " the given query."))
 
+        cart_id = OrderService.get_cart_id(request=request, create=True)
         try:
-            cart_item = cart.items.get(freqbot=freqbot)
+            cart_item = CartItem.objects.get(cart_id=cart_id, freqbot=freqbot)
             cart_item.quantity = cart_item.quantity + 1
             cart_item.save()
         except CartItem.DoesNotExist:
-            CartItem.objects.create(freqbot_id=freqbot.id, quantity=1, cart_id=cart.id)
+            CartItem.objects.create(freqbot_id=freqbot.id, quantity=1, cart_id=cart_id)
         return MessageOutSchema(message=_("Freqbot element added to cart " "successfully"))
+
+    @staticmethod
+    async def aget_product_by_id(product_id: int) -> Product:
+        """
+        Async version of get_product_by_id.
+
+        Everything needed by ProductCardSchema is loaded in advance,
+        because schema can't make queries in event loop.
+
+        :param product_id: id of Product model's instance
+        :return: Product model's instance with related filters
+        """
+        try:
+            product = await (Product.objects
+                             .select_related("catalog_page__game")
+                             .prefetch_related("filters__subfilters", "tabs")
+                             .aget(id=product_id))
+        except Product.DoesNotExist:
+            raise HttpError(404, _("Not Found: No Product matches" " the given query."))
+        return product
+
+    @staticmethod
+    async def aget_hot_products(page: int, page_size: int, game_id: int = None) -> dict:
+        """
+        Async version of get_hot_products.
+
+        :param page: the page number we want to get
+        :param page_size: length of queryset per page
+        :param game_id: filter(not required) additionally by game id
+        :return: dict which contains all parameters for pagination
+        """
+        items = Product.objects.hot_all(game_id)
+        return await apaginate(items=items, page=page, page_size=page_size)
+
+    @staticmethod
+    async def abest_sellers(page: int, page_size: int) -> dict:
+        """
+        Async version of best_sellers.
+
+        :param page: the page number we want to get
+        :param page_size: length of queryset per page
+        :return: dict which contains all parameters for pagination
+        """
+        items = Product.objects.bestsellers()
+        return await apaginate(items=items, page=page, page_size=page_size)
+
+    @staticmethod
+    async def afrequently_bought() -> list:
+        """
+        Async version of frequently_bought.
+
+        :return: list of FreqBought model instances with products
+        """
+        return [item async for item in ProductService.frequently_bought()]
+
+    @staticmethod
+    async def aget_tab_content(tab_id: int) -> ProductTabs:
+        """
+        Async version of get_tab_content.
+
+        :param tab_id: id of TabItem model's instance we want to get
+        :return: return ProductTabs() model instance
+        """
+        try:
+            tab = await ProductTabs.objects.aget(id=tab_id)
+        except ProductTabs.DoesNotExist:
+            raise HttpError(404, _("Not Found: No ProductTabs matches" " the given query."))
+        return tab
+
+    @staticmethod
+    async def get_product_bundle(request: HttpRequest, product_id: int) -> dict:
+        """
+        Gets product, its tabs and frequently bought products concurrently.
+
+        Product is required, other parts are replaced
+        by empty lists if they failed or timed out.
+
+        :param request: HttpRequest
+        :param product_id: id of Product model's instance
+        :return: dict rendered by ProductBundleSchema
+        """
+        bundle = (Bundle()
+                  .add("product", ProductService.get_product_by_id, request, product_id,
+                       schema=ProductCardSchema, required=True)
+                  .add("tabs", ProductService.get_product_tabs, product_id,
+                       schema=ProductTabContentSchema, default=[])
+                  .add("frequently_bought", ProductService.frequently_bought,
+                       schema=FreqBoughtSchema, default=[]))
+        return await bundle.run()
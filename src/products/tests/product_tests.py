@@ -2,13 +2,13 @@ import json
 
 import pytest
 from django.test import TestCase
-from ninja_extra.testing import TestClient
-from src.main.utils import make_request
+from src.main.utils import TestClient, make_request
 from loguru import logger
 
 from src.orders.api import OrderController
 from src.products.api import ProductController
 from src.products.schemas import *
+from src.statistic.services.trending_service import TrendingService
 from src.users.schemas import MessageOutSchema
 import httpx
 
@@ -81,6 +81,22 @@ class TestProductController:
         assert is_valid is schema_status
         assert response.status_code == expected_status
 
+    def test_get_trending(self):
+        product = Product.objects.first()
+        TrendingService().add_sales({product.id: 1_000_000})
+        response, is_valid = make_request(request_str='/trending/?limit=5',
+                                          schema=ProductSchema,
+                                          client=client,
+                                          headers=headers)
+        assert is_valid is True
+        assert response.status_code == 200
+        assert response.json()[0]['id'] == product.id
+
+    @pytest.mark.parametrize("limit", [0, -1, 51])
+    def test_get_trending_invalid_limit(self, limit):
+        response = client.get(f'/trending/?limit={limit}', headers=headers)
+        assert response.status_code == 422
+
     @pytest.mark.parametrize("payload,expected_status,schema_status",
                              [
                                  (
@@ -4,10 +4,12 @@ This file contains most frequently used methods for app product.
 
     Methods:
         paginate - helps to paginate any queryset
+        apaginate - async version of paginate
         get_timestamp_path - helps to make unique name
         for just uploaded file to the system in media directory
 """
 from datetime import datetime, timedelta
+from math import ceil
 from os.path import splitext
 
 import jwt
@@ -46,6 +48,32 @@ def paginate(page: int, items: QuerySet, page_size: int) -> dict:
     }
 
 
+async def apaginate(page: int, items: QuerySet, page_size: int) -> dict:
+    """
+    Async version of paginate, items are loaded by async ORM.
+
+    Out of range page is replaced by the last one as in paginate.
+
+    :param page: the page number we want to get
+    :param items: queryset of models instances which have to paginated
+    :param page_size: length of queryset per page
+    :return: dict which contains parameters for pagination
+    :rtype: dict
+    """
+    if page_size < 1:
+        raise HttpError(422, "page_size query parameter must be more than 1 ☹")
+    num_pages = max(ceil(await items.acount() / page_size), 1)
+    if page < 1 or page > num_pages:
+        page = num_pages
+    offset = (page - 1) * page_size
+    return {
+        "items": [item async for item in items[offset:offset + page_size]],
+        "count": num_pages,
+        "next": page < num_pages,
+        "previous": page > 1,
+    }
+
+
 def get_timestamp_path(instance: object, filename) -> str:
     """
     Make unique naming of files in directory media.
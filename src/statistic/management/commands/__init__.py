@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Package Initialization Module
+This module serves as the entry point
+for the package and contains initialization code
+that sets up the package environment.
+It imports and exposes functionality from submodules
+and may perform additional setup tasks if necessary.
+"""
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from src.orders.models import Order
+from src.statistic.services.statistic_service import StatisticService
+
+
+class Command(BaseCommand):
+    help = "Recalculate sales rollups from completed orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="recalculate only last N days (default: whole history)")
+        parser.add_argument("--chunk-days", type=int, default=31,
+                            help="count of days recalculated in one step")
+
+    def handle(self, *args, **options):
+        service = StatisticService()
+        tz = service.get_timezone()
+        end = timezone.now().astimezone(tz).date()
+        if options["days"]:
+            start = end - timedelta(days=options["days"] - 1)
+        else:
+            first = (Order.objects
+                     .filter(status="COMPLETED")
+                     .aggregate(first=Min("date_created"))["first"])
+            if first is None:
+                self.stdout.write("There are no completed orders")
+                return
+            start = first.astimezone(tz).date()
+        day = start
+        while day <= end:
+            chunk_end = min(day + timedelta(days=options["chunk_days"] - 1), end)
+            service.refresh_sales({day + timedelta(days=i)
+                                   for i in range((chunk_end - day).days + 1)})
+            self.stdout.write(f"Recalculated {day} - {chunk_end}")
+            day = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS("Sales rollups recalculated successfully"))
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily sales',
+                'verbose_name_plural': 'Daily sales',
+                'db_table': 'daily_sales',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(unique=True)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Hourly sales',
+                'verbose_name_plural': 'Hourly sales',
+                'db_table': 'hourly_sales',
+                'ordering': ['hour'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sold_count', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Product daily sales',
+                'verbose_name_plural': 'Product daily sales',
+                'db_table': 'product_daily_sales',
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='product_daily_sales_unique')],
+            },
+        ),
+    ]
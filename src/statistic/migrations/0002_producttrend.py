@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('statistic', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTrend',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='products.product')),
+                ('log_score', models.FloatField(default=0)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Product trend',
+                'verbose_name_plural': 'Product trends',
+                'db_table': 'product_trends',
+                'indexes': [models.Index(fields=['-log_score'], name='product_trends_score_idx')],
+            },
+        ),
+    ]
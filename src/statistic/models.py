@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+    In this module described models for application statistic
+    Their purpose is storing precalculated sales data
+    for dashboard in admin panel
+    Models:
+       DailySales
+       HourlySales
+       ProductDailySales
+       ProductTrend
+"""
+from django.db import models
+
+from src.products.models import Product
+
+
+class DailySales(models.Model):
+    """
+    Model is storing count of completed orders and income per day
+    """
+
+    date = models.DateField(unique=True)
+    orders_count = models.PositiveIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name = "Daily sales"
+        verbose_name_plural = "Daily sales"
+        db_table = "daily_sales"
+
+
+class HourlySales(models.Model):
+    """
+    Model is storing count of completed orders and income per hour
+    """
+
+    hour = models.DateTimeField(unique=True)
+    orders_count = models.PositiveIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ["hour"]
+        verbose_name = "Hourly sales"
+        verbose_name_plural = "Hourly sales"
+        db_table = "hourly_sales"
+
+
+class ProductDailySales(models.Model):
+    """
+    Model is storing count of sold items of product per day
+
+    products from frequently bought sets are counted too
+    """
+
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_sales")
+    sold_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name = "Product daily sales"
+        verbose_name_plural = "Product daily sales"
+        db_table = "product_daily_sales"
+        constraints = [
+            models.UniqueConstraint(fields=["date", "product"], name="product_daily_sales_unique"),
+        ]
+
+
+class ProductTrend(models.Model):
+    """
+    Model is storing time-decayed popularity of product
+
+    score is kept in log2 scale relative to fixed epoch,
+    so ordering by it doesn't change with time
+    """
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE,
+                                   primary_key=True, related_name="trend")
+    log_score = models.FloatField(default=0)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Product trend"
+        verbose_name_plural = "Product trends"
+        db_table = "product_trends"
+        indexes = [
+            models.Index(fields=["-log_score"], name="product_trends_score_idx"),
+        ]
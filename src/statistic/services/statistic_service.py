@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains class for managing sales statistic of the site.
+
+"""
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from django.db import transaction
+from django.db.models import Count, DateField, DateTimeField, Q, Sum
+from django.db.models.functions import Trunc, TruncDate, TruncHour
+from django.utils import timezone as django_timezone
+
+from config import settings
+from src.main.models import OrderItem
+from src.orders.models import Order
+from src.products.models import Product
+from src.statistic.models import DailySales, HourlySales, ProductDailySales
+
+
+class StatisticService:
+    """
+    A service class for managing sales statistic.
+
+    This class keeps daily and hourly rollups of completed
+    orders up to date and provides data for dashboard.
+    """
+
+    SERIES_INTERVALS = ("hour", "day", "week")
+
+    @staticmethod
+    def get_timezone() -> ZoneInfo:
+        return ZoneInfo(settings.TIME_ZONE)
+
+    def get_completed_orders(self, start: date, end: date):
+        """
+        Get completed orders created between two local dates.
+
+        :param start: first date (including)
+        :param end: last date (including)
+        :return: Order queryset annotated with local day and hour
+        """
+        tz = self.get_timezone()
+        return (Order.objects
+                .filter(status="COMPLETED",
+                        date_created__gte=datetime.combine(start, time.min, tzinfo=tz),
+                        date_created__lt=datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz))
+                .annotate(day=TruncDate("date_created", tzinfo=tz),
+                          hour=TruncHour("date_created", tzinfo=tz))
+                .order_by())
+
+    @transaction.atomic
+    def refresh_sales(self, dates: set) -> None:
+        """
+        Recalculate rollups for specific local dates.
+
+        Is called when orders are completed, recalculating
+        is idempotent, so it is safe to call it several times.
+        Hourly and product rows of dates are replaced, so buckets
+        which have no sales anymore (order is canceled) are removed
+        :param dates: set of dates which have to be recalculated
+        """
+        if not dates:
+            return
+        tz = self.get_timezone()
+        orders = self.get_completed_orders(min(dates), max(dates))
+        orders = orders.filter(day__in=dates)
+        for day in dates:
+            HourlySales.objects.filter(hour__gte=datetime.combine(day, time.min, tzinfo=tz),
+                                       hour__lt=datetime.combine(day + timedelta(days=1), time.min,
+                                                                 tzinfo=tz)).delete()
+        ProductDailySales.objects.filter(date__in=dates).delete()
+
+        daily = {day: DailySales(date=day) for day in dates}
+        for row in (orders.values("day")
+                    .annotate(orders_count=Count("id"), revenue=Sum("total_price"))):
+            daily[row["day"]].orders_count = row["orders_count"]
+            daily[row["day"]].revenue = row["revenue"]
+        DailySales.objects.bulk_create(daily.values(),
+                                       update_conflicts=True,
+                                       unique_fields=["date"],
+                                       update_fields=["orders_count", "revenue"])
+
+        HourlySales.objects.bulk_create(
+            [HourlySales(hour=row["hour"], orders_count=row["orders_count"], revenue=row["revenue"])
+             for row in (orders.values("hour")
+                         .annotate(orders_count=Count("id"), revenue=Sum("total_price")))],
+            update_conflicts=True,
+            unique_fields=["hour"],
+            update_fields=["orders_count", "revenue"],
+        )
+
+        sold = Counter()
+        items = (OrderItem.objects
+                 .filter(order__in=orders.values("id"))
+                 .annotate(day=TruncDate("order__date_created", tzinfo=self.get_timezone()))
+                 .order_by())
+        for row in (items.filter(product__isnull=False)
+                    .values("day", "product_id")
+                    .annotate(quantity=Sum("quantity"))):
+            sold[row["day"], row["product_id"]] += row["quantity"]
+        for row in (items.filter(freqbot__products__isnull=False)
+                    .values("day", "freqbot__products")
+                    .annotate(quantity=Sum("quantity"))):
+            sold[row["day"], row["freqbot__products"]] += row["quantity"]
+        ProductDailySales.objects.bulk_create(
+            [ProductDailySales(date=day, product_id=product_id, sold_count=quantity)
+             for (day, product_id), quantity in sold.items()],
+            update_conflicts=True,
+            unique_fields=["date", "product"],
+            update_fields=["sold_count"],
+        )
+
+    def refresh_orders_sales(self, order_ids: list) -> None:
+        """
+        Recalculate rollups for dates of specific orders.
+
+        :param order_ids: ids of just completed orders
+        """
+        tz = self.get_timezone()
+        dates = {date_created.astimezone(tz).date()
+                 for date_created in (Order.objects
+                                      .filter(id__in=order_ids)
+                                      .values_list("date_created", flat=True))}
+        self.refresh_sales(dates)
+
+    @staticmethod
+    def get_daily_sales(start: date, end: date) -> dict:
+        """
+        Get daily rollups between two dates.
+
+        :param start: first date (including)
+        :param end: last date (including)
+        :return: dict date -> DailySales model instance
+        """
+        return {item.date: item for item in DailySales.objects.filter(date__range=[start, end])}
+
+    @staticmethod
+    def get_top_products(start: date, end: date, limit: int = 10) -> list:
+        """
+        Get most sold products between two dates.
+
+        :param start: first date (including)
+        :param end: last date (including)
+        :param limit: length of result list
+        :return: list of tuples (Product model instance, sold count)
+        """
+        rows = list(ProductDailySales.objects
+                    .filter(date__range=[start, end])
+                    .values("product_id")
+                    .annotate(sold=Sum("sold_count"))
+                    .order_by("-sold")[:limit])
+        products = Product.objects.get_history().in_bulk([row["product_id"] for row in rows])
+        return [(products[row["product_id"]], row["sold"]) for row in rows]
+
+    def get_periods(self, start: date, end: date, interval: str) -> list:
+        """
+        Get all periods of series between two local dates.
+
+        Hours are generated in UTC and converted to local time,
+        so days with DST change have 23 or 25 hours
+        :param start: first date (including)
+        :param end: last date (including)
+        :param interval: one of SERIES_INTERVALS
+        :return: list of dates (day, week) or datetimes (hour)
+        """
+        if interval == "hour":
+            tz = self.get_timezone()
+            current = datetime.combine(start, time.min, tzinfo=tz).astimezone(timezone.utc)
+            last = datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz).astimezone(timezone.utc)
+            periods = []
+            while current < last:
+                periods.append(current.astimezone(tz))
+                current = current + timedelta(hours=1)
+            return periods
+        step = timedelta(days=1)
+        if interval == "week":
+            start = start - timedelta(days=start.weekday())
+            step = timedelta(weeks=1)
+        periods = []
+        while start <= end:
+            periods.append(start)
+            start = start + step
+        return periods
+
+    def get_rolled_up_sales(self, days: dict, interval: str) -> list:
+        """
+        Get sales of periods from rollups.
+
+        :param days: dict date -> DailySales model instance of rolled up days
+        :param interval: one of SERIES_INTERVALS
+        :return: list of tuples (period, orders count, revenue)
+        """
+        if not days:
+            return []
+        if interval == "hour":
+            tz = self.get_timezone()
+            hours = HourlySales.objects.filter(
+                hour__gte=datetime.combine(min(days), time.min, tzinfo=tz),
+                hour__lt=datetime.combine(max(days) + timedelta(days=1), time.min, tzinfo=tz))
+            return [(item.hour, item.orders_count, item.revenue)
+                    for item in hours if item.hour.astimezone(tz).date() in days]
+        return [(day - timedelta(days=day.weekday()) if interval == "week" else day,
+                 item.orders_count, item.revenue)
+                for day, item in days.items()]
+
+    def get_orders_sales(self, days: list, interval: str) -> list:
+        """
+        Get sales of periods from completed orders by one GROUP BY query.
+
+        :param days: sorted list of local dates
+        :param interval: one of SERIES_INTERVALS
+        :return: list of tuples (period, orders count, revenue)
+        """
+        tz = self.get_timezone()
+        # consecutive days are selected by one range
+        spans = []
+        for day in days:
+            if spans and spans[-1][1] + timedelta(days=1) == day:
+                spans[-1][1] = day
+            else:
+                spans.append([day, day])
+        condition = Q()
+        for first, last in spans:
+            condition |= Q(date_created__gte=datetime.combine(first, time.min, tzinfo=tz),
+                           date_created__lt=datetime.combine(last + timedelta(days=1), time.min, tzinfo=tz))
+        output_field = DateTimeField() if interval == "hour" else DateField()
+        rows = (Order.objects
+                .filter(condition, status="COMPLETED")
+                .annotate(period=Trunc("date_created", interval,
+                                       output_field=output_field,
+                                       tzinfo=tz))
+                .order_by()
+                .values("period")
+                .annotate(orders_count=Count("id"), revenue=Sum("total_price")))
+        return [(row["period"], row["orders_count"], row["revenue"]) for row in rows]
+
+    def get_sales_series(self, start: date, end: date, interval: str = "day") -> list:
+        """
+        Get dense series of orders count and revenue.
+
+        Finished days which have DailySales row are read from rollups
+        (HourlySales for hours), other days (current day, days which
+        aren't rolled up yet) are counted from orders,
+        periods without orders are filled with zeros
+        :param start: first date (including)
+        :param end: last date (including)
+        :param interval: one of SERIES_INTERVALS
+        :return: list of dicts with keys period, orders_count, revenue
+        """
+        yesterday = django_timezone.now().astimezone(self.get_timezone()).date() - timedelta(days=1)
+        rolled = self.get_daily_sales(start, min(end, yesterday)) if start <= yesterday else {}
+        rows = self.get_rolled_up_sales(rolled, interval)
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        not_rolled = [day for day in days if day not in rolled]
+        if not_rolled:
+            rows.extend(self.get_orders_sales(not_rolled, interval))
+        # week can be split between rollups and orders
+        orders_count, revenue = Counter(), Counter()
+        for period, count, income in rows:
+            orders_count[period] += count
+            revenue[period] += income or 0
+        return [{"period": period,
+                 "orders_count": orders_count[period],
+                 "revenue": round(revenue[period], 2)}
+                for period in self.get_periods(start, end, interval)]
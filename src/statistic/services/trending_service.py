@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+    Module contains class for ranking trending products.
+
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from config import settings
+from src.products.models import Product
+from src.statistic.models import ProductTrend
+
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+TRENDING_CACHE_KEY = "trending:top"
+
+
+class TrendingService:
+    """
+    A service class for ranking trending products.
+
+    Every sold item adds to product's score weight which halves
+    every TRENDING_HALF_LIFE seconds. Weights are counted forward
+    from fixed epoch and stored in log2 scale, so new sales are added
+    incrementally and ordering by stored score is the same
+    as ordering by score decayed to any moment.
+    """
+
+    @staticmethod
+    def get_log_weight(moment: datetime) -> float:
+        """
+        Get log2 of weight of one item sold at specific moment.
+
+        :param moment: time of sale
+        :return: log2 of weight
+        """
+        return (moment - TRENDING_EPOCH).total_seconds() / settings.TRENDING_HALF_LIFE
+
+    @staticmethod
+    def log_add(first: float, second: float) -> float:
+        """
+        Get log2(2 ** first + 2 ** second) without overflow.
+        """
+        high, low = max(first, second), min(first, second)
+        return high + math.log2(1 + 2 ** (low - high))
+
+    def get_score(self, log_score: float, moment: datetime = None) -> float:
+        """
+        Get score of product decayed to specific moment.
+
+        :param log_score: stored score of product
+        :param moment: moment of decaying (default now)
+        :return: count of sold items weighted by their age
+        """
+        moment = moment or timezone.now()
+        return 2 ** (log_score - self.get_log_weight(moment))
+
+    def add_sales(self, counts: dict, moment: datetime = None) -> None:
+        """
+        Add sold items to scores of products.
+
+        Is called once after orders are completed,
+        precomputed top is refreshed in cache
+        :param counts: dict product id -> sold quantity
+        :param moment: time of sale (default now)
+        """
+        counts = {product_id: quantity for product_id, quantity in counts.items() if quantity > 0}
+        if not counts:
+            return
+        log_weight = self.get_log_weight(moment or timezone.now())
+        with transaction.atomic():
+            current = dict(ProductTrend.objects
+                           .select_for_update()
+                           .filter(product_id__in=counts)
+                           .order_by("product_id")
+                           .values_list("product_id", "log_score"))
+            trends = []
+            for product_id, quantity in counts.items():
+                log_score = log_weight + math.log2(quantity)
+                if product_id in current:
+                    log_score = self.log_add(current[product_id], log_score)
+                trends.append(ProductTrend(product_id=product_id, log_score=log_score))
+            ProductTrend.objects.bulk_create(trends,
+                                             update_conflicts=True,
+                                             unique_fields=["product"],
+                                             update_fields=["log_score", "date_updated"])
+        self.refresh_top()
+
+    @staticmethod
+    def refresh_top() -> list:
+        """
+        Precompute ranked list of trending products and store it in cache.
+
+        :return: list of tuples (product id, log score)
+        """
+        top = list(ProductTrend.objects
+                   .filter(product__is_deleted=False)
+                   .order_by("-log_score")
+                   .values_list("product_id", "log_score")[:settings.TRENDING_TOP_SIZE])
+        cache.set(TRENDING_CACHE_KEY, top, settings.TRENDING_CACHE_TIMEOUT)
+        return top
+
+    def get_top(self, limit: int = 10) -> list:
+        """
+        Get ranked list of trending products from cache.
+
+        :param limit: length of result list (not bigger than TRENDING_TOP_SIZE)
+        :return: list of tuples (product id, score decayed to now)
+        """
+        top = cache.get(TRENDING_CACHE_KEY)
+        if top is None:
+            top = self.refresh_top()
+        now = timezone.now()
+        return [(product_id, self.get_score(log_score, now)) for product_id, log_score in top[:limit]]
+
+    def get_top_products(self, limit: int = 10) -> list:
+        """
+        Get trending products ordered by rank.
+
+        :param limit: length of result list
+        :return: list of tuples (Product model instance, score)
+        """
+        top = self.get_top(limit)
+        products = (Product.objects
+                    .select_related("catalog_page__game", "tag")
+                    .prefetch_related("filters__subfilters")
+                    .in_bulk([product_id for product_id, score in top]))
+        return [(products[product_id], score) for product_id, score in top if product_id in products]
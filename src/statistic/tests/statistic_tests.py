@@ -0,0 +1,137 @@
+import math
+from datetime import date, timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from config import settings
+
+from src.main.models import OrderItem
+from src.orders.models import Order
+from src.products.models import Product
+from src.statistic.models import DailySales, HourlySales, ProductDailySales
+from src.statistic.services.statistic_service import StatisticService
+from src.statistic.services.trending_service import TrendingService
+
+
+@pytest.mark.django_db
+class TestStatisticService:
+
+    @pytest.fixture
+    def completed_order(self):
+        product = Product.objects.first()
+        order = Order.objects.create(status="COMPLETED", total_price=100)
+        OrderItem.objects.create(order=order, product=product, quantity=3, cost=100)
+        return order
+
+    def test_refresh_orders_sales(self, completed_order):
+        service = StatisticService()
+        today = timezone.now().astimezone(service.get_timezone()).date()
+
+        service.refresh_orders_sales([completed_order.id])
+        service.refresh_orders_sales([completed_order.id])
+
+        daily = DailySales.objects.get(date=today)
+        assert daily.orders_count == service.get_completed_orders(today, today).count()
+        product_id = completed_order.items.first().product_id
+        assert ProductDailySales.objects.get(date=today, product_id=product_id).sold_count >= 3
+        top = service.get_top_products(today, today, limit=100)
+        assert any(product.id == product_id for product, sold in top)
+
+    def test_refresh_canceled_order(self, completed_order):
+        service = StatisticService()
+        today = timezone.now().astimezone(service.get_timezone()).date()
+        Order.objects.filter(status="COMPLETED", date_created__date=today).exclude(id=completed_order.id).delete()
+        service.refresh_orders_sales([completed_order.id])
+        product_id = completed_order.items.first().product_id
+        assert ProductDailySales.objects.filter(date=today, product_id=product_id).exists()
+
+        Order.objects.filter(id=completed_order.id).update(status="CANCELED")
+        service.refresh_orders_sales([completed_order.id])
+
+        assert not ProductDailySales.objects.filter(date=today).exists()
+        assert not HourlySales.objects.filter(hour__date=today).exists()
+        assert DailySales.objects.get(date=today).orders_count == 0
+
+    def test_backfill_sales(self, completed_order):
+        call_command("backfill_sales", days=2)
+        today = timezone.now().astimezone(StatisticService.get_timezone()).date()
+        daily = StatisticService.get_daily_sales(today - timedelta(days=1), today)
+        assert set(daily) == {today - timedelta(days=1), today}
+        assert daily[today].orders_count >= 1
+
+    def test_get_sales_series(self, completed_order):
+        service = StatisticService()
+        today = timezone.now().astimezone(service.get_timezone()).date()
+        start = today - timedelta(days=89)
+
+        series = service.get_sales_series(start, today)
+
+        assert [item["period"] for item in series] == [start + timedelta(days=i) for i in range(90)]
+        assert series[-1]["orders_count"] == service.get_completed_orders(today, today).count()
+
+    def test_get_sales_series_from_rollups(self, completed_order):
+        service = StatisticService()
+        today = timezone.now().astimezone(service.get_timezone()).date()
+        day = today - timedelta(days=3)
+        DailySales.objects.update_or_create(date=day, defaults={"orders_count": 7, "revenue": 70.5})
+        HourlySales.objects.filter(hour__date=day).delete()
+
+        series = {item["period"]: item for item in service.get_sales_series(day, today)}
+
+        assert series[day]["orders_count"] == 7
+        assert series[day]["revenue"] == 70.5
+        # current day isn't rolled up yet
+        assert series[today]["orders_count"] == service.get_completed_orders(today, today).count()
+        weeks = service.get_sales_series(day, today, "week")
+        assert sum(item["orders_count"] for item in weeks) == sum(item["orders_count"]
+                                                                  for item in series.values())
+        hours = service.get_sales_series(day, day, "hour")
+        assert sum(item["orders_count"] for item in hours) == 0
+
+    def test_get_sales_series_without_rollups(self):
+        service = StatisticService()
+        tz = service.get_timezone()
+        day = timezone.now().astimezone(tz).date() - timedelta(days=5)
+        order = Order.objects.create(status="COMPLETED", total_price=100)
+        Order.objects.filter(id=order.id).update(
+            date_created=timezone.now().astimezone(tz).replace(year=day.year, month=day.month, day=day.day))
+        DailySales.objects.filter(date=day).delete()
+
+        series = service.get_sales_series(day, day)
+
+        # day which isn't rolled up is counted from orders
+        assert series[0]["orders_count"] == service.get_completed_orders(day, day).count() >= 1
+
+    def test_get_periods_dst(self):
+        service = StatisticService()
+        # in Europe/Kiev clocks are moved forward on last Sunday of March
+        assert len(service.get_periods(date(2024, 3, 31), date(2024, 3, 31), "hour")) == 23
+        assert len(service.get_periods(date(2024, 10, 27), date(2024, 10, 27), "hour")) == 25
+        weeks = service.get_periods(date(2024, 1, 3), date(2024, 1, 20), "week")
+        assert weeks == [date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15)]
+
+
+@pytest.mark.django_db
+class TestTrendingService:
+
+    def test_score_decay(self):
+        service = TrendingService()
+        now = timezone.now()
+        sold_at = now - timedelta(seconds=settings.TRENDING_HALF_LIFE * 2)
+        log_score = service.log_add(service.get_log_weight(sold_at) + math.log2(8),
+                                    service.get_log_weight(now) + math.log2(3))
+        assert service.get_score(log_score, now) == pytest.approx(8 / 4 + 3)
+
+    def test_add_sales(self):
+        service = TrendingService()
+        old, recent = Product.objects.all()[:2]
+        now = timezone.now()
+        service.add_sales({old.id: 10_000},
+                          moment=now - timedelta(seconds=settings.TRENDING_HALF_LIFE * 4))
+        service.add_sales({recent.id: 1_000_000}, moment=now)
+
+        ids = [product_id for product_id, score in service.get_top(settings.TRENDING_TOP_SIZE)]
+        assert ids[0] == recent.id
+        assert ids.index(recent.id) < ids.index(old.id)
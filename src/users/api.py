@@ -14,15 +14,16 @@ from ninja import Header
 from ninja_extra import http_delete, http_get, http_patch, http_post
 from ninja_extra.controllers.base import ControllerBase, api_controller
 from ninja_extra.permissions.common import AllowAny
-from ninja_jwt.authentication import JWTAuth
 from ninja_jwt.schema_control import SchemaControl
 from ninja_jwt.settings import api_settings
 
 from src.main.utils import LangEnum
+from src.orders.services.order_service import OrderService
 from src.users.schemas import *
 from src.users.schemas import MessageOutSchema
 from src.users.services.auth_service import AuthService
 from src.users.services.user_service import UserService
+from src.users.utils import CachedJWTAuth
 
 
 @api_controller("/users", tags=["Users"])
@@ -121,7 +122,7 @@ class UsersController(ControllerBase):
     @http_patch(
         "/my-profile/",
         response=UserUpdatedSchema,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -177,13 +178,13 @@ class UsersController(ControllerBase):
           - **500**: Internal server error if an unexpected error occurs.
         """
 
-        result = self.user_service.update_my_profile(request.user.id, user_body)
+        result = self.user_service.update_my_profile(request.user, user_body)
         return result
 
     @http_get(
         "/my-profile/",
         response=UserOutSchema,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -220,13 +221,13 @@ class UsersController(ControllerBase):
           - **401**: Unauthorized.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.user_service.get_my_profile(request.user.id)
+        result = self.user_service.get_my_profile(request.user)
         return result
 
     @http_post(
         "/create-default-character/",
         response=CharacterOutSchema,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -286,7 +287,7 @@ class UsersController(ControllerBase):
     @http_delete(
         "/my-character/{character_id}",
         response=MessageOutSchema,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -363,7 +364,7 @@ class UsersController(ControllerBase):
     @http_patch(
         "/my-character/{character_id}",
         response=CharacterOutSchema,
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -444,7 +445,7 @@ class UsersController(ControllerBase):
     @http_get(
         "/my-characters/",
         response=list[CharacterOutSchema],
-        auth=JWTAuth(),
+        auth=CachedJWTAuth(),
         openapi_extra={
             "responses": {
                 401: {
@@ -481,7 +482,7 @@ class UsersController(ControllerBase):
           - **401**: Unauthorized.
           - **500**: Internal server error if an unexpected error occurs.
         """
-        result = self.user_service.get_my_characters(request.user.id)
+        result = self.user_service.get_my_characters(request.user)
         return result
 
 
@@ -911,6 +912,7 @@ class CustomTokenObtainPairController(ControllerBase):
         """
 
         user_token.check_user_authentication_rule()
+        OrderService.merge_guest_cart(request, user_token._user)
         return user_token.to_response_schema()
 
     @http_post(
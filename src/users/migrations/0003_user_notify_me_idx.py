@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_character_battle_tag_alter_character_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('notify_me', True)), fields=['email'], name='users_notify_me_idx'),
+        ),
+    ]
@@ -115,6 +115,10 @@ class User(AbstractUser):
         verbose_name = "Users"
         verbose_name_plural = "Users"
         db_table = "users"
+        indexes = [
+            models.Index(fields=["email"], name="users_notify_me_idx",
+                         condition=models.Q(notify_me=True)),
+        ]
 
 
 class Character(models.Model):
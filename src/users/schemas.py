@@ -285,8 +285,51 @@ class OrdersItemSchema(ModelSchema):
         exclude = ["order", "product", "id", "freqbot", "date_created"]
 
 
+class OrderSnapshotAttributeSchema(Schema):
+    """
+    Pydantic schema for attributes of ordered product.
+
+    Purpose of this schema to return attributes
+    from snapshot of order
+    """
+
+    title: str | None
+    subtitle: str | None
+
+
+class OrderSnapshotProductSchema(Schema):
+    """
+    Pydantic schema for ordered product.
+
+    Purpose of this schema to return product
+    from snapshot of order
+    """
+
+    id: int
+    title: str
+    subtitle: str
+    card_img: str
+    card_img_alt: str | None
+    game_logo: str | None
+    game_logo_alt: str | None
+    attributes: List[OrderSnapshotAttributeSchema] = []
+
+
+class OrderSnapshotItemSchema(Schema):
+    """
+    Pydantic schema for order's item.
+
+    Purpose of this schema to return item
+    from snapshot of order
+    """
+
+    cost: float | None
+    quantity: int | None
+    items: List[OrderSnapshotProductSchema]
+
+
 class OrdersDetailOutSchema(Schema):
-    items: List[OrdersItemSchema]
+    items: List[OrderSnapshotItemSchema]
     count: int
     next: bool
     previous: bool
@@ -307,21 +350,13 @@ class CabinetOrdersSchema(ModelSchema):
 
     @staticmethod
     def resolve_repeat_btn(obj):
-        for item in obj.items.all():
-            condition1 = item.freqbot and item.freqbot.is_deleted
-            condition2 = item.product and item.product.is_deleted
-            if condition1 or condition2:
-                return False
-
-            for attr in item.attributes.all():
-                if attr.subfilter is None or attr.subfilter.filter.product.id != item.product.id:
-                    return False
-        return True
+        # is set by OrderService.set_repeat_available
+        return obj.repeat_available
 
     class Meta:
         model = Order
         fields = "__all__"
-        exclude = ["user", "id"]
+        exclude = ["user", "id", "status_due_at", "snapshot"]
 
 
 class CabinetOrdersSection(Schema):
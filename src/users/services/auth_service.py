@@ -9,6 +9,7 @@ from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.views import OAuth2Adapter
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
 from django.http import HttpRequest
 from ninja_jwt.tokens import RefreshToken, AccessToken
 
@@ -17,6 +18,8 @@ from django.utils.http import urlsafe_base64_decode
 from django.utils.translation import gettext as _
 from ninja.errors import HttpError
 from loguru import logger
+from src.main.models import OutboxTask
+from src.orders.services.order_service import OrderService
 from src.users.models import PasswordResetToken, Subscriber, User
 from src.users.schemas import ChangePasswordSchema, ConfirmationSchema, EmailSchema, MessageOutSchema, RegisterSchema
 from src.users.tasks import email_verification, reset_password_confirm
@@ -31,6 +34,7 @@ class AuthService:
     """
 
     @staticmethod
+    @transaction.atomic
     def register_user(user_body: RegisterSchema) -> MessageOutSchema:
         """
         Part 1 of register new users on the site.
@@ -53,7 +57,7 @@ class AuthService:
             user.subscribe_sale_active = True
         user.save()
         token = default_token_generator.make_token(user)
-        email_verification.delay(user_id=user.id, token=token)
+        OutboxTask.objects.enqueue(email_verification, user_id=user.id, token=token)
         return MessageOutSchema(
             message=_("Please confirm " "your registration. " "We have send letter " "to your email")
         )
@@ -100,6 +104,7 @@ class AuthService:
         except Exception as e:
             return 400, {"detail": f"Could not complete social login: {e}"}
 
+        OrderService.merge_guest_cart(request, user)
         refresh = RefreshToken.for_user(user)
         return refresh
 
@@ -142,7 +147,7 @@ class AuthService:
         except User.DoesNotExist:
             raise HttpError(403, _("There is not user registered" " with that email"))
         token = default_token_generator.make_token(user)
-        reset_password_confirm.delay(user.id, token)
+        OutboxTask.objects.enqueue(reset_password_confirm, user_id=user.id, token=token)
         return MessageOutSchema(
             message=_("Please confirm " "reset password." " We have send " "instructions to your email")
         )
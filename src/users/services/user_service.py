@@ -7,8 +7,10 @@ from django.db import IntegrityError
 from django.db.models import QuerySet
 from ninja.errors import HttpError
 
+from src.main.utils import save_changed
 from src.users.models import Character, Subscriber, User
 from src.users.schemas import CharacterInSchema, MessageOutSchema, UserInSchema, EmailSchema
+from src.users.utils import IdentityMap
 from django.utils.translation import gettext as _
 
 
@@ -22,71 +24,46 @@ class UserService:
         """
         Get user personal data by id.
 
+        User already loaded during request is reused
         :param user_id: user id
         :return: User model instance
         """
-
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise HttpError(404,
-                            _("Not Found: No User matches"
-                              " the given query."))
-        return user
+        return IdentityMap.get_user(user_id)
 
     @staticmethod
-    def update_my_profile(user_id: int, user_body: UserInSchema) -> User:
+    def update_my_profile(user: User, user_body: UserInSchema) -> User:
         """
-        Get user personal data by id.
+        Update authenticated user's personal data.
 
         :param user_body: here fields that have to be updated
-        :param user_id: user id
+        :param user: authenticated User model instance
         :return: User model instance
         """
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise HttpError(404,
-                            _("Not Found: No User matches"
-                              " the given query."))
-        for key, value in user_body.dict().items():
-            if key == 'notify_me' and value and user.subscribe_sale_active is None:
-                user.subscribe_sale_active = True
-            if value is not None:
-                setattr(user, key, value)
-        user.save()
+        values = {key: value for key, value in user_body.dict().items()
+                  if value is not None}
+        if values.get('notify_me') and user.subscribe_sale_active is None:
+            values['subscribe_sale_active'] = True
+        save_changed(user, values)
         return user
 
     @staticmethod
-    def get_my_profile(user_id: int) -> User:
+    def get_my_profile(user: User) -> User:
         """
-        Get user personal data by id.
+        Get authenticated user's personal data.
 
-        :param user_id: user id
+        :param user: authenticated User model instance
         :return: User model instance
         """
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise HttpError(404,
-                            _("Not Found: No User matches"
-                              " the given query."))
         return user
 
     @staticmethod
-    def get_my_characters(user_id: int) -> QuerySet:
+    def get_my_characters(user: User) -> QuerySet:
         """
         Get user's characters data.
 
-        :param user_id: user id
-        :return: User model instance
+        :param user: authenticated User model instance
+        :return: Character queryset
         """
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise HttpError(404,
-                            _("Not Found: No User matches"
-                              " the given query."))
         return user.character_set.all()
 
     @staticmethod
@@ -104,10 +81,7 @@ class UserService:
             raise HttpError(404,
                             _("Not Found: No Character matches"
                               " the given query."))
-        for key, value in character.dict().items():
-            if value:
-                setattr(obj, key, value)
-        obj.save()
+        save_changed(obj, {key: value for key, value in character.dict().items() if value})
         return obj
 
     @staticmethod
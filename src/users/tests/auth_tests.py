@@ -1,15 +1,28 @@
 import json
+import time
+from datetime import timedelta
+
 import pytest
+from django.conf import settings
+from django.http import HttpRequest
+from django.utils import timezone
 from django.test import TestCase
 from ninja.testing.client import NinjaResponse
 from ninja_extra.testing import TestClient
 from ninja_jwt.schema_control import SchemaControl
 from src.main.utils import make_request
 from src.users.api import CustomTokenObtainPairController, AuthController
+from ninja_jwt.exceptions import InvalidToken
 from ninja_jwt.settings import api_settings
+from ninja_jwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from ninja_jwt.tokens import AccessToken, RefreshToken
 from loguru import logger
 
+from src.orders.models import Cart, CartItem
+from src.products.models import Product
+from src.users.models import User
 from src.users.schemas import MessageOutSchema
+from src.users.utils import OptionalJWTAuth, TokenCache
 
 obtain_token_client = TestClient(CustomTokenObtainPairController)
 client = TestClient(AuthController)
@@ -40,6 +53,25 @@ class TestAuthController:
         assert response.status_code == 200
         assert is_valid is True
 
+    def test_obtain_token_merges_guest_cart(self):
+        user = User.objects.get(email="user@example.com")
+        product = Product.objects.first()
+        guest_cart = Cart.objects.create(session_key="login-guest")
+        CartItem.objects.create(cart=guest_cart, product=product, quantity=2)
+        user_cart_id = Cart.objects.get_or_create_id(user_id=user.id)
+        quantity = sum(CartItem.objects.filter(cart_id=user_cart_id, product=product)
+                       .values_list("quantity", flat=True))
+
+        response = obtain_token_client.post("/pair",
+                                            json={"password": "sword123", "email": "user@example.com"},
+                                            headers=headers,
+                                            COOKIES={settings.SESSION_COOKIE_NAME: "login-guest"})
+
+        assert response.status_code == 200
+        assert not Cart.objects.filter(id=guest_cart.id).exists()
+        assert sum(CartItem.objects.filter(cart_id=user_cart_id, product=product)
+                   .values_list("quantity", flat=True)) == quantity + 2
+
     @pytest.mark.parametrize("payload,expected_status,schema_status",
                              [
                                  (
@@ -111,3 +143,66 @@ class TestAuthController:
                                               headers=headers)
         assert response.status_code == expected_status
         assert is_valid is schema_status
+
+
+@pytest.mark.django_db
+class TestTokenCache:
+
+    def test_lru_and_expiration(self):
+        cache = TokenCache(max_size=2, check_interval=60)
+        future = time.time() + 60
+        cache.set('first', {'exp': future})
+        cache.set('second', {'exp': future})
+        assert cache.get('first') is not None
+        cache.set('third', {'exp': future})
+        assert cache.get('second') is None
+        assert cache.get('first') is not None
+        cache.set('expired', {'exp': time.time() - 1})
+        assert cache.get('expired') is None
+
+    def test_blacklisted_token(self):
+        user = User.objects.get(email="user@example.com")
+        access = AccessToken.for_user(user)
+        auth = OptionalJWTAuth()
+        request = HttpRequest()
+        assert auth.jwt_authenticate(request, str(access)) == user
+        assert request.user == user
+        outstanding = OutstandingToken.objects.create(
+            user=user,
+            jti=access['jti'],
+            token=str(access),
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        BlacklistedToken.objects.create(token=outstanding)
+        with pytest.raises(InvalidToken):
+            auth.jwt_authenticate(HttpRequest(), str(access))
+
+    def test_blacklisted_session(self):
+        user = User.objects.get(email="user@example.com")
+        refresh = RefreshToken.for_user(user)
+        access = refresh.access_token
+        auth = OptionalJWTAuth()
+        assert auth.jwt_authenticate(HttpRequest(), str(access)) == user
+        # logout blacklists refresh token, its access token isn't linked to it
+        refresh.blacklist()
+        with pytest.raises(InvalidToken):
+            auth.jwt_authenticate(HttpRequest(), str(access))
+        # issued time of token is in whole seconds
+        time.sleep(1)
+        new_access = RefreshToken.for_user(user).access_token
+        assert auth.jwt_authenticate(HttpRequest(), str(new_access)) == user
+
+    def test_blacklisted_session_of_other_device(self):
+        user = User.objects.get(email="user@example.com")
+        phone = RefreshToken.for_user(user)
+        # issued time of token is in whole seconds
+        time.sleep(1)
+        laptop = RefreshToken.for_user(user)
+        auth = OptionalJWTAuth()
+        phone.blacklist()
+        with pytest.raises(InvalidToken):
+            auth.jwt_authenticate(HttpRequest(), str(phone.access_token))
+        # access token of other session, also refreshed one, still works
+        assert auth.jwt_authenticate(HttpRequest(), str(laptop.access_token)) == user
+        refreshed = RefreshToken(str(laptop)).access_token
+        assert auth.jwt_authenticate(HttpRequest(), str(refreshed)) == user
@@ -2,11 +2,13 @@ import json
 
 import pytest
 from ninja_extra.testing import TestClient
-from src.main.utils import make_request
+from src.main.utils import make_request, save_changed
 
 from src.users.api import UsersController
 from src.users.models import User, Character, Subscriber
 from src.users.schemas import UserOutSchema, CharacterOutSchema, MessageOutSchema
+from src.users.services.user_service import UserService
+from src.users.utils import IdentityMap
 
 
 client = TestClient(UsersController)
@@ -240,3 +242,30 @@ class TestUsersController:
                                           headers=headers)
         assert is_valid is False
         assert response.status_code == 409
+
+
+@pytest.mark.django_db
+class TestIdentityMap:
+    def test_same_instance_within_request(self, django_assert_num_queries):
+        user = User.objects.first()
+        token = IdentityMap.open()
+        try:
+            IdentityMap.add(user)
+            with django_assert_num_queries(0):
+                assert UserService.get_user_by_id(user.id) is user
+                assert UserService.get_my_profile(user) is user
+        finally:
+            IdentityMap.close(token)
+        assert IdentityMap.get(user.id) is None
+
+
+@pytest.mark.django_db
+class TestSaveChanged:
+    def test_only_changed_fields_saved(self, django_assert_num_queries):
+        character = Character.objects.create(name='Thrall', realm='Draenor')
+        with django_assert_num_queries(0):
+            assert save_changed(character, {'name': 'Thrall'}) == []
+        with django_assert_num_queries(1) as context:
+            assert save_changed(character, {'name': 'Jaina', 'realm': 'Draenor'}) == ['name']
+        assert '"name"' in context.captured_queries[0]['sql']
+        assert '"realm"' not in context.captured_queries[0]['sql']
@@ -1,16 +1,249 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from typing import Any, Optional, Tuple
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.http import HttpRequest
+from django.utils.translation import gettext as _
+from ninja.errors import HttpError
 from ninja.security import HttpBearer
-from ninja_jwt.authentication import JWTBaseAuthentication
+from ninja_jwt.authentication import JWTAuth, JWTBaseAuthentication
+from ninja_jwt.exceptions import AuthenticationFailed, InvalidToken
+from ninja_jwt.settings import api_settings
+from ninja_jwt.token_blacklist.models import BlacklistedToken
 
 from config import settings
+from src.main.routers import RoutingState
+from src.users.models import User
 
 logger = logging.getLogger("django")
 
+BLACKLIST_VERSION_KEY = "jwt:blacklist_version"
+
+_identity_map = ContextVar("identity_map", default=None)
+
+
+class IdentityMap:
+    """
+    Request-level map of loaded users.
+
+    Map is opened by IdentityMapMiddleware for every request,
+    so user loaded by authentication is reused by services
+    and any lookup of the same id returns the same instance.
+    Outside of request (celery, shell) users are loaded every time.
+    """
+
+    @staticmethod
+    def open():
+        return _identity_map.set({})
+
+    @staticmethod
+    def close(token) -> None:
+        _identity_map.reset(token)
+
+    @staticmethod
+    def add(user: User) -> User:
+        users = _identity_map.get()
+        if users is not None:
+            users[user.pk] = user
+        return user
+
+    @staticmethod
+    def get(user_id: int) -> Optional[User]:
+        users = _identity_map.get()
+        return users.get(user_id) if users is not None else None
+
+    @classmethod
+    def get_user(cls, user_id: int) -> User:
+        """
+        Get user by id from map or load it from db.
+
+        :param user_id: user id
+        :return: User model instance
+        """
+        user = cls.get(user_id)
+        if user is not None:
+            return user
+        try:
+            user = User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            raise HttpError(404,
+                            _("Not Found: No User matches"
+                              " the given query."))
+        return cls.add(user)
+
+
+class IdentityMapMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = IdentityMap.open()
+        try:
+            return self.get_response(request)
+        finally:
+            IdentityMap.close(token)
+
+    async def __acall__(self, request: HttpRequest):
+        token = IdentityMap.open()
+        try:
+            return await self.get_response(request)
+        finally:
+            IdentityMap.close(token)
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified JWT claims.
+
+    Cache lives in memory of worker, entries are kept until
+    token expires. When any token is blacklisted, version in
+    shared cache is increased and workers drop their entries
+    not later than BLACKLIST_CHECK_INTERVAL seconds after it.
+    """
+
+    def __init__(self, max_size: int, check_interval: int):
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0
+
+    def _check_blacklist_version(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        version = cache.get(BLACKLIST_VERSION_KEY, 0)
+        # first check only remembers version, entries were verified after it
+        if self._version is not None and version != self._version:
+            self._items.clear()
+        self._version = version
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Get claims of verified token.
+
+        :param token: raw token from header
+        :return: claims or None if token isn't cached or expired
+        """
+        with self._lock:
+            self._check_blacklist_version()
+            claims = self._items.get(token)
+            if claims is None:
+                return None
+            if claims["exp"] <= time.time():
+                del self._items[token]
+                return None
+            self._items.move_to_end(token)
+            return claims
+
+    def set(self, token: str, claims: dict) -> None:
+        with self._lock:
+            self._items[token] = claims
+            self._items.move_to_end(token)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard_user(self, user_id) -> None:
+        with self._lock:
+            for token in [token for token, claims in self._items.items()
+                          if str(claims.get(api_settings.USER_ID_CLAIM)) == str(user_id)]:
+                del self._items[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+token_cache = TokenCache(settings.JWT_AUTH_CACHE_SIZE,
+                         settings.JWT_BLACKLIST_CHECK_INTERVAL)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, **kwargs):
+    token_cache.discard_user(instance.token.user_id)
+    cache.add(BLACKLIST_VERSION_KEY, 0, None)
+    cache.incr(BLACKLIST_VERSION_KEY)
+
+
+class CachedJWTAuthMixin:
+    """
+    Fast path of JWT authentication.
+
+    Signature of token is verified and revocation is checked
+    only when token is seen first time by worker, later only
+    user is loaded. Loaded user is attached to request,
+    so services can use request.user without new queries.
+    """
+
+    @staticmethod
+    def is_revoked(claims: dict) -> bool:
+        """
+        Check if access token or refresh token of its session is blacklisted.
+
+        Access token isn't linked to its refresh token by jti, but it
+        copies "iat" of refresh token, so session is found by user and
+        creation time of refresh token. Logout revokes only access
+        tokens of its session, other devices of user keep working.
+        :param claims: claims of verified access token
+        """
+        session = Q()
+        if "iat" in claims:
+            created_at = datetime.fromtimestamp(claims["iat"], tz=dt_timezone.utc)
+            session = Q(token__user_id=claims[api_settings.USER_ID_CLAIM],
+                        token__created_at__gte=created_at,
+                        token__created_at__lt=created_at + timedelta(seconds=1))
+        return BlacklistedToken.objects.filter(Q(token__jti=claims[api_settings.JTI_CLAIM]) | session).exists()
+
+    def get_claims(self, token: str) -> dict:
+        claims = token_cache.get(token)
+        if claims is not None:
+            return claims
+        validated_token = self.get_validated_token(token)
+        claims = dict(validated_token.payload)
+        if self.is_revoked(claims):
+            raise InvalidToken(_("Token is blacklisted"))
+        token_cache.set(token, claims)
+        return claims
+
+    def get_user(self, validated_token) -> User:
+        user = IdentityMap.get(validated_token[api_settings.USER_ID_CLAIM])
+        if user is None:
+            return IdentityMap.add(super().get_user(validated_token))
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"))
+        return user
+
+    def jwt_authenticate(self, request: HttpRequest, token: str) -> Any:
+        user = self.get_user(self.get_claims(token))
+        request.user = user
+        RoutingState.set_user(user.id)
+        return user
+
+
+class CachedJWTAuth(CachedJWTAuthMixin, JWTAuth):
+    pass
+
 
 class CustomHttpBearer(HttpBearer):
     def __call__(self, request: HttpRequest) -> Optional[Any]:
@@ -28,6 +261,6 @@ class CustomHttpBearer(HttpBearer):
         return self.authenticate(request, token)
 
 
-class OptionalJWTAuth(JWTBaseAuthentication, CustomHttpBearer):
+class OptionalJWTAuth(CachedJWTAuthMixin, JWTBaseAuthentication, CustomHttpBearer):
     def authenticate(self, request: HttpRequest, token: str) -> Any:
         return self.jwt_authenticate(request, token)